@@ -3,6 +3,7 @@ from logging.config import fileConfig
 from alembic import context
 
 from dev.services.migration import MigrationService
+from models.base import Base
 from services import get_service
 
 # this is the Alembic Config object, which provides
@@ -11,7 +12,9 @@ config = context.config
 
 # Interpret the config file for Python logging.
 # This line sets up loggers basically.
-if config.config_file_name is not None:
+# Skipped when migrations are run programmatically (e.g., by tests), so that they don't
+# clobber the existing logging config.
+if config.config_file_name is not None and "connection" not in config.attributes:
     fileConfig(config.config_file_name)
 
 # other values from the config, defined by the needs of env.py,
@@ -43,6 +46,17 @@ def run_migrations_online() -> None:
     and associate a connection with the context.
 
     """
+    # Use the connection provided by :py:meth:`MigrationService.run_migrations`, if
+    # there is one.
+    # :see: https://alembic.sqlalchemy.org/en/latest/cookbook.html#connection-sharing
+    connection = config.attributes.get("connection")
+    if connection is not None:
+        context.configure(connection=connection, target_metadata=Base.metadata)
+
+        with context.begin_transaction():
+            context.run_migrations()
+        return
+
     service: MigrationService = get_service(MigrationService)
     service.run_migrations_from_env_py()
 
@@ -0,0 +1,38 @@
+"""Index awards by profile 🔎
+
+Revision ID: c1d5e8a2f304
+Revises: 7d6068e835af
+Create Date: 2026-10-19 10:12:41.118392
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+revision: str = "c1d5e8a2f304"
+down_revision: Union[str, None] = "7d6068e835af"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Build the index without blocking writes to the table (Postgres only).
+    # ``CREATE INDEX CONCURRENTLY`` can't run inside a transaction.
+    with op.get_context().autocommit_block():
+        op.create_index(
+            op.f("ix_awards_profile_id"),
+            "awards",
+            ["profile_id"],
+            unique=False,
+            postgresql_concurrently=True,
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            op.f("ix_awards_profile_id"),
+            table_name="awards",
+            postgresql_concurrently=True,
+        )
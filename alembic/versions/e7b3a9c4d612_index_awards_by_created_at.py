@@ -0,0 +1,38 @@
+"""Index awards by creation time ⏱️
+
+Revision ID: e7b3a9c4d612
+Revises: c1d5e8a2f304
+Create Date: 2026-10-19 11:04:17.529316
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+revision: str = "e7b3a9c4d612"
+down_revision: Union[str, None] = "c1d5e8a2f304"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Build the index without blocking writes to the table (Postgres only).
+    # ``CREATE INDEX CONCURRENTLY`` can't run inside a transaction.
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "ix_awards_created_at_id",
+            "awards",
+            ["created_at", "id"],
+            unique=False,
+            postgresql_concurrently=True,
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            "ix_awards_created_at_id",
+            table_name="awards",
+            postgresql_concurrently=True,
+        )
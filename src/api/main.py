@@ -8,19 +8,71 @@ Refer to README.rst for instructions to run the server.
 __all__ = ["app"]
 
 import asyncio
+from contextlib import asynccontextmanager
 
 import uvloop
 from fastapi import FastAPI
-from fastapi.responses import RedirectResponse
+from fastapi.responses import PlainTextResponse, RedirectResponse
 
+from services import LoopMonitorService, get_service
+from services.base import InstantiationPolicy, close_services, start_services
+from services.metrics import MetricsService
+from .middleware import (
+    CaptureMiddleware,
+    LoopMonitorMiddleware,
+    MetricsMiddleware,
+    ProfilerMiddleware,
+    QueryStatsMiddleware,
+    ServiceScopeMiddleware,
+)
 from .routers import v1
 
 # Activate uvloop for improved asyncio performance.
 # :see: https://uvloop.readthedocs.io/
 asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
 
+
+@asynccontextmanager
+async def lifespan(_: FastAPI):
+    """
+    Checks and instantiates services before the server starts accepting requests, so
+    that misconfigured services fail fast, and the first request doesn't have to pay for
+    constructing them.
+
+    Also starts monitoring the event loop (see
+    :py:class:`services.loop_monitor.LoopMonitorService`).
+
+    Services are closed when the server shuts down.
+
+    :see: https://fastapi.tiangolo.com/advanced/events/#lifespan
+    """
+    start_services(InstantiationPolicy.eager)
+    get_service(LoopMonitorService).start()
+    yield
+    await close_services()
+
+
 # Initialise the FastAPI application.
-app = FastAPI()
+app = FastAPI(lifespan=lifespan)
+
+# Give each request its own scope for request-scoped services.
+app.add_middleware(ServiceScopeMiddleware)
+
+# Report on the SQL statements that each request executes.
+app.add_middleware(QueryStatsMiddleware)
+
+# Profile individual requests on demand.
+app.add_middleware(ProfilerMiddleware)
+
+# Record a sample of requests for replaying later (if enabled).
+app.add_middleware(CaptureMiddleware)
+
+# Keep track of which request each task is handling, so that code that blocks the event
+# loop can be traced back to its route.
+app.add_middleware(LoopMonitorMiddleware)
+
+# Record request metrics.  Added last, so that it wraps all the other middleware.
+app.add_middleware(MetricsMiddleware)
 
 # Register routers to serve the API endpoints.
 app.include_router(v1.router)
@@ -32,3 +84,18 @@ def homepage() -> RedirectResponse:
     Redirects ``/`` to ``/v1``.
     """
     return RedirectResponse("/v1")
+
+
+@app.get("/metrics", include_in_schema=False)
+async def metrics() -> PlainTextResponse:
+    """
+    Exposes application metrics in Prometheus text format.
+
+    :see: https://prometheus.io/docs/instrumenting/exposition_formats/
+    """
+    metrics_service: MetricsService = get_service(MetricsService)
+
+    return PlainTextResponse(
+        metrics_service.render(),
+        media_type="text/plain; version=0.0.4",
+    )
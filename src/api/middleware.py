@@ -0,0 +1,304 @@
+"""
+Defines ASGI middleware for the API server.
+
+:see: https://www.starlette.io/middleware/#pure-asgi-middleware
+"""
+__all__ = [
+    "CaptureMiddleware",
+    "LoopMonitorMiddleware",
+    "MetricsMiddleware",
+    "ProfilerMiddleware",
+    "QueryStatsMiddleware",
+    "ServiceScopeMiddleware",
+]
+
+import logging
+from time import perf_counter, time
+
+from starlette.datastructures import Headers, MutableHeaders, QueryParams
+from starlette.responses import PlainTextResponse
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from services import CaptureService, DatabaseService, ProfilerService, get_service
+from services.base import request_scope
+from services.loop_monitor import current_request
+from services.metrics import MetricsService
+from services.profiler import ProfileMode, ProfilerBusyError
+
+logger = logging.getLogger(__name__)
+
+# Route label for requests that didn't match any route, so that requests for random
+# paths don't create a new set of metrics each.
+UNMATCHED_ROUTE = "<unmatched>"
+
+# Likewise, method label for requests with a non-standard method (any client can send
+# whatever method it likes).
+OTHER_METHOD = "OTHER"
+STANDARD_METHODS = frozenset(
+    ["CONNECT", "DELETE", "GET", "HEAD", "OPTIONS", "PATCH", "POST", "PUT", "TRACE"]
+)
+
+
+class MetricsMiddleware:
+    """
+    Records request counts, latency and in-flight requests for each route.
+
+    Requests are labelled with the route's path template (e.g.,
+    ``/v1/profile/{profile_id}``), rather than the actual path.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        metrics: MetricsService = get_service(MetricsService)
+        in_flight = metrics.http_in_flight
+
+        status = 500
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        in_flight.inc()
+        start = perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = perf_counter() - start
+            in_flight.dec()
+
+            # The router adds the matched route to the scope.
+            route = scope.get("route")
+            method = scope["method"]
+            metrics.record_request(
+                method if method in STANDARD_METHODS else OTHER_METHOD,
+                route.path if route else UNMATCHED_ROUTE,
+                status,
+                elapsed,
+            )
+
+
+class CaptureMiddleware:
+    """
+    Records a sample of requests, so that they can be replayed later (see
+    :py:class:`services.capture.CaptureService`).
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        capture: CaptureService = get_service(CaptureService)
+
+        # Fast path: capturing is disabled, or this request wasn't sampled.
+        if not capture.should_capture():
+            return await self.app(scope, receive, send)
+
+        body = bytearray()
+        status = 500
+
+        async def receive_wrapper() -> Message:
+            message = await receive()
+            if message["type"] == "http.request":
+                body.extend(message.get("body", b""))
+            return message
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        received_at = time()
+        start = perf_counter()
+        try:
+            await self.app(scope, receive_wrapper, send_wrapper)
+        finally:
+            route = scope.get("route")
+            path = scope["path"]
+            if scope["query_string"]:
+                path += "?" + scope["query_string"].decode("latin-1")
+
+            capture.record(
+                time=received_at,
+                method=scope["method"],
+                path=path,
+                route=route.path if route else None,
+                body=bytes(body),
+                status=status,
+                duration=perf_counter() - start,
+            )
+
+
+class LoopMonitorMiddleware:
+    """
+    Records which request each task is handling, so that
+    :py:class:`services.loop_monitor.LoopMonitorService` can tell which route blocked
+    the event loop.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        # Not reset afterwards: each request is handled in its own task (with its own
+        # copy of the context), and the monitor may still need it to attribute the step
+        # that finishes the request.
+        current_request.set(scope)
+        await self.app(scope, receive, send)
+
+
+class ServiceScopeMiddleware:
+    """
+    Runs each HTTP request inside its own :py:func:`services.base.request_scope`, so
+    that request-scoped services are shared for the duration of the request, then
+    cleaned up.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        async with request_scope():
+            await self.app(scope, receive, send)
+
+
+class QueryStatsMiddleware:
+    """
+    Records the SQL statements executed by each request, and reports them:
+
+    - In a ``Server-Timing`` header, so they show up in browser dev tools.
+    - In the logs, for requests that take longer than ``slow_request_threshold``.
+    - In the logs, for requests that execute the same statement at least
+      ``repeated_query_threshold`` times (possible N+1 query).
+
+    :see: https://developer.mozilla.org/en-US/docs/Web/HTTP/Headers/Server-Timing
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        db: DatabaseService = get_service(DatabaseService)
+        start = perf_counter()
+
+        with db.track_queries() as stats:
+
+            async def send_wrapper(message: Message) -> None:
+                if message["type"] == "http.response.start":
+                    elapsed_ms = (perf_counter() - start) * 1000
+                    headers = MutableHeaders(scope=message)
+                    headers.append(
+                        "Server-Timing",
+                        f'db;dur={stats.total_time * 1000:.2f};desc="{stats.count} '
+                        f'queries", app;dur={elapsed_ms:.2f}',
+                    )
+                await send(message)
+
+            await self.app(scope, receive, send_wrapper)
+
+        elapsed = perf_counter() - start
+        request = f"{scope['method']} {scope['path']}"
+
+        if elapsed >= db.config.slow_request_threshold:
+            logger.warning(
+                "Slow request: %s took %.3fs (%d queries, %.3fs in DB; slowest "
+                "query took %.3fs: %s)",
+                request,
+                elapsed,
+                stats.count,
+                stats.total_time,
+                stats.slowest_time,
+                stats.slowest_statement,
+            )
+
+        for statement, count in stats.repeated(
+            db.config.repeated_query_threshold
+        ).items():
+            logger.warning(
+                "Possible N+1 query: %s executed the same statement %d times: %s",
+                request,
+                count,
+                statement,
+            )
+
+
+class ProfilerMiddleware:
+    """
+    Profiles individual requests on demand.
+
+    To profile a request, add a ``_profile`` query parameter or an ``X-Profile`` header,
+    set to a :py:class:`services.profiler.ProfileMode` (e.g.,
+    ``GET /v1/profile/1?_profile=deterministic``).  The path to the saved profile is
+    returned in the ``X-Profile-Path`` response header.
+
+    In production, the request must also include an ``X-Profile-Token`` header that
+    matches the ``profiler_token`` config value.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        headers = Headers(scope=scope)
+        mode = headers.get("x-profile")
+        if mode is None and scope["query_string"]:
+            mode = QueryParams(scope["query_string"]).get("_profile")
+
+        # Fast path: nothing to profile.
+        if mode is None:
+            return await self.app(scope, receive, send)
+
+        profiler: ProfilerService = get_service(ProfilerService)
+
+        if not profiler.is_allowed(headers.get("x-profile-token")):
+            response = PlainTextResponse("Profiling is not allowed", status_code=403)
+            return await response(scope, receive, send)
+
+        if mode not in ProfileMode.__members__:
+            response = PlainTextResponse(
+                f"Invalid profile mode {mode!r}; expected one of "
+                f"{', '.join(ProfileMode)}",
+                status_code=400,
+            )
+            return await response(scope, receive, send)
+
+        try:
+            async with profiler.profile_async(
+                ProfileMode(mode), f"{scope['method']} {scope['path']}"
+            ) as path:
+
+                async def send_wrapper(message: Message) -> None:
+                    if message["type"] == "http.response.start":
+                        MutableHeaders(scope=message).append(
+                            "X-Profile-Path", str(path)
+                        )
+                    await send(message)
+
+                await self.app(scope, receive, send_wrapper)
+        except ProfilerBusyError:
+            response = PlainTextResponse(
+                "Another request is already being profiled", status_code=409
+            )
+            return await response(scope, receive, send)
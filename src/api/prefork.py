@@ -0,0 +1,258 @@
+"""
+Runs the API server in several worker processes, which are forked from a master process
+that has already imported and warmed up the app (see :py:class:`PreforkServer`).
+"""
+__all__ = ["PreforkServer", "WorkerServer", "warm_up"]
+
+import asyncio
+import gc
+import logging
+import os
+import signal
+import socket
+import sys
+import traceback
+from random import randint
+from time import monotonic, sleep
+
+import uvicorn
+from fastapi import FastAPI
+from uvicorn.importer import import_from_string
+
+# uvicorn configures this logger, so master process messages look the same as the
+# workers' messages.
+logger = logging.getLogger("uvicorn.error")
+
+# If a worker fails sooner than this (in seconds) after it starts, wait this long before
+# starting another one, so that a broken app doesn't turn into a fork loop.
+MIN_WORKER_LIFETIME = 1.0
+
+# When a worker shuts down, how long (in seconds) to wait for connections that it has
+# accepted to send their first request (see :py:meth:`WorkerServer.shutdown`).
+FIRST_REQUEST_TIMEOUT = 1.0
+
+# Signals that stop the server.
+EXIT_SIGNALS = {signal.SIGINT, signal.SIGTERM}
+
+
+def warm_up(app: FastAPI) -> None:
+    """
+    Does the work that every worker would otherwise repeat when it starts (or while
+    handling its first requests), so that it can be done once, before forking.
+    """
+    from sqlalchemy.orm import configure_mappers
+
+    from services import DatabaseService, get_service
+    from services.base import InstantiationPolicy, start_services
+
+    # Check and create services, and create the database engine, which imports the
+    # database driver.  Nothing connects to the database yet (see
+    # :py:meth:`services.database.DatabaseService.after_fork`).
+    start_services(InstantiationPolicy.eager)
+    get_service(DatabaseService).engine
+
+    # Set up ORM mappers, which otherwise happens the first time a model is used.
+    configure_mappers()
+
+    # Build the OpenAPI schema and the middleware stack, which are otherwise built on
+    # the first request.
+    app.openapi()
+    app.middleware_stack = app.build_middleware_stack()
+
+
+class WorkerServer(uvicorn.Server):
+    """
+    uvicorn server for a worker process, which doesn't drop connections that it has
+    accepted when it shuts down.
+
+    Workers share the listening socket, so a worker may have accepted a connection that
+    hasn't sent its request yet (or that the worker hasn't read yet) when it decides to
+    shut down (e.g., after ``max_requests``).  uvicorn treats such a connection as idle
+    and closes it, so the client gets a reset instead of a response.  Instead, the
+    worker stops accepting connections (so that other workers pick up new ones), then
+    waits for those connections to send their requests, which it handles before
+    exiting.
+    """
+
+    async def shutdown(self, sockets: list[socket.socket] | None = None) -> None:
+        for server in self.servers:
+            server.close()
+
+        deadline = monotonic() + FIRST_REQUEST_TIMEOUT
+        while monotonic() < deadline and any(
+            # Connections that have handled a request are idle keep-alive connections,
+            # which are safe to close (clients expect those to be closed at any time).
+            connection.cycle is None
+            for connection in self.server_state.connections
+        ):
+            await asyncio.sleep(0.01)
+
+        await super().shutdown(sockets)
+
+
+class PreforkServer:
+    """
+    Imports the app once, then forks worker processes that each run a uvicorn server on
+    a shared socket.
+
+    Workers share the master's memory pages (copy-on-write) for everything that was
+    loaded before they were forked: modules, the app, services, etc.  The garbage
+    collector is frozen before forking, as otherwise it would write to (and copy) every
+    shared page that holds Python objects the first time that it runs.
+
+    Workers are restarted after handling ``max_requests`` requests, to contain memory
+    growth.  Each worker's limit is randomised a little, so that they don't all restart
+    at once.
+    """
+
+    def __init__(
+        self,
+        app: str,
+        host: str = "127.0.0.1",
+        port: int = 8000,
+        workers: int = 1,
+        max_requests: int | None = None,
+        max_requests_jitter: int = 0,
+    ):
+        """
+        :param app: import path of the ASGI app (e.g. ``api.main:app``).
+        :param workers: number of worker processes.
+        :param max_requests: restart each worker after it has handled this many
+            requests (``None`` to never restart workers).
+        :param max_requests_jitter: add up to this many requests to each worker's
+            ``max_requests``.
+        """
+        self.app = app
+        self.workers = workers
+        self.max_requests = max_requests
+        self.max_requests_jitter = max_requests_jitter
+
+        # Configures logging, too.
+        self.config = uvicorn.Config(app, host=host, port=port, lifespan="on")
+
+        # Start time of each worker, keyed by PID.
+        self.children: dict[int, float] = {}
+        self.stopping = False
+
+    def run(self) -> int:
+        """
+        Runs the server until it receives ``SIGINT`` or ``SIGTERM``.
+
+        :returns: exit code for the master process.
+        """
+        # Don't collect garbage while importing, so that objects aren't moved between
+        # generations (and their pages written to) before they are frozen.
+        # :see: https://docs.python.org/3/library/gc.html#gc.freeze
+        gc.disable()
+
+        sock = self.config.bind_socket()
+
+        logger.info("Loading %s", self.app)
+        app = import_from_string(self.app)
+        warm_up(app)
+        self.config.app = app
+
+        gc.freeze()
+
+        for signum in EXIT_SIGNALS:
+            signal.signal(signum, self._handle_exit)
+
+        for _ in range(self.workers):
+            self._spawn(sock)
+
+        gc.enable()
+
+        while self.children:
+            try:
+                pid, status = os.wait()
+            except ChildProcessError:
+                break
+
+            started = self.children.pop(pid)
+            code = os.waitstatus_to_exitcode(status)
+
+            if self.stopping:
+                continue
+
+            logger.info("Worker %d exited with code %d; replacing it", pid, code)
+            if code != 0 and monotonic() - started < MIN_WORKER_LIFETIME:
+                sleep(MIN_WORKER_LIFETIME)
+            self._spawn(sock)
+
+        sock.close()
+        logger.info("Stopped")
+        return 0
+
+    def _spawn(self, sock: socket.socket) -> None:
+        """
+        Forks a worker process.
+        """
+        max_requests = self.max_requests and (
+            self.max_requests + randint(0, self.max_requests_jitter)
+        )
+
+        # Hold off exit signals until both processes are ready for them: the child
+        # would otherwise run the master's handler, and the master would otherwise miss
+        # the new child when it stops the workers.
+        pid = None
+        signal.pthread_sigmask(signal.SIG_BLOCK, EXIT_SIGNALS)
+        try:
+            # Don't start any more workers if the server was stopped while it was
+            # starting them.
+            if not self.stopping:
+                pid = os.fork()
+                if pid:
+                    self.children[pid] = monotonic()
+        finally:
+            # The child unblocks them once it has reset its handlers (see
+            # :py:meth:`_run_worker`).
+            if pid != 0:
+                signal.pthread_sigmask(signal.SIG_UNBLOCK, EXIT_SIGNALS)
+
+        if pid != 0:
+            return
+
+        code = 1
+        try:
+            self._run_worker(sock, max_requests)
+            code = 0
+        except BaseException:
+            traceback.print_exc()
+        finally:
+            sys.stdout.flush()
+            sys.stderr.flush()
+            # Don't run the master's cleanup code (atexit handlers, etc.).
+            os._exit(code)
+
+    def _run_worker(self, sock: socket.socket, max_requests: int | None) -> None:
+        from services.base import after_fork
+
+        # The master only re-enables the garbage collector for itself, after forking the
+        # first workers.  Shared objects stay frozen, so collecting doesn't copy them.
+        gc.enable()
+
+        # uvicorn installs its own handlers (which shut the worker down gracefully).
+        for signum in EXIT_SIGNALS:
+            signal.signal(signum, signal.SIG_DFL)
+        signal.pthread_sigmask(signal.SIG_UNBLOCK, EXIT_SIGNALS)
+
+        # Give the worker its own database connections, etc.
+        after_fork()
+
+        self.config.limit_max_requests = max_requests
+        WorkerServer(self.config).run(sockets=[sock])
+
+    def _handle_exit(self, signum: int, _) -> None:
+        """
+        Stops the workers (gracefully), and stops replacing them as they exit.
+        """
+        self.stopping = True
+
+        for pid in self.children:
+            try:
+                # uvicorn treats a second ``SIGINT`` as "exit now", so always send
+                # ``SIGTERM`` (workers may already have received ``SIGINT`` from the
+                # terminal).
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
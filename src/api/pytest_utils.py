@@ -0,0 +1,66 @@
+"""
+Helpers for testing API endpoints.
+"""
+__all__ = ["assert_max_queries", "assert_no_full_scans"]
+
+import typing
+from contextlib import asynccontextmanager, contextmanager
+
+from dev.query_plan import LARGE_TABLES, capture_statements, explain_statements
+from services import DatabaseService, get_service
+from services.database import QueryStats
+
+
+@contextmanager
+def assert_max_queries(max_queries: int) -> typing.Iterator[QueryStats]:
+    """
+    Fails the test if the code inside the block executes more than ``max_queries`` SQL
+    statements, e.g.::
+
+       with assert_max_queries(1):
+           response = client.get(f"/v1/profile/{profile.id}")
+
+    Use this to catch changes that make an endpoint query the database more often
+    (e.g., N+1 queries, or a relationship that is now loaded separately).
+    """
+    db: DatabaseService = get_service(DatabaseService)
+
+    with db.collect_queries() as stats:
+        yield stats
+
+    assert stats.count <= max_queries, (
+        f"Expected at most {max_queries} queries, but {stats.count} were executed:\n"
+        + "\n".join(
+            f"[{count}x] {statement}"
+            for statement, count in stats.statement_counts.items()
+        )
+    )
+
+
+@asynccontextmanager
+async def assert_no_full_scans(
+    large_tables: typing.Collection[str] = LARGE_TABLES,
+) -> typing.AsyncIterator[list[tuple]]:
+    """
+    Fails the test if any query executed inside the block scans every row in one of
+    ``large_tables``, e.g.::
+
+       async with assert_no_full_scans():
+           await ProfileService.get_by_id(session, profile.id)
+
+    Use this to catch missing indexes (e.g., a new query that filters on a column
+    without an index).  The failure message suggests indexes to add.
+    """
+    db: DatabaseService = get_service(DatabaseService)
+
+    with capture_statements(db.engine) as statements:
+        yield statements
+
+    plans = await explain_statements(db.engine, statements, large_tables)
+    problems = [(plan, issue) for plan in plans for issue in plan.issues]
+
+    assert not problems, "Queries scan every row in a large table:\n" + "\n".join(
+        f"{plan.statement}\n  {issue.detail}"
+        + "".join(f"\n  Suggested index: {s}" for s in issue.suggestions)
+        for plan, issue in problems
+    )
@@ -3,11 +3,16 @@ Define routes for our v1 API.
 """
 __all__ = ["router"]
 
-from fastapi import APIRouter, HTTPException
+from datetime import datetime
+from typing import Annotated
+
+import orjson
+from fastapi import APIRouter, HTTPException, Query, Response
 
 from models.base import model_encoder
 from models.profile import Profile
-from services import get_service
+from services import AwardService, ConfigService, get_service
+from services.award import decode_cursor, encode_cursor
 from services.profile import EditAwardRequest, EditProfileRequest, ProfileService
 
 # All API routes defined in this module will have a path prefix of ``/v1``.
@@ -24,8 +29,41 @@ def index() -> dict:
     return {"message": "Kia ora te ao!"}
 
 
-@router.get("/profile/{profile_id}")
-async def get_profile(profile_id: int) -> dict:
+@router.get("/profiles")
+async def list_profiles(
+    after: int | None = None,
+    limit: Annotated[int, Query(ge=1, le=500)] = 100,
+) -> Response:
+    """
+    Returns profiles (with their awards), ordered by ID.
+
+    To get the next page, pass ``next_after`` from the response as ``after``
+    (``next_after`` is ``null`` on the last page).
+    """
+    profile_service: ProfileService = get_service(ProfileService)
+
+    async with profile_service.session() as session:
+        profiles = await profile_service.read_profiles(
+            session, after=after, limit=limit
+        )
+
+    # Serialise the records directly, rather than via ``model_encoder`` and FastAPI's
+    # response validation, as it is much faster for lots of rows.
+    return Response(
+        orjson.dumps(
+            {
+                "profiles": profiles,
+                "next_after": profiles[-1].id if len(profiles) == limit else None,
+            }
+        ),
+        media_type="application/json",
+    )
+
+
+# The response model is given explicitly, as FastAPI can't build one from the return
+# annotation (a raw ``Response`` is sent as-is, without validation).
+@router.get("/profile/{profile_id}", response_model=dict)
+async def get_profile(profile_id: int) -> Response | dict:
     """
     Retrieves the profile with the specified ID.
 
@@ -33,6 +71,16 @@ async def get_profile(profile_id: int) -> dict:
     """
     profile_service: ProfileService = get_service(ProfileService)
 
+    if get_service(ConfigService).profile_json_from_db:
+        # Let the database build the response, and send it straight through.
+        async with profile_service.session() as session:
+            document = await profile_service.get_json_by_id(session, profile_id)
+
+        if document is None:
+            raise HTTPException(status_code=404, detail="Profile not found")
+
+        return Response(document, media_type="application/json")
+
     async with profile_service.session() as session:
         profile: Profile | None = await profile_service.get_by_id(session, profile_id)
 
@@ -86,6 +134,16 @@ async def bestow_award(profile_id: int, body: EditAwardRequest) -> dict:
     """
     profile_service: ProfileService = get_service(ProfileService)
 
+    if get_service(ConfigService).award_group_commit:
+        # Save the award along with awards from other requests.  The profile is loaded
+        # as part of saving the batch, so it doesn't need another query.
+        profile: Profile | None = await profile_service.queue_award(profile_id, body)
+
+        if not profile:
+            raise HTTPException(status_code=404, detail="Profile not found")
+
+        return model_encoder(profile)
+
     async with profile_service.session() as session:
         profile: Profile | None = await profile_service.bestow_award(
             session, profile_id, body
@@ -96,3 +154,45 @@ async def bestow_award(profile_id: int, body: EditAwardRequest) -> dict:
             raise HTTPException(status_code=404, detail="Profile not found")
 
         return model_encoder(profile)
+
+
+@router.get("/awards")
+async def recent_awards(
+    since: datetime | None = None,
+    until: datetime | None = None,
+    cursor: str | None = None,
+    limit: Annotated[int, Query(ge=1, le=100)] = 20,
+    with_profile: bool = False,
+) -> dict:
+    """
+    Returns the most recent awards across all profiles, newest first.
+
+    Optionally filters to awards created in ``[since, until)``.  To get the next page,
+    pass ``next_cursor`` from the response as ``cursor`` (``next_cursor`` is ``null``
+    on the last page).
+
+    Set ``with_profile`` to include a summary of each award's profile.
+    """
+    try:
+        after = decode_cursor(cursor) if cursor else None
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+    award_service: AwardService = get_service(AwardService)
+
+    async with award_service.session() as session:
+        awards = await award_service.recent_awards(
+            session,
+            limit=limit,
+            since=since,
+            until=until,
+            after=after,
+            with_profile=with_profile,
+        )
+
+    last = awards[-1] if len(awards) == limit else None
+
+    return {
+        "awards": awards,
+        "next_cursor": encode_cursor(last["created_at"], last["id"]) if last else None,
+    }
@@ -1,12 +1,24 @@
 """
 Defines helper functions for running async commands via Typer.
 """
-__all__ = ["embed_event_loop"]
+__all__ = ["embed_event_loop", "persistent_event_loop", "run_profiled"]
 
 import asyncio
+import threading
+import typing
 from asyncio import iscoroutinefunction
+from contextlib import contextmanager
 from functools import wraps
 
+import click
+import typer
+
+from services.base import close_services, request_scope
+
+# Event loop that async commands run on, if one is active; see
+# :py:func:`persistent_event_loop`.
+_persistent_loop: asyncio.AbstractEventLoop | None = None
+
 
 def embed_event_loop(func):
     """
@@ -39,14 +51,100 @@ def embed_event_loop(func):
         # its own event loop.  The function will block until the asynchronous function
         # finishes, so it's not a good general-purpose solution.  That said, we're only
         # going to run one Typer command at a time, so the blocking call is fine here.
+        # Each command runs in its own request scope, so request-scoped services are
+        # cleaned up when the command finishes.
         @wraps(func)
         def wrapper(*args, **kwargs):
             async def coroutine():
-                return await func(*args, **kwargs)
+                async with request_scope():
+                    return await func(*args, **kwargs)
 
-            return asyncio.run(coroutine())
+            # Check whether the global ``--profile`` option was set (see
+            # :py:func:`cli.main.main`).
+            ctx = click.get_current_context(silent=True)
+            profile_mode = ctx.meta.get("profile") if ctx else None
+
+            if profile_mode:
+                return run_profiled(coroutine, profile_mode, ctx.command_path)
+
+            return _run(coroutine)
 
         return wrapper
 
     # For synchronous functions, just return it unmodified.
     return func
+
+
+def run_profiled(
+    coroutine: typing.Callable[[], typing.Coroutine], mode: str, label: str
+) -> typing.Any:
+    """
+    Runs an async function in its own event loop (like :py:func:`asyncio.run`), and
+    profiles it.
+
+    :param coroutine: the async function to run.
+    :param mode: see :py:class:`services.profiler.ProfileMode`.
+    :param label: included in the profile's filename.
+    """
+    if _persistent_loop:
+        # The command would run in a different thread, so the profiler wouldn't see it.
+        raise click.UsageError("--profile is not supported inside the shell")
+
+    # Only import the profiler if it's needed, to keep CLI startup fast.
+    from services import ProfilerService, get_service
+    from services.profiler import ProfileMode
+
+    profiler: ProfilerService = get_service(ProfilerService)
+
+    with profiler.profile(ProfileMode(mode), label) as path:
+        try:
+            return asyncio.run(coroutine())
+        finally:
+            # The profile is written as soon as we exit the ``with`` block.
+            typer.echo(f"Saving profile to {path}", err=True)
+
+
+@contextmanager
+def persistent_event_loop() -> typing.Iterator[asyncio.AbstractEventLoop]:
+    """
+    Runs an event loop in a background thread for the duration of the block.
+
+    Commands decorated with :py:func:`embed_event_loop` that are invoked inside the
+    block run on this loop, instead of each one starting (and then throwing away) its
+    own.  That way, anything tied to the event loop (e.g., the database engine's
+    connection pool) can be reused from one command to the next.
+
+    Singleton services are closed when the block exits.
+    """
+    global _persistent_loop
+
+    if _persistent_loop:
+        raise RuntimeError("A persistent event loop is already running")
+
+    loop = asyncio.new_event_loop()
+    thread = threading.Thread(target=loop.run_forever, name="cli-event-loop")
+    thread.start()
+
+    _persistent_loop = loop
+    try:
+        yield loop
+    finally:
+        _persistent_loop = None
+
+        try:
+            asyncio.run_coroutine_threadsafe(close_services(), loop).result()
+        finally:
+            loop.call_soon_threadsafe(loop.stop)
+            thread.join()
+            loop.close()
+
+
+def _run(coroutine: typing.Callable[[], typing.Coroutine]) -> typing.Any:
+    """
+    Runs an async function to completion, on the persistent event loop if there is one
+    (see :py:func:`persistent_event_loop`), otherwise in a new event loop.
+    """
+    if _persistent_loop:
+        return asyncio.run_coroutine_threadsafe(coroutine(), _persistent_loop).result()
+
+    return asyncio.run(coroutine())
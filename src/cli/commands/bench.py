@@ -0,0 +1,480 @@
+"""
+Defines CLI commands for load testing a running instance of the API.
+"""
+__all__ = [
+    "LoadGenerator",
+    "LoadMode",
+    "Operation",
+    "app",
+    "parse_mix",
+    "replay_requests",
+]
+
+import asyncio
+import typing
+from enum import StrEnum, auto
+from pathlib import Path
+from random import Random
+from secrets import token_hex
+from time import perf_counter
+
+import httpx
+import typer
+from rich import print as rich_print
+from rich.live import Live
+from rich.table import Table
+
+from cli.async_support import embed_event_loop
+from dev.benchmark import (
+    BenchmarkResult,
+    LatencyStats,
+    compare_results,
+    load_results,
+    save_result,
+)
+from services.capture import CapturedRequest, read_capture
+
+# Create a Typer instance to hold CLI commands for the ``bench`` namespace.
+app = typer.Typer(name="bench")
+
+DEFAULT_MIX = "read=70,edit=10,create=10,award=10"
+
+
+class Operation(StrEnum):
+    """
+    Types of request that the load generator can send.
+    """
+
+    read = auto()
+    edit = auto()
+    create = auto()
+    award = auto()
+
+
+class LoadMode(StrEnum):
+    """
+    How the load generator decides when to send requests.
+    """
+
+    # Keep a fixed number of requests in flight; each worker sends its next request as
+    # soon as the previous one completes.  Measures the maximum throughput.
+    closed = auto()
+
+    # Send requests at a fixed rate, regardless of how quickly the server responds.
+    # Measures latency at a given level of traffic.
+    open = auto()
+
+
+def parse_mix(value: str) -> dict[Operation, float]:
+    """
+    Parses a request mix, e.g. ``"read=70,edit=10,create=10,award=10"``.
+
+    Weights are relative, so they don't have to add up to 100.
+
+    :raises typer.BadParameter: if the mix is invalid.
+    """
+    mix = {}
+
+    for item in value.split(","):
+        name, _, weight = item.partition("=")
+
+        try:
+            mix[Operation(name.strip())] = float(weight)
+        except ValueError:
+            raise typer.BadParameter(
+                f"Invalid mix item {item!r}; expected e.g. 'read=70' "
+                f"(operations: {', '.join(Operation)})"
+            )
+
+    if sum(mix.values()) <= 0:
+        raise typer.BadParameter("At least one operation must have a positive weight.")
+
+    return mix
+
+
+class LoadGenerator:
+    """
+    Sends a mix of requests to the API, and keeps track of how long they take.
+    """
+
+    def __init__(
+        self,
+        client: httpx.AsyncClient,
+        mix: dict[Operation, float],
+        profile_ids: int,
+        seed: int | None = None,
+    ):
+        """
+        :param client: sends requests to the server under test.
+        :param mix: relative weight of each type of request (see :py:func:`parse_mix`).
+        :param profile_ids: requests target profiles with IDs from 1 to this value.
+        :param seed: seed for choosing requests, so that runs can be repeated.
+        """
+        self.client = client
+        self.profile_ids = profile_ids
+
+        self.operations = list(mix.keys())
+        self.weights = list(mix.values())
+        self.random = Random(seed)
+
+        # Usernames must be unique, so give each run its own prefix.
+        self.run_id = token_hex(4)
+
+        self.stats = {operation: LatencyStats() for operation in Operation}
+        self.sent = 0
+
+    async def send(self, scheduled: float | None = None) -> None:
+        """
+        Sends the next request.
+
+        :param scheduled: when the request should have been sent
+            (:py:func:`time.perf_counter`).  Latency is measured from this time, so
+            that delays in sending the request are included.
+        """
+        n = self.sent
+        self.sent += 1
+
+        operation = self.random.choices(self.operations, self.weights)[0]
+        profile_id = self.random.randint(1, self.profile_ids)
+
+        start = scheduled or perf_counter()
+        try:
+            response = await self._request(operation, profile_id, n)
+            ok = response.status_code < 400
+        except httpx.HTTPError:
+            ok = False
+
+        self.stats[operation].record(perf_counter() - start, ok)
+
+    async def run_closed(self, concurrency: int, duration: float) -> None:
+        """
+        Keeps ``concurrency`` requests in flight for ``duration`` seconds.
+        """
+        deadline = perf_counter() + duration
+
+        async def worker():
+            while perf_counter() < deadline:
+                await self.send()
+
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+
+    async def run_open(self, rate: float, duration: float) -> None:
+        """
+        Sends ``rate`` requests per second for ``duration`` seconds.
+        """
+        start = perf_counter()
+        tasks = set()
+
+        for n in range(int(rate * duration)):
+            scheduled = start + n / rate
+            await asyncio.sleep(max(0.0, scheduled - perf_counter()))
+
+            task = asyncio.create_task(self.send(scheduled))
+            tasks.add(task)
+            task.add_done_callback(tasks.discard)
+
+        await asyncio.gather(*tasks)
+
+    def render(self, elapsed: float) -> Table:
+        """
+        Summarises the results so far.
+        """
+        table = Table(title=f"{self.sent} requests in {elapsed:.1f}s")
+
+        for column in ("operation", "requests", "req/s", "p50", "p95", "p99", "errors"):
+            table.add_column(
+                column, justify="left" if column == "operation" else "right"
+            )
+
+        total = LatencyStats()
+        for operation, stats in self.stats.items():
+            total.latencies.extend(stats.latencies)
+            total.errors += stats.errors
+
+            if stats.count:
+                table.add_row(operation, *self._format_row(stats, elapsed))
+
+        table.add_row("total", *self._format_row(total, elapsed), style="bold")
+        return table
+
+    @staticmethod
+    def _format_row(stats: LatencyStats, elapsed: float) -> list[str]:
+        summary = stats.summary()
+
+        return [
+            str(stats.count),
+            f"{stats.count / elapsed:.1f}" if elapsed else "-",
+            *(f"{summary[p]:.1f}ms" for p in ("p50", "p95", "p99")),
+            f"{stats.error_rate:.1%}",
+        ]
+
+    def _request(
+        self, operation: Operation, profile_id: int, n: int
+    ) -> typing.Awaitable[httpx.Response]:
+        match operation:
+            case Operation.read:
+                return self.client.get(f"/v1/profile/{profile_id}")
+
+            case Operation.edit:
+                return self.client.put(
+                    f"/v1/profile/{profile_id}",
+                    json=self._profile_data(f"loadtest{profile_id}", n),
+                )
+
+            case Operation.create:
+                return self.client.post(
+                    "/v1/profile",
+                    json=self._profile_data(f"loadtest-{self.run_id}-{n}", n),
+                )
+
+            case Operation.award:
+                return self.client.post(
+                    f"/v1/profile/{profile_id}/award",
+                    json={"title": f"Load test {self.run_id}"},
+                )
+
+    @staticmethod
+    def _profile_data(username: str, n: int) -> dict:
+        return {
+            "username": username,
+            "password": f"password{n}",
+            "gender": "female" if n % 2 else "male",
+            "full_name": f"Load Test {n}",
+            "street_address": f"{n} Load Test Road",
+            "email": f"{username}@example.com",
+        }
+
+
+# This command can be invoked by running ``pipenv run app-cli bench load``.
+@app.command("load")
+@embed_event_loop
+async def load(
+    url: typing.Annotated[
+        str, typer.Argument(help="Base URL of the server to test.")
+    ] = "http://localhost:8000",
+    mode: typing.Annotated[
+        LoadMode,
+        typer.Option(help="'closed' for fixed concurrency, 'open' for fixed rate."),
+    ] = LoadMode.closed,
+    duration: typing.Annotated[
+        float, typer.Option(help="How long to run the test (seconds).")
+    ] = 30.0,
+    concurrency: typing.Annotated[
+        int,
+        typer.Option(
+            help="Requests in flight (closed mode), or max connections (open mode)."
+        ),
+    ] = 10,
+    rate: typing.Annotated[
+        float, typer.Option(help="Requests per second (open mode).")
+    ] = 100.0,
+    mix: typing.Annotated[
+        str, typer.Option(help="Relative weight of each type of request.")
+    ] = DEFAULT_MIX,
+    profiles: typing.Annotated[
+        int, typer.Option(help="Target profiles with IDs from 1 to this value.")
+    ] = 100,
+    seed: typing.Annotated[
+        typing.Optional[int], typer.Option(help="Seed for repeatable runs.")
+    ] = None,
+    refresh: typing.Annotated[
+        float, typer.Option(help="How often to update the live report (seconds).")
+    ] = 1.0,
+):
+    """
+    Sends a mix of reads, edits, creates and awards to a running server, and reports
+    latency percentiles and error rates as it goes.
+
+    Note: edits, creates and awards modify the database, so don't point this at
+    production!
+    """
+    weights = parse_mix(mix)
+
+    rich_print(
+        f"[green]Load testing [cyan]{url}[/cyan] for [cyan]{duration}s[/cyan] "
+        f"({mode} mode)...[/green]"
+    )
+
+    async with httpx.AsyncClient(
+        base_url=url,
+        limits=httpx.Limits(
+            max_connections=concurrency, max_keepalive_connections=concurrency
+        ),
+        # In open mode, requests queue up for a connection when the server falls
+        # behind, so don't let them time out too early.
+        timeout=max(duration, 5.0),
+    ) as client:
+        generator = LoadGenerator(client, weights, profiles, seed)
+        start = perf_counter()
+
+        if mode == LoadMode.closed:
+            run = generator.run_closed(concurrency, duration)
+        else:
+            run = generator.run_open(rate, duration)
+
+        with Live(generator.render(0.0), refresh_per_second=4) as live:
+            task = asyncio.create_task(run)
+
+            while not task.done():
+                await asyncio.wait([task], timeout=refresh)
+                live.update(generator.render(perf_counter() - start))
+
+            # Re-raise any unexpected errors.
+            task.result()
+
+    rich_print("[green]Done![/green]")
+
+
+async def replay_requests(
+    client: httpx.AsyncClient, requests: list[CapturedRequest], speed: float
+) -> tuple[dict[str, LatencyStats], float]:
+    """
+    Replays captured requests, preserving the gaps between them.
+
+    :param speed: how fast to replay requests (e.g., ``2`` = twice as fast as they were
+        captured).  ``0`` sends every request at once.
+    :returns: latencies for each route, and how long the replay took (seconds).
+    """
+    stats: dict[str, LatencyStats] = {}
+    if not requests:
+        return stats, 0.0
+
+    first = requests[0].time
+    start = perf_counter()
+
+    async def send(request: CapturedRequest, scheduled: float) -> None:
+        try:
+            response = await client.request(
+                request.method, request.path, json=request.body
+            )
+            # Some requests failed when they were captured (e.g., 404s), so they are
+            # expected to fail again.
+            ok = response.status_code < 400 or response.status_code == request.status
+        except httpx.HTTPError:
+            ok = False
+
+        name = f"{request.method} {request.route or request.path}"
+        stats.setdefault(name, LatencyStats()).record(perf_counter() - scheduled, ok)
+
+    tasks = []
+    for request in requests:
+        scheduled = start + ((request.time - first) / speed if speed else 0.0)
+        await asyncio.sleep(max(0.0, scheduled - perf_counter()))
+        tasks.append(asyncio.create_task(send(request, scheduled)))
+
+    await asyncio.gather(*tasks)
+    return stats, perf_counter() - start
+
+
+# This command can be invoked by running ``pipenv run app-cli bench replay``.
+@app.command("replay")
+@embed_event_loop
+async def replay(
+    capture_file: typing.Annotated[
+        Path, typer.Argument(help="File recorded by the capture middleware.")
+    ],
+    url: typing.Annotated[
+        typing.Optional[str],
+        typer.Option(help="Base URL of the server.  If not set, replays in-process."),
+    ] = None,
+    speed: typing.Annotated[
+        float,
+        typer.Option(help="Replay speed multiplier (0 = send everything at once)."),
+    ] = 1.0,
+    concurrency: typing.Annotated[
+        int, typer.Option(help="Max connections to the server.")
+    ] = 100,
+    save: typing.Annotated[
+        typing.Optional[Path], typer.Option(help="Save results to this JSON file.")
+    ] = None,
+    baseline: typing.Annotated[
+        typing.Optional[Path],
+        typer.Option(help="Compare results against a file saved with --save."),
+    ] = None,
+    tolerance: typing.Annotated[
+        float, typer.Option(help="Allowed slowdown vs the baseline (0.2 = 20%).")
+    ] = 0.2,
+):
+    """
+    Replays captured traffic against the app, and reports latencies for each route.
+
+    To compare two builds, replay the same capture against each one, using --save for
+    the first and --baseline for the second.
+
+    Note: captured passwords are redacted, so edits and creates are replayed with a
+    placeholder password.
+    """
+    requests = list(read_capture(capture_file))
+    rich_print(
+        f"[green]Replaying [cyan]{len(requests)}[/cyan] requests at "
+        f"[cyan]{speed}x[/cyan]...[/green]"
+    )
+
+    if url:
+        transport = None
+    else:
+        # Only import the app if it's needed, as it takes a while.
+        from api.main import app as api_app
+
+        transport = httpx.ASGITransport(app=api_app)
+        url = "http://replay"
+
+    async with httpx.AsyncClient(
+        base_url=url,
+        transport=transport,
+        limits=httpx.Limits(max_connections=concurrency),
+        timeout=None,
+    ) as client:
+        stats, elapsed = await replay_requests(client, requests, speed)
+
+    dataset = {"captured_requests": len(requests)}
+    results = {
+        # Replays are open-loop, so concurrency isn't fixed.
+        name: BenchmarkResult.from_stats(name, route_stats, elapsed, 0, dataset)
+        for name, route_stats in sorted(stats.items())
+    }
+    baselines = load_results(baseline) if baseline else {}
+
+    table = Table(title=f"{len(requests)} requests in {elapsed:.1f}s")
+    for column in ("route", "requests", "p50", "p95", "p99", "errors"):
+        table.add_column(column, justify="left" if column == "route" else "right")
+
+    regressions = []
+    for name, result in results.items():
+        before = baselines.get(name)
+        table.add_row(
+            name,
+            str(result.requests),
+            *(
+                _format_latency(getattr(result, p), before and getattr(before, p))
+                for p in ("p50", "p95", "p99")
+            ),
+            str(result.errors),
+        )
+
+        if before:
+            regressions.extend(compare_results(before, result, tolerance))
+
+        if save:
+            save_result(save, result)
+
+    rich_print(table)
+
+    if regressions:
+        for regression in regressions:
+            rich_print(f"[red]{regression}[/red]")
+        raise typer.Exit(1)
+
+    rich_print("[green]Done![/green]")
+
+
+def _format_latency(after: float, before: float | None) -> str:
+    """
+    Formats a latency (ms), with the change from the baseline (if any).
+    """
+    if not before:
+        return f"{after:.1f}ms"
+
+    change = (after - before) / before
+    colour = "red" if change > 0 else "green"
+    return f"{after:.1f}ms [{colour}]({change:+.0%})[/{colour}]"
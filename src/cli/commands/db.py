@@ -0,0 +1,72 @@
+"""
+Defines CLI commands for inspecting the database.
+"""
+__all__ = ["app"]
+
+import typing
+
+import typer
+from rich import print as rich_print
+from rich.markup import escape
+
+from cli.async_support import embed_event_loop
+from dev.query_plan import LARGE_TABLES, check_hot_paths
+from services import DatabaseService, get_service
+
+# Create a Typer instance to hold CLI commands for the ``db`` namespace.
+app = typer.Typer(name="db")
+
+
+@app.command("explain")
+@embed_event_loop
+async def explain(
+    table: typing.Annotated[
+        typing.Optional[list[str]],
+        typer.Option(
+            help="Table that must not be scanned in full (repeat for each table).  "
+            f"Defaults to {', '.join(LARGE_TABLES)}."
+        ),
+    ] = None,
+    verbose: typing.Annotated[
+        bool, typer.Option(help="Show the SQL and query plan for every query.")
+    ] = False,
+):
+    """
+    Checks the query plans of hot-path queries (e.g., getting a profile), and flags any
+    that scan every row in a large table.
+
+    Uses the configured database, which must contain at least one profile.  Changes
+    made by the queries are rolled back.
+
+    Exits with status 1 if any query scans a large table, so that this can be used in
+    CI to catch missing indexes.
+    """
+    try:
+        results = await check_hot_paths(
+            get_service(DatabaseService), large_tables=table or LARGE_TABLES
+        )
+    except LookupError as e:
+        rich_print(f"[red]{e}[/red]  Try running `app-cli generate profiles` first.")
+        raise typer.Exit(1)
+
+    issues = 0
+    for name, plans in results.items():
+        problems = [issue for plan in plans for issue in plan.issues]
+        issues += len(problems)
+
+        status = "[red]FULL SCAN[/red]" if problems else "[green]OK[/green]"
+        rich_print(f"{status} {name}")
+
+        for plan in plans:
+            if verbose or plan.issues:
+                rich_print(f"  [dim]{escape(plan.statement)}[/dim]")
+                for step in plan.plan:
+                    rich_print(f"    {escape(step)}")
+
+            for issue in plan.issues:
+                rich_print(f"  [red]Scans every row in {issue.table}[/red]")
+                for suggestion in issue.suggestions:
+                    rich_print(f"  Suggested index: [bold]{suggestion}[/bold]")
+
+    if issues:
+        raise typer.Exit(1)
@@ -3,13 +3,22 @@ Defines CLI command for generating profiles.
 """
 __all__ = ["app"]
 
+import asyncio
 import typing
+from dataclasses import dataclass, field
+from pathlib import Path
+from secrets import token_hex
+from time import perf_counter
+from typing import Self
 
+import orjson
 import typer
-from httpx import AsyncClient
+from httpx import AsyncClient, HTTPError, Limits
 from rich import print as rich_print
+from rich.progress import Progress, TaskID
 
 from cli.async_support import embed_event_loop
+from dev.synthetic import SyntheticDataGenerator, to_raw_profile
 from models.profile import Profile
 from services import get_service
 from services.profile import ProfileService
@@ -19,9 +28,62 @@ from services.profile import ProfileService
 app = typer.Typer(name="generate")
 
 # A few constants that will be used by :py:func:`generate_profiles` below.
-API_URL_TEMPLATE = "https://randomuser.me/api/?nat=NZ&results={count}"
+API_URL = "https://randomuser.me/api/"
 DEFAULT_COUNT = 5
 
+# Maximum number of results that the API returns per request.
+# :see: https://randomuser.me/documentation#multiple
+MAX_CHUNK_SIZE = 5000
+
+# Retry requests that fail with these status codes (rate limiting and server errors).
+RETRY_STATUS_CODES = frozenset({429, 500, 502, 503, 504})
+
+
+@dataclass
+class Checkpoint:
+    """
+    Records which chunks have been saved, so that an interrupted run can be resumed.
+
+    Chunks are fetched using a fixed seed, so the API returns the same profiles for each
+    chunk when it is requested again.
+    """
+
+    seed: str
+    chunk_size: int
+    completed: set[int] = field(default_factory=set)
+
+    @classmethod
+    def load(cls, path: Path | None, chunk_size: int) -> Self:
+        """
+        Loads the checkpoint file if it exists, otherwise starts a new checkpoint.
+        """
+        if path and path.exists():
+            with open(path, "rb") as f:
+                data = orjson.loads(f.read())
+
+            return cls(data["seed"], data["chunk_size"], set(data["completed"]))
+
+        return cls(token_hex(8), chunk_size)
+
+    def save(self, path: Path | None) -> None:
+        if not path:
+            return
+
+        # Write to a temporary file first, so that the checkpoint doesn't get corrupted
+        # if the command is interrupted while writing it.
+        tmp_path = path.with_name(path.name + ".tmp")
+        with open(tmp_path, "wb") as f:
+            f.write(
+                orjson.dumps(
+                    {
+                        "seed": self.seed,
+                        "chunk_size": self.chunk_size,
+                        "completed": sorted(self.completed),
+                    }
+                )
+            )
+        tmp_path.replace(path)
+
 
 # This command can be invoked by running ``pipenv run app-cli generate profiles``.
 # Note that we have to use ``@embed_event_loop`` because this function is asynchronous.
@@ -29,43 +91,264 @@ DEFAULT_COUNT = 5
 @app.command("profiles")
 @embed_event_loop
 async def generate_profiles(
-    count: typing.Annotated[int, typer.Argument()] = DEFAULT_COUNT
+    count: typing.Annotated[int, typer.Argument()] = DEFAULT_COUNT,
+    chunk_size: typing.Annotated[
+        int,
+        typer.Option(
+            min=1,
+            max=MAX_CHUNK_SIZE,
+            help="Number of profiles to fetch per request.",
+        ),
+    ] = 1000,
+    concurrency: typing.Annotated[
+        int, typer.Option(min=1, help="Maximum number of requests in flight.")
+    ] = 4,
+    retries: typing.Annotated[
+        int, typer.Option(min=0, help="How many times to retry a failed request.")
+    ] = 3,
+    backoff: typing.Annotated[
+        float, typer.Option(help="Delay before the first retry (seconds); doubles.")
+    ] = 1.0,
+    checkpoint: typing.Annotated[
+        typing.Optional[Path],
+        typer.Option(
+            help="Record progress in this file.  If the command is interrupted, run it "
+            "again with the same file to resume."
+        ),
+    ] = None,
 ):
     """
     Generates profile data using Random User Generator API (https://randomuser.me/) and
     adds them to the database.
 
+    Profiles are fetched in chunks, and each chunk is saved as soon as it arrives.
+    Profiles with usernames that are already in the database are skipped.
+
     Note: existing profiles will **not** be removed!
     """
-    rich_print(f"[green]Loading [cyan]{count}[/cyan] profiles...[/green]")
+    state = Checkpoint.load(checkpoint, chunk_size)
+    chunks = [
+        (page, min(state.chunk_size, count - offset))
+        for page, offset in enumerate(range(0, count, state.chunk_size), start=1)
+        if page not in state.completed
+    ]
+
+    profile_service: ProfileService = get_service(ProfileService)
+    added = skipped = 0
+
+    # Chunks are fetched concurrently, but saved one at a time.  The queue is bounded,
+    # so that fetching can't get too far ahead of saving.
+    queue: asyncio.Queue[tuple[int, list[dict]]] = asyncio.Queue(maxsize=concurrency)
+    pending = iter(chunks)
+
+    async with AsyncClient(
+        limits=Limits(max_connections=concurrency), timeout=60.0
+    ) as client:
+
+        async def fetch_worker():
+            for page, size in pending:
+                raw_profiles = await fetch_chunk(
+                    client, state.seed, page, size, retries, backoff
+                )
+                await queue.put((page, raw_profiles))
+
+        async def save_worker(progress: Progress, task: TaskID):
+            nonlocal added, skipped
+
+            for _ in chunks:
+                page, raw_profiles = await queue.get()
+                profiles = {}
+                for raw_profile_data in raw_profiles:
+                    profile = extract_profile(raw_profile_data)
+                    profiles.setdefault(profile.username, profile)
+
+                async with profile_service.session() as session:
+                    existing = await profile_service.existing_usernames(
+                        session, profiles.keys()
+                    )
+                new_profiles = [
+                    p for p in profiles.values() if p.username not in existing
+                ]
+
+                # Hash outside any transaction, so that it isn't left open while the
+                # passwords are hashed (a profile added in the meantime is caught by
+                # the unique constraint).
+                hashes = await profile_service.credentials.hash_many(
+                    [p.password for p in new_profiles]
+                )
+                for profile, hashed in zip(new_profiles, hashes):
+                    profile.password = hashed
+
+                async with profile_service.session() as session:
+                    profile_service.save_profiles(session, new_profiles)
+                    await session.commit()
+
+                added += len(new_profiles)
+                skipped += len(raw_profiles) - len(new_profiles)
+
+                state.completed.add(page)
+                state.save(checkpoint)
+                progress.advance(task, len(raw_profiles))
+
+        with Progress() as progress:
+            task = progress.add_task(
+                "Generating profiles...",
+                total=count,
+                completed=count - sum(size for _, size in chunks),
+            )
+
+            workers = [
+                asyncio.create_task(fetch_worker())
+                for _ in range(min(concurrency, len(chunks)))
+            ]
+            workers.append(asyncio.create_task(save_worker(progress, task)))
+
+            try:
+                await asyncio.gather(*workers)
+            finally:
+                for worker in workers:
+                    worker.cancel()
+
+    # Everything has been saved, so there's nothing left to resume.
+    if checkpoint:
+        checkpoint.unlink(missing_ok=True)
+
+    rich_print(
+        f"[green]Added [cyan]{added}[/cyan] profiles "
+        f"([cyan]{skipped}[/cyan] duplicates skipped).[/green]"
+    )
+
+
+async def fetch_chunk(
+    client: AsyncClient,
+    seed: str,
+    page: int,
+    size: int,
+    retries: int,
+    backoff: float,
+) -> list[dict]:
+    """
+    Fetches a chunk of profiles from the API, retrying with exponential backoff if the
+    request fails.
+
+    :raises ValueError: if the API returns an error.
+    :raises httpx.HTTPError: if the request still fails after retrying.
+    """
+    # :see: https://randomuser.me/documentation#pagination
+    params = {"nat": "NZ", "results": size, "seed": seed, "page": page}
+
+    for attempt in range(retries + 1):
+        if attempt:
+            await asyncio.sleep(backoff * 2 ** (attempt - 1))
 
-    url = API_URL_TEMPLATE.format(count=count)
-    rich_print(f"[grey]{url}[/grey]")
+        try:
+            response = await client.get(API_URL, params=params)
+        except HTTPError:
+            if attempt == retries:
+                raise
+            continue
 
-    async with AsyncClient() as client:
-        response = (await client.get(url)).json()
+        if response.status_code not in RETRY_STATUS_CODES:
+            break
+
+    response.raise_for_status()
+    data = response.json()
 
     # :see: https://randomuser.me/documentation#errors
-    if "error" in response:
-        raise ValueError(response["error"])
+    if "error" in data:
+        raise ValueError(data["error"])
 
     # :see: https://randomuser.me/documentation#results
-    raw_profiles = response["results"]
+    return data["results"]
+
+
+# This command can be invoked by running ``pipenv run app-cli generate synthetic``.
+@app.command("synthetic")
+@embed_event_loop
+async def generate_synthetic(
+    count: typing.Annotated[int, typer.Argument()] = 1000,
+    seed: typing.Annotated[
+        int, typer.Option(help="Same seed + batch size = same data.")
+    ] = 0,
+    batch_size: typing.Annotated[
+        int, typer.Option(help="Number of profiles to generate and insert at once.")
+    ] = 10_000,
+    award_alpha: typing.Annotated[
+        float,
+        typer.Option(
+            help="Shape of the awards-per-profile power law (smaller = more skewed; "
+            "0 = no awards)."
+        ),
+    ] = 1.5,
+    max_awards: typing.Annotated[
+        int, typer.Option(help="Maximum number of awards per profile.")
+    ] = 100,
+    output: typing.Annotated[
+        typing.Optional[Path],
+        typer.Option(
+            help="Write profiles to this file (one Random User Generator API result per "
+            "line) instead of the database."
+        ),
+    ] = None,
+):
+    """
+    Generates synthetic profiles and awards offline, and adds them to the database.
 
-    rich_print("[green]Transforming profiles...[/green]")
-    profiles = [extract_profile(raw_profile_data) for raw_profile_data in raw_profiles]
+    Much faster than ``generate profiles`` for large datasets, and doesn't need an
+    internet connection.
+    """
+    generator = SyntheticDataGenerator(
+        seed=seed,
+        batch_size=batch_size,
+        award_alpha=award_alpha,
+        max_awards=max_awards,
+    )
 
-    rich_print("[green]Saving profiles to database...[/green]")
     profile_service: ProfileService = get_service(ProfileService)
+    start = perf_counter()
+    awards = 0
+
+    with Progress() as progress:
+        task = progress.add_task("Generating profiles...", total=count)
 
-    async with profile_service.session(expire_on_commit=False) as session:
-        profile_service.save_profiles(session, profiles)
-        await session.commit()
+        if output:
+            with open(output, "wb") as f:
+                for batch in generator.batches(count):
+                    f.writelines(
+                        orjson.dumps(to_raw_profile(profile, profile_awards)) + b"\n"
+                        for profile, profile_awards in zip(batch.profiles, batch.awards)
+                    )
 
-        for profile in profiles:
-            rich_print(f"[green]Welcome [cyan]{profile.full_name}[/cyan]![/green]")
+                    awards += batch.award_count
+                    progress.advance(task, len(batch.profiles))
+        else:
+            async with profile_service.session() as session:
+                last_id = await profile_service.last_id(session)
 
-    rich_print("[green]Done![/green]")
+            for batch in generator.batches(count, start=last_id + 1):
+                # Commit each batch separately, so that we don't end up with one
+                # enormous transaction.
+                async with profile_service.session() as session:
+                    ids = await profile_service.insert_profiles(session, batch.profiles)
+                    await profile_service.insert_awards(
+                        session,
+                        [
+                            {**award, "profile_id": profile_id}
+                            for profile_id, profile_awards in zip(ids, batch.awards)
+                            for award in profile_awards
+                        ],
+                    )
+                    await session.commit()
+
+                awards += batch.award_count
+                progress.advance(task, len(batch.profiles))
+
+    elapsed = perf_counter() - start
+    rich_print(
+        f"[green]Generated [cyan]{count}[/cyan] profiles and [cyan]{awards}[/cyan] "
+        f"awards in [cyan]{elapsed:.1f}s[/cyan] "
+        f"({(count + awards) / elapsed:,.0f} rows/s).[/green]"
+    )
 
 
 def extract_profile(raw_data: dict, id: int | None = None) -> Profile:
@@ -1,16 +1,54 @@
-__all__ = ["app"]
+__all__ = ["FileFormat", "app", "read_rows", "write_rows"]
+
+import csv
+import gzip
+import itertools
+import typing
+from contextlib import ExitStack
+from enum import StrEnum, auto
+from io import TextIOWrapper
+from itertools import batched
+from pathlib import Path
+from typing import Self
 
 import orjson
 import typer
+from pydantic import TypeAdapter, ValidationError
+from rich import print as rich_print
 
 from cli.async_support import embed_event_loop
 from models.base import model_encoder
 from models.profile import Profile
 from services import get_service
-from services.profile import EditProfileRequest, ProfileService
+from services.profile import EditProfileRequest, ProfileRecord, ProfileService
 
 app = typer.Typer(name="profiles")
 
+# Validates a batch of rows in one go.
+# :see: https://docs.pydantic.dev/latest/concepts/type_adapter/
+_batch_validator = TypeAdapter(list[EditProfileRequest])
+
+
+class FileFormat(StrEnum):
+    """
+    File formats for importing and exporting profiles.
+    """
+
+    # One JSON object per line.
+    # :see: https://github.com/ndjson/ndjson-spec
+    ndjson = auto()
+
+    # Comma-separated values, with a header row.
+    csv = auto()
+
+    @classmethod
+    def from_path(cls, path: Path) -> Self:
+        """
+        Guesses the format from a file's extension (ignoring ``.gz``).
+        """
+        suffixes = [suffix for suffix in path.suffixes if suffix != ".gz"]
+        return cls.csv if suffixes and suffixes[-1] == ".csv" else cls.ndjson
+
 
 @app.command("get")
 @embed_event_loop
@@ -80,6 +118,474 @@ async def create_profile(data_filepath: str):
         output_profile(profile)
 
 
+@app.command("get-many")
+@embed_event_loop
+async def get_profiles(
+    profile_ids: typing.Annotated[
+        typing.Optional[list[int]], typer.Argument(show_default=False)
+    ] = None,
+    ids_file: typing.Annotated[
+        typing.Optional[typer.FileText],
+        typer.Option(help="Read IDs from this file, one per line ('-' for stdin)."),
+    ] = None,
+    chunk_size: typing.Annotated[
+        int, typer.Option(min=1, help="Number of profiles to load per query.")
+    ] = 500,
+):
+    """
+    Retrieves many profiles, and outputs them in NDJSON format (one per line), in the
+    same order as the IDs.
+
+    IDs that don't exist are reported on stderr, and the command exits with status 1.
+    """
+    ids = itertools.chain(
+        profile_ids or (), (int(line) for line in ids_file or () if line.strip())
+    )
+
+    profile_service: ProfileService = get_service(ProfileService)
+    missing = 0
+
+    async with profile_service.session() as session:
+        for chunk in batched(ids, chunk_size):
+            # Read-only, so skip the ORM.
+            found = {
+                record.id: record
+                for record in await profile_service.read_profiles(session, ids=chunk)
+            }
+
+            output_profiles(found[id] for id in chunk if id in found)
+
+            for id in chunk:
+                if id not in found:
+                    missing += 1
+                    print_error(f"No profile exists with ID {id}")
+
+    if missing:
+        raise typer.Exit(1)
+
+
+@app.command("update-many")
+@embed_event_loop
+async def update_profiles(
+    source: typing.Annotated[
+        Path,
+        typer.Argument(
+            help="NDJSON file with one update per line (an 'id' plus the profile "
+            "data), or a directory of '<id>.json' files."
+        ),
+    ],
+    batch_size: typing.Annotated[
+        int, typer.Option(min=1, help="Number of updates to commit per transaction.")
+    ] = 100,
+):
+    """
+    Updates many profiles, and outputs the updated profiles in NDJSON format (one per
+    line).
+
+    Updates that fail (invalid data, or the profile doesn't exist) are reported on
+    stderr, and the command exits with status 1.
+    """
+    profile_service: ProfileService = get_service(ProfileService)
+    failed = 0
+
+    for batch in batched(read_updates(source), batch_size):
+        updates: dict[int, EditProfileRequest] = {}
+
+        for id, data in batch:
+            if isinstance(data, str):
+                failed += 1
+                print_error(data)
+                continue
+
+            try:
+                updates[id] = EditProfileRequest.model_validate(data)
+            except ValidationError as e:
+                failed += 1
+                print_error(f"Invalid data for profile {id}: {e}")
+
+        # Hash the passwords before opening the session, so that the transaction isn't
+        # held open while they are hashed.  Updates for profiles that don't exist are
+        # hashed for nothing, but those should be rare.
+        hashes = dict(
+            zip(
+                updates,
+                await profile_service.credentials.hash_many(
+                    [data.password for data in updates.values()]
+                ),
+            )
+        )
+
+        async with profile_service.session() as session:
+            found = await profile_service.get_by_ids(session, updates.keys())
+
+            for id, data in updates.items():
+                if id in found:
+                    profile_service.apply_edit(found[id], data, hashes[id])
+                else:
+                    failed += 1
+                    print_error(f"No profile exists with ID {id}")
+
+            await session.commit()
+            output_profiles(found[id] for id in updates if id in found)
+
+    if failed:
+        raise typer.Exit(1)
+
+
+@app.command("import")
+@embed_event_loop
+async def import_profiles(
+    path: typing.Annotated[
+        Path, typer.Argument(help="NDJSON or CSV file to import (optionally gzipped).")
+    ],
+    format: typing.Annotated[
+        typing.Optional[FileFormat],
+        typer.Option(help="File format (default: guess from the file extension)."),
+    ] = None,
+    batch_size: typing.Annotated[
+        int, typer.Option(min=1, help="Number of rows to validate and insert at once.")
+    ] = 5000,
+    upsert: typing.Annotated[
+        bool,
+        typer.Option(
+            help="Update existing profiles with the same username, instead of "
+            "rejecting those rows."
+        ),
+    ] = False,
+    copy: typing.Annotated[
+        bool, typer.Option(help="Use COPY to insert rows, if the database supports it.")
+    ] = True,
+    rejects: typing.Annotated[
+        typing.Optional[Path],
+        typer.Option(
+            help="Write rejected rows to this file (default: <path>.rejects.ndjson)."
+        ),
+    ] = None,
+):
+    """
+    Imports profiles from a file, one batch at a time.
+
+    Rows that fail validation (or whose username is already taken, unless --upsert is
+    set) are written to a separate file, along with the reasons they were rejected.
+    """
+    format = format or FileFormat.from_path(path)
+    rejects = rejects or path.with_name(path.name + ".rejects.ndjson")
+
+    profile_service: ProfileService = get_service(ProfileService)
+    imported = rejected = 0
+
+    with RejectsFile(rejects) as rejects_file:
+        for batch in batched(read_rows(path, format), batch_size):
+            validated = validate_rows(batch, rejects_file)
+
+            if upsert:
+                rows = [row for _, row in validated]
+            else:
+                # Use a short transaction, so that it isn't left open while the
+                # passwords are hashed.
+                async with profile_service.session() as session:
+                    existing = await profile_service.existing_usernames(
+                        session, (row["username"] for _, row in validated)
+                    )
+
+                rows = []
+                for line, row in validated:
+                    if row["username"] in existing:
+                        rejects_file.write(line, row, ["username already exists"])
+                    else:
+                        rows.append(row)
+
+            # Hashing a batch can take a while, so do it outside any transaction (a
+            # profile added in the meantime is caught by the unique constraint).
+            await profile_service.hash_passwords(rows)
+
+            async with profile_service.session() as session:
+                if upsert:
+                    await profile_service.upsert_profiles(session, rows)
+                elif copy and profile_service.supports_copy(session):
+                    await profile_service.copy_profiles(session, rows)
+                else:
+                    await profile_service.insert_profiles(session, rows)
+
+                await session.commit()
+
+            imported += len(rows)
+
+        rejected = rejects_file.count
+
+    rich_print(f"[green]Imported [cyan]{imported}[/cyan] profiles.[/green]")
+
+    if rejected:
+        rich_print(
+            f"[yellow]Rejected [cyan]{rejected}[/cyan] rows; see "
+            f"[cyan]{rejects}[/cyan] for details.[/yellow]"
+        )
+
+
+@app.command("export")
+@embed_event_loop
+async def export_profiles(
+    output: typing.Annotated[
+        typing.Optional[Path],
+        typer.Option(help="File to write to (default: stdout)."),
+    ] = None,
+    format: typing.Annotated[
+        typing.Optional[FileFormat],
+        typer.Option(help="File format (default: guess from the file extension)."),
+    ] = None,
+    compress: typing.Annotated[
+        typing.Optional[bool],
+        typer.Option(
+            "--gzip/--no-gzip",
+            help="Compress the output (default: only if the file name ends in .gz).",
+        ),
+    ] = None,
+    awards: typing.Annotated[
+        bool, typer.Option(help="Include each profile's awards.")
+    ] = True,
+    chunk_size: typing.Annotated[
+        int, typer.Option(min=1, help="Number of profiles to load at once.")
+    ] = 1000,
+):
+    """
+    Exports every profile, streaming them from the database so that memory usage stays
+    flat no matter how many there are.
+
+    In CSV format, awards are included as a JSON-encoded column.
+    """
+    format = format or (FileFormat.from_path(output) if output else FileFormat.ndjson)
+    if compress is None:
+        compress = bool(output and output.suffix == ".gz")
+
+    profile_service: ProfileService = get_service(ProfileService)
+
+    with ExitStack() as stack:
+        stream = (
+            stack.enter_context(open(output, "wb"))
+            if output
+            else typer.get_binary_stream("stdout")
+        )
+        if compress:
+            stream = stack.enter_context(gzip.GzipFile(fileobj=stream, mode="wb"))
+
+        async with profile_service.session() as session:
+            chunks = profile_service.stream_profiles(session, chunk_size, awards)
+            await write_rows(stream, format, chunks)
+
+
+async def write_rows(
+    stream: typing.BinaryIO,
+    format: FileFormat,
+    chunks: typing.AsyncIterable[list[ProfileRecord]],
+) -> None:
+    """
+    Writes profiles to a binary stream, one chunk at a time.
+    """
+    if format == FileFormat.ndjson:
+        async for chunk in chunks:
+            # One write per chunk, rather than one per row.
+            stream.write(b"".join(record.to_json() + b"\n" for record in chunk))
+        return
+
+    # ``csv`` can only write to text streams.
+    text_stream = TextIOWrapper(stream, encoding="utf-8", newline="")
+    writer = None
+
+    try:
+        async for chunk in chunks:
+            rows = [record.to_dict() for record in chunk]
+
+            if writer is None and rows:
+                writer = csv.DictWriter(text_stream, fieldnames=list(rows[0].keys()))
+                writer.writeheader()
+
+            writer.writerows(
+                {**row, "awards": orjson.dumps(row["awards"]).decode("utf-8")}
+                if "awards" in row
+                else row
+                for row in rows
+            )
+    finally:
+        # Don't let the wrapper close the underlying stream (e.g., stdout).
+        text_stream.flush()
+        text_stream.detach()
+
+
+def read_rows(
+    path: Path, format: FileFormat
+) -> typing.Iterator[tuple[int, dict | orjson.JSONDecodeError]]:
+    """
+    Reads rows from a file one at a time, so that memory usage stays flat no matter
+    how big the file is.
+
+    :returns: the line number and data for each row.  If a line can't be parsed, the
+        error is returned instead of the data.
+    """
+    opener = gzip.open if path.suffix == ".gz" else open
+
+    with opener(path, "rb") as f:
+        if format == FileFormat.csv:
+            reader = csv.DictReader(TextIOWrapper(f, encoding="utf-8", newline=""))
+            for row in reader:
+                yield reader.line_num, row
+        else:
+            for line_num, line in enumerate(f, start=1):
+                if not line.strip():
+                    continue
+
+                try:
+                    yield line_num, orjson.loads(line)
+                except orjson.JSONDecodeError as e:
+                    yield line_num, e
+
+
+def validate_rows(
+    batch: typing.Sequence[tuple[int, dict | orjson.JSONDecodeError]],
+    rejects_file: "RejectsFile",
+) -> list[tuple[int, dict]]:
+    """
+    Validates a batch of rows against :py:class:`EditProfileRequest`.
+
+    Invalid rows (and rows with the same username as an earlier row in the batch) are
+    written to the rejects file.
+
+    :returns: the line number and validated data for each valid row.
+    """
+    parsed = []
+    for line, data in batch:
+        if isinstance(data, orjson.JSONDecodeError):
+            rejects_file.write(line, None, [f"invalid JSON: {data}"])
+        else:
+            parsed.append((line, data))
+
+    # Validate the whole batch in one go; if any rows are invalid, the error tells us
+    # which ones.
+    errors: dict[int, list[str]] = {}
+    try:
+        _batch_validator.validate_python([data for _, data in parsed])
+    except ValidationError as e:
+        for error in e.errors():
+            index, *loc = error["loc"]
+            errors.setdefault(index, []).append(
+                f"{'.'.join(map(str, loc)) or 'row'}: {error['msg']}"
+            )
+
+    fields = EditProfileRequest.model_fields.keys()
+    valid = {}
+    for index, (line, data) in enumerate(parsed):
+        if index in errors:
+            rejects_file.write(line, data, errors[index])
+        elif data["username"] in valid:
+            rejects_file.write(line, data, ["duplicate username in file"])
+        else:
+            valid[data["username"]] = (line, {field: data[field] for field in fields})
+
+    return list(valid.values())
+
+
+class RejectsFile:
+    """
+    Writes rejected rows to a file, one JSON object per line.
+
+    The file is only created if a row is rejected.
+    """
+
+    def __init__(self, path: Path):
+        self.path = path
+        self.count = 0
+        self._file: typing.BinaryIO | None = None
+
+    def __enter__(self) -> Self:
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        if self._file:
+            self._file.close()
+
+    def write(self, line: int, data: dict | None, errors: list[str]) -> None:
+        if not self._file:
+            self._file = open(self.path, "wb")
+
+        self._file.write(
+            orjson.dumps({"line": line, "data": data, "errors": errors}) + b"\n"
+        )
+        self.count += 1
+
+
+def read_updates(source: Path) -> typing.Iterator[tuple[int | None, dict | str]]:
+    """
+    Reads profile updates from an NDJSON file or a directory of JSON files (see
+    :py:func:`update_profiles`).
+
+    :returns: the profile ID and (unvalidated) data for each update.  If an update
+        can't be read, an error message is returned instead of the data (and the ID
+        is ``None`` if it isn't known).
+    """
+    if source.is_dir():
+        for path in sorted(source.glob("*.json")):
+            try:
+                id = int(path.stem)
+            except ValueError:
+                yield None, f"Invalid profile ID in filename {path.name!r}"
+                continue
+
+            try:
+                yield id, orjson.loads(path.read_bytes())
+            except orjson.JSONDecodeError as e:
+                yield id, f"Invalid JSON for profile {id}: {e}"
+        return
+
+    with open(source, "rb") as f:
+        for line_num, line in enumerate(f, start=1):
+            if not line.strip():
+                continue
+
+            try:
+                data = orjson.loads(line)
+            except orjson.JSONDecodeError as e:
+                yield None, f"Invalid JSON on line {line_num}: {e}"
+                continue
+
+            if not isinstance(data, dict) or "id" not in data:
+                yield None, f"Missing profile ID on line {line_num}"
+                continue
+
+            try:
+                id = int(data.pop("id"))
+            except (TypeError, ValueError):
+                yield None, f"Invalid profile ID on line {line_num}"
+                continue
+
+            yield id, data
+
+
+def output_profiles(profiles: typing.Iterable[Profile | ProfileRecord]) -> None:
+    """
+    Outputs profiles to stdout in NDJSON format (one per line).
+    """
+    stream = typer.get_binary_stream("stdout")
+    stream.write(
+        b"".join(
+            (
+                profile.to_json()
+                if isinstance(profile, ProfileRecord)
+                else orjson.dumps(model_encoder(profile))
+            )
+            + b"\n"
+            for profile in profiles
+        )
+    )
+    stream.flush()
+
+
+def print_error(message: str) -> None:
+    """
+    Outputs an error message to stderr, so that it doesn't get mixed up with the
+    output data.
+    """
+    typer.echo(message, err=True)
+
+
 def output_profile(profile: Profile) -> None:
     """
     Outputs profile data to stdout.
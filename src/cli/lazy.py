@@ -0,0 +1,124 @@
+"""
+Defines helpers for loading CLI commands lazily, so that running one command doesn't
+have to pay for importing every other command (and all of their dependencies).
+"""
+__all__ = ["LazyGroup", "LazyTyper", "import_typer"]
+
+import typing
+from functools import cached_property
+from importlib import import_module
+
+import click
+import typer
+from typer.core import TyperGroup
+
+
+def import_typer(path: str) -> typing.Callable[[], typer.Typer]:
+    """
+    Returns a function that imports a Typer app when called.
+
+    :param path: import path in ``module:attribute`` format (e.g.
+        ``"cli.commands.generate:app"``).  If the attribute is omitted, ``app`` is
+        assumed.
+    """
+    module_name, _, attr_name = path.partition(":")
+
+    def loader() -> typer.Typer:
+        return getattr(import_module(module_name), attr_name or "app")
+
+    return loader
+
+
+class LazyGroup(click.Group):
+    """
+    Stands in for a Typer app's command group, so that the app only gets imported when
+    one of its commands is invoked.
+
+    The group's name and help text are known up front, so that ``--help`` can list it
+    without importing anything.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        loader: typing.Callable[[], typer.Typer],
+        help: str | None = None,
+    ):
+        super().__init__(name=name, help=help)
+
+        self.loader = loader
+
+    @cached_property
+    def group(self) -> click.Group:
+        """
+        Imports the Typer app and converts it into a Click command group.
+
+        :raises TypeError: if the loader returns something other than a Typer app.
+        """
+        app = self.loader()
+
+        if not isinstance(app, typer.Typer):
+            raise TypeError(
+                f"Invalid plugin {self.name} ({type(app).__name__}); typer.Typer expected"
+            )
+
+        return typer.main.get_group(app)
+
+    def make_context(
+        self,
+        info_name: str | None,
+        args: list[str],
+        parent: click.Context | None = None,
+        **extra: typing.Any,
+    ) -> click.Context:
+        # Hand over to the real group as soon as the command line reaches this group.
+        # From here on, Click works with the real group (parsing, invocation, help,
+        # shell completion, etc.), as ``ctx.command`` refers to it.
+        return self.group.make_context(info_name, args, parent, **extra)
+
+    def list_commands(self, ctx: click.Context) -> list[str]:
+        return self.group.list_commands(ctx)
+
+    def get_command(self, ctx: click.Context, cmd_name: str) -> click.Command | None:
+        return self.group.get_command(ctx, cmd_name)
+
+
+class LazyTyper(typer.Typer):
+    """
+    Extends :py:class:`typer.Typer` so that sub-apps can be added without importing
+    them (see :py:meth:`add_lazy_typer`).
+
+    .. important::
+
+       Typer only creates a command group if the app has a callback (or more than one
+       command), so make sure to add one with ``@app.callback()``.
+    """
+
+    def __init__(self, **kwargs: typing.Any):
+        self.lazy_groups: dict[str, LazyGroup] = {}
+
+        lazy_groups = self.lazy_groups
+
+        class _LazyTyperGroup(TyperGroup):
+            def __init__(self, **group_kwargs: typing.Any):
+                super().__init__(**group_kwargs)
+
+                for lazy_group in lazy_groups.values():
+                    self.add_command(lazy_group)
+
+        super().__init__(cls=_LazyTyperGroup, **kwargs)
+
+    def add_lazy_typer(
+        self,
+        name: str,
+        loader: typing.Callable[[], typer.Typer],
+        help: str | None = None,
+    ) -> None:
+        """
+        Adds a sub-app that will only be loaded when one of its commands is invoked.
+
+        :param name: the name of the command group.
+        :param loader: function that returns the Typer app (see :py:func:`import_typer`).
+        :param help: help text to show for the group in ``--help``.
+        """
+        self.lazy_groups[name] = LazyGroup(name, loader, help)
@@ -8,33 +8,159 @@ Refer to README.rst for instructions to run commands via the CLI.
 __all__ = ["app"]
 
 import asyncio
+import os
+import sys
+import typing
 from importlib.metadata import entry_points
 
+import click
 import typer
 import uvloop
-from cli.commands import generate, profiles
+
+from cli.lazy import LazyTyper, import_typer
 
 # Activate uvloop for improved asyncio performance.
 # :see: https://uvloop.readthedocs.io/
 asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
 
 # Initialise the Typer application.
-app = typer.Typer()
+# Command modules are only imported when one of their commands is invoked, so that
+# (e.g.) ``app-cli profiles get 1`` doesn't have to import everything that
+# ``app-cli generate profiles`` needs.
+app = LazyTyper()
+
+
+@app.callback()
+def main(
+    ctx: typer.Context,
+    profile: typing.Annotated[
+        typing.Optional[str],
+        typer.Option(
+            # Same values as :py:class:`services.profiler.ProfileMode` (not imported
+            # here, to keep startup fast).
+            click_type=click.Choice(["sampling", "deterministic"]),
+            help="Profile the command and save the results to a file.  Use "
+            "'sampling' for long-running commands, 'deterministic' for short ones.",
+        ),
+    ] = None,
+):
+    """
+    Command-line tools for managing the app.
+    """
+    # :see: :py:func:`cli.async_support.embed_event_loop`
+    ctx.meta["profile"] = profile
+
+
+@app.command("shell")
+def shell(
+    ctx: typer.Context,
+    script: typing.Annotated[
+        typing.Optional[typer.FileText],
+        typer.Argument(help="File with one command per line (default: stdin)."),
+    ] = None,
+    stop_on_error: typing.Annotated[
+        bool, typer.Option(help="Stop at the first command that fails.")
+    ] = False,
+    timing: typing.Annotated[
+        bool, typer.Option(help="Show how long each command took.")
+    ] = False,
+):
+    """
+    Runs many commands in one process, e.g. ``profiles get 1``, one per line.
+
+    Services and database connections are only set up once, so each command is much
+    faster than running ``app-cli`` separately.
+    """
+    # Only import the shell when it's used, to keep CLI startup fast.
+    from cli.shell import run_shell
+
+    lines = script or sys.stdin
+    failures = run_shell(
+        ctx.find_root().command,
+        lines,
+        interactive=lines.isatty(),
+        stop_on_error=stop_on_error,
+        timing=timing,
+    )
+
+    if failures:
+        raise typer.Exit(1)
+
+
+@app.command("serve")
+def serve(
+    host: typing.Annotated[
+        str, typer.Option(help="Address to listen on.")
+    ] = "127.0.0.1",
+    port: typing.Annotated[int, typer.Option(help="Port to listen on.")] = 8000,
+    workers: typing.Annotated[
+        int,
+        typer.Option(min=0, help="Number of worker processes (0 = one per CPU)."),
+    ] = 0,
+    max_requests: typing.Annotated[
+        int,
+        typer.Option(
+            min=0,
+            help="Restart each worker after it has handled this many requests, to "
+            "contain memory growth (0 = never).",
+        ),
+    ] = 10_000,
+    max_requests_jitter: typing.Annotated[
+        int,
+        typer.Option(
+            min=0,
+            help="Add up to this many requests to each worker's --max-requests, so "
+            "that workers don't all restart at once.",
+        ),
+    ] = 1000,
+):
+    """
+    Runs the API server, with several worker processes.
+
+    The app is imported and warmed up once, then each worker is forked from the same
+    process, so that they share its memory (and start almost instantly).
+    """
+    # Only import the server when it's used, to keep CLI startup fast.
+    from api.prefork import PreforkServer
+
+    server = PreforkServer(
+        "api.main:app",
+        host=host,
+        port=port,
+        workers=workers or os.cpu_count() or 1,
+        max_requests=max_requests or None,
+        max_requests_jitter=max_requests_jitter,
+    )
+    raise typer.Exit(server.run())
+
 
 # Register commands so that they can be invoked.
-app.add_typer(generate.app)
-app.add_typer(profiles.app)
+app.add_lazy_typer(
+    "bench",
+    import_typer("cli.commands.bench:app"),
+    help="Load test a running server.",
+)
+app.add_lazy_typer(
+    "db",
+    import_typer("cli.commands.db:app"),
+    help="Inspect the database.",
+)
+app.add_lazy_typer(
+    "generate",
+    import_typer("cli.commands.generate:app"),
+    help="Generate data for the database.",
+)
+app.add_lazy_typer(
+    "profiles",
+    import_typer("cli.commands.profiles:app"),
+    help="Get, create and update profiles.",
+)
 
 # Register additional commands from plugins.
+# Plugins are loaded when they are invoked, so a plugin that isn't a ``typer.Typer``
+# only raises a ``TypeError`` when it is used.
 for e in entry_points(group="app.command"):
-    plugin: typer.Typer = e.load()
-
-    if not isinstance(plugin, typer.Typer):
-        raise TypeError(
-            f"Invalid plugin {e.name} ({type(plugin).__name__}); typer.Typer expected"
-        )
-
-    app.add_typer(plugin, name=e.name)
+    app.add_lazy_typer(e.name, e.load, help=f"Plugin command ({e.value}).")
 
 if __name__ == "__main__":
     app()
@@ -0,0 +1,114 @@
+"""
+Runs many CLI commands in a single process (see :py:func:`run_shell`).
+"""
+__all__ = ["run_shell"]
+
+import shlex
+import sys
+import traceback
+import typing
+from time import perf_counter
+
+import click
+
+from cli.async_support import persistent_event_loop
+
+PROMPT = "app-cli> "
+
+
+def run_shell(
+    group: click.Group,
+    lines: typing.Iterable[str],
+    interactive: bool = False,
+    stop_on_error: bool = False,
+    timing: bool = False,
+) -> int:
+    """
+    Runs CLI commands, one per line (e.g., ``profiles get 1``).
+
+    All the commands run on the same event loop, so services (and the database
+    engine's connection pool) are created once, and reused by every command.
+
+    Blank lines and lines starting with ``#`` are ignored.  ``exit`` or ``quit`` ends
+    the shell.
+
+    :param group: the CLI's root command group.
+    :param lines: commands to run.
+    :param interactive: whether to prompt for each command.
+    :param stop_on_error: whether to stop at the first command that fails.
+    :param timing: whether to output how long each command took (to stderr).
+    :returns: the number of commands that failed.
+    """
+    failures = 0
+
+    with persistent_event_loop():
+        for line in _prompt(lines) if interactive else lines:
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+
+            if line in ("exit", "quit"):
+                break
+
+            start = perf_counter()
+            ok = _run_command(group, line)
+
+            if timing:
+                elapsed_ms = (perf_counter() - start) * 1000
+                click.echo(f"({elapsed_ms:.1f} ms)", err=True)
+
+            if not ok:
+                failures += 1
+                if stop_on_error:
+                    break
+
+    return failures
+
+
+def _run_command(group: click.Group, line: str) -> bool:
+    """
+    Runs a single command.
+
+    :returns: whether the command succeeded.
+    """
+    try:
+        args = shlex.split(line)
+    except ValueError as e:
+        click.echo(f"Error: {e}", err=True)
+        return False
+
+    if args[0] == "shell":
+        click.echo("Error: already in the shell", err=True)
+        return False
+
+    try:
+        exit_code = group.main(args, prog_name="app-cli", standalone_mode=False)
+    except click.ClickException as e:
+        e.show()
+        return False
+    except click.Abort:
+        click.echo("Aborted!", err=True)
+        return False
+    except Exception:
+        # Show the error, but keep the shell running.
+        traceback.print_exc(file=sys.stderr)
+        return False
+
+    # ``typer.Exit`` and ``--help`` return an exit code instead of raising an exception.
+    return not isinstance(exit_code, int) or exit_code == 0
+
+
+def _prompt(lines: typing.Iterable[str]) -> typing.Iterator[str]:
+    """
+    Prompts for each line of input.
+    """
+    iterator = iter(lines)
+
+    while True:
+        click.echo(PROMPT, nl=False, err=True)
+
+        try:
+            yield next(iterator)
+        except (StopIteration, KeyboardInterrupt):
+            click.echo(err=True)
+            return
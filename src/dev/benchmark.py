@@ -0,0 +1,259 @@
+"""
+Tools for benchmarking the app: seeding datasets, measuring latency and throughput,
+and comparing results against saved baselines.
+"""
+__all__ = [
+    "BenchmarkResult",
+    "LatencyStats",
+    "compare_results",
+    "load_results",
+    "run_benchmark",
+    "save_result",
+    "seed_dataset",
+]
+
+import asyncio
+import typing
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from time import perf_counter
+from typing import Self
+
+import orjson
+from sqlalchemy import insert
+
+from models import Award, Profile
+from services import DatabaseService
+
+
+class LatencyStats:
+    """
+    Collects request latencies and calculates percentiles.
+    """
+
+    def __init__(self):
+        self.latencies: list[float] = []
+        self.errors = 0
+
+    def record(self, latency: float, ok: bool = True) -> None:
+        """
+        :param latency: how long the request took (seconds).
+        :param ok: whether the request succeeded.
+        """
+        self.latencies.append(latency)
+
+        if not ok:
+            self.errors += 1
+
+    @property
+    def count(self) -> int:
+        return len(self.latencies)
+
+    @property
+    def error_rate(self) -> float:
+        return self.errors / self.count if self.count else 0.0
+
+    def percentile(self, p: float) -> float:
+        """
+        Returns the ``p``-th percentile latency (nearest-rank method), in seconds.
+        """
+        if not self.latencies:
+            return 0.0
+
+        ordered = sorted(self.latencies)
+        rank = max(0, min(len(ordered) - 1, round(p / 100 * len(ordered)) - 1))
+        return ordered[rank]
+
+    def summary(self) -> dict[str, float]:
+        """
+        Returns p50/p95/p99 latencies, in milliseconds.
+        """
+        return {f"p{p}": self.percentile(p) * 1000 for p in (50, 95, 99)}
+
+
+@dataclass
+class BenchmarkResult:
+    """
+    Results from benchmarking a single route.
+    """
+
+    name: str
+    requests: int
+    concurrency: int
+    throughput: float
+    p50: float
+    p95: float
+    p99: float
+    errors: int
+    dataset: dict[str, int] = field(default_factory=dict)
+
+    @classmethod
+    def from_stats(
+        cls,
+        name: str,
+        stats: LatencyStats,
+        elapsed: float,
+        concurrency: int,
+        dataset: dict[str, int] | None = None,
+    ) -> Self:
+        """
+        Summarises latencies collected over ``elapsed`` seconds.
+        """
+        return cls(
+            name=name,
+            requests=stats.count,
+            concurrency=concurrency,
+            throughput=stats.count / elapsed if elapsed else 0.0,
+            errors=stats.errors,
+            dataset=dataset or {},
+            **stats.summary(),
+        )
+
+
+async def run_benchmark(
+    name: str,
+    send: typing.Callable[[int], typing.Awaitable[typing.Any]],
+    requests: int,
+    concurrency: int,
+    dataset: dict[str, int] | None = None,
+) -> BenchmarkResult:
+    """
+    Sends requests with a fixed number of requests in flight, and measures how long
+    they take.
+
+    :param name: identifies the benchmark in the results.
+    :param send: sends the ``n``-th request, and returns the response.  Responses with
+        a status code of 400 or more count as errors.
+    :param requests: total number of requests to send.
+    :param concurrency: number of requests to keep in flight.
+    :param dataset: describes the data in the database, so that results are only
+        compared against baselines for the same dataset.
+    """
+    stats = LatencyStats()
+    next_request = 0
+
+    async def worker():
+        nonlocal next_request
+
+        while next_request < requests:
+            n = next_request
+            next_request += 1
+
+            start = perf_counter()
+            response = await send(n)
+            stats.record(perf_counter() - start, response.status_code < 400)
+
+    start = perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = perf_counter() - start
+
+    return BenchmarkResult.from_stats(name, stats, elapsed, concurrency, dataset)
+
+
+def load_results(path: Path) -> dict[str, BenchmarkResult]:
+    """
+    Loads benchmark results from a JSON file (see :py:func:`save_result`).
+    """
+    with open(path, "rb") as f:
+        return {
+            name: BenchmarkResult(**data)
+            for name, data in orjson.loads(f.read()).items()
+        }
+
+
+def save_result(path: Path, result: BenchmarkResult) -> None:
+    """
+    Adds a result to a JSON file, replacing any existing result with the same name.
+    """
+    results = load_results(path) if path.exists() else {}
+    results[result.name] = result
+
+    with open(path, "wb") as f:
+        f.write(
+            orjson.dumps(
+                {name: asdict(r) for name, r in sorted(results.items())},
+                option=orjson.OPT_INDENT_2,
+            )
+        )
+
+
+def compare_results(
+    baseline: BenchmarkResult, result: BenchmarkResult, tolerance: float
+) -> list[str]:
+    """
+    Compares a benchmark result against a baseline.
+
+    :param tolerance: how much worse the result can be before it counts as a
+        regression (e.g., ``0.1`` = 10%).
+    :returns: a description of each regression (empty if none were found).
+    """
+    if (baseline.dataset, baseline.concurrency) != (result.dataset, result.concurrency):
+        return []
+
+    regressions = []
+
+    if result.throughput < baseline.throughput * (1 - tolerance):
+        regressions.append(
+            f"{result.name}: throughput dropped from {baseline.throughput:.1f} to "
+            f"{result.throughput:.1f} req/s"
+        )
+
+    for percentile in ("p50", "p95", "p99"):
+        before = getattr(baseline, percentile)
+        after = getattr(result, percentile)
+
+        if after > before * (1 + tolerance):
+            regressions.append(
+                f"{result.name}: {percentile} latency rose from {before:.2f} to "
+                f"{after:.2f} ms"
+            )
+
+    if result.errors > baseline.errors:
+        regressions.append(
+            f"{result.name}: errors rose from {baseline.errors} to {result.errors}"
+        )
+
+    return regressions
+
+
+async def seed_dataset(
+    db: DatabaseService,
+    profiles: int,
+    awards_per_profile: int,
+    batch_size: int = 5000,
+) -> None:
+    """
+    Quickly fills the database with placeholder profiles and awards, using multi-row
+    inserts.
+
+    The database assigns profile IDs (so that sequences, e.g. in Postgres, stay in step
+    with the data, and new profiles don't collide with the seeded ones).
+    """
+    async with db.engine.begin() as connection:
+        for offset in range(0, profiles, batch_size):
+            numbers = range(offset + 1, min(offset + batch_size, profiles) + 1)
+
+            ids = await connection.scalars(
+                insert(Profile).returning(Profile.id),
+                [
+                    {
+                        "username": f"user{i}",
+                        "password": f"password{i}",
+                        "gender": "female" if i % 2 else "male",
+                        "full_name": f"User {i}",
+                        "street_address": f"{i} Benchmark Road",
+                        "email": f"user{i}@example.com",
+                    }
+                    for i in numbers
+                ],
+            )
+
+            if awards_per_profile:
+                await connection.execute(
+                    insert(Award),
+                    [
+                        {"title": f"Award {n}", "profile_id": profile_id}
+                        for profile_id in ids
+                        for n in range(awards_per_profile)
+                    ],
+                )
@@ -0,0 +1,265 @@
+"""
+Checks the query plans of hot-path queries, to catch missing indexes before they reach
+production.
+"""
+__all__ = [
+    "HOT_PATHS",
+    "LARGE_TABLES",
+    "PlanIssue",
+    "QueryPlan",
+    "capture_statements",
+    "check_hot_paths",
+    "explain_statements",
+]
+
+import re
+import typing
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+
+from sqlalchemy import Connection, event, inspect
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession
+
+from services import AwardService, DatabaseService, get_service
+from services.profile import EditAwardRequest, EditProfileRequest, ProfileService
+
+# Tables that are expected to grow large, so queries must not scan them in full.
+LARGE_TABLES = ("profiles", "awards")
+
+# Queries that the API runs on every request, keyed by name.  Each one is called with a
+# session and the ID of a profile that exists in the database.
+HOT_PATHS: dict[str, typing.Callable[[AsyncSession, int], typing.Awaitable]] = {
+    "get_by_id": lambda session, id: ProfileService.get_by_id(session, id),
+    "get_json_by_id": lambda session, id: ProfileService.get_json_by_id(session, id),
+    "get_by_ids": lambda session, id: ProfileService.get_by_ids(session, [id, id + 1]),
+    "edit_by_id": lambda session, id: get_service(ProfileService).edit_by_id(
+        session,
+        id,
+        EditProfileRequest(
+            username="queryplan",
+            password="queryplan",
+            gender="queryplan",
+            full_name="Query Plan",
+            street_address="1 Query Plan Street",
+            email="query.plan@example.com",
+        ),
+    ),
+    "bestow_award": lambda session, id: get_service(ProfileService).bestow_award(
+        session, id, EditAwardRequest(title="Query Plan")
+    ),
+    "recent_awards": lambda session, id: AwardService.recent_awards(
+        session, with_profile=True
+    ),
+}
+
+# Matches tables in the FROM clause, and their aliases (e.g., ``awards AS awards_1``).
+_FROM_TABLE = re.compile(r"\b(?:FROM|JOIN)\s+(\w+)(?:\s+AS\s+(\w+))?", re.IGNORECASE)
+
+# Matches steps in a query plan that read every row in a table.
+# :see: https://www.sqlite.org/eqp.html
+# :see: https://www.postgresql.org/docs/current/using-explain.html
+_FULL_SCAN = {
+    "sqlite": re.compile(r"^SCAN (\w+)(?!.*\bUSING\b)|^SEARCH (\w+) USING AUTOMATIC"),
+    "postgresql": re.compile(r"Seq Scan on (\w+)"),
+}
+
+
+@dataclass(slots=True)
+class PlanIssue:
+    """
+    A query that scans every row in a large table.
+    """
+
+    table: str
+    # The step in the query plan that scans the table.
+    detail: str
+    # ``CREATE INDEX`` statements that would (probably) avoid the scan.
+    suggestions: list[str] = field(default_factory=list)
+
+
+@dataclass(slots=True)
+class QueryPlan:
+    """
+    The query plan for a SQL statement.
+    """
+
+    statement: str
+    plan: list[str]
+    issues: list[PlanIssue] = field(default_factory=list)
+
+
+@contextmanager
+def capture_statements(engine: AsyncEngine) -> typing.Iterator[list[tuple]]:
+    """
+    Records the SQL statements (and parameters) executed inside the block, so that they
+    can be passed to :py:func:`explain_statements`.
+    """
+    statements: list[tuple] = []
+
+    def _capture(conn, cursor, statement, parameters, context, executemany):
+        # Bulk inserts don't read from any tables.
+        if not executemany:
+            statements.append((statement, parameters))
+
+    event.listen(engine.sync_engine, "before_cursor_execute", _capture)
+    try:
+        yield statements
+    finally:
+        event.remove(engine.sync_engine, "before_cursor_execute", _capture)
+
+
+async def explain_statements(
+    engine: AsyncEngine,
+    statements: typing.Iterable[tuple],
+    large_tables: typing.Collection[str] = LARGE_TABLES,
+) -> list[QueryPlan]:
+    """
+    Gets the query plan for each statement, and flags full scans of large tables.
+
+    Uses ``EXPLAIN QUERY PLAN`` for SQLite, and ``EXPLAIN`` for Postgres.  Postgres
+    prefers to scan small tables in full, even if there is a suitable index, so
+    sequential scans are disabled while explaining; if the plan still uses one, then
+    there is no index that it could use instead.
+    """
+    dialect = engine.dialect.name
+    if dialect not in _FULL_SCAN:
+        raise ValueError(f"Query plans are not supported for {dialect}.")
+
+    plans: dict[str, QueryPlan] = {}
+
+    async with engine.connect() as connection:
+        indexed = await connection.run_sync(_indexed_columns, large_tables)
+        await connection.rollback()
+
+        for statement, parameters in statements:
+            if statement in plans or not statement.lstrip().upper().startswith(
+                ("SELECT", "UPDATE", "DELETE")
+            ):
+                continue
+
+            if dialect == "sqlite":
+                result = await connection.exec_driver_sql(
+                    f"EXPLAIN QUERY PLAN {statement}", parameters
+                )
+                plan = [row.detail for row in result]
+            else:
+                await connection.exec_driver_sql("SET LOCAL enable_seqscan = off")
+                result = await connection.exec_driver_sql(
+                    f"EXPLAIN {statement}", parameters
+                )
+                plan = [line for (line,) in result]
+
+            # End the transaction, so that ``SET LOCAL`` doesn't leak into the next one.
+            await connection.rollback()
+
+            plans[statement] = QueryPlan(
+                statement, plan, _find_issues(statement, plan, dialect, indexed)
+            )
+
+    return list(plans.values())
+
+
+async def check_hot_paths(
+    db: DatabaseService, large_tables: typing.Collection[str] = LARGE_TABLES
+) -> dict[str, list[QueryPlan]]:
+    """
+    Runs each of the :py:data:`HOT_PATHS` (rolling back any changes), and explains the
+    queries that they execute.
+
+    :raises LookupError: if there are no profiles in the database.
+    """
+    async with db.session() as session:
+        profile_id = await ProfileService.last_id(session)
+    if not profile_id:
+        raise LookupError("There are no profiles in the database.")
+
+    results = {}
+    for name, hot_path in HOT_PATHS.items():
+        with capture_statements(db.engine) as statements:
+            async with db.session() as session:
+                await hot_path(session, profile_id)
+                await session.flush()
+                await session.rollback()
+
+        results[name] = await explain_statements(db.engine, statements, large_tables)
+
+    return results
+
+
+def _indexed_columns(
+    connection: Connection, tables: typing.Iterable[str]
+) -> dict[str, tuple[set[str], set[str]]]:
+    """
+    Inspects the database, to find out which columns of each table already have an
+    index (or are the first column of one; unique constraints and primary keys have an
+    index, too).
+
+    :returns: ``(columns, indexed columns)`` for each table, keyed by table name.
+    """
+    inspector = inspect(connection)
+    existing = set(inspector.get_table_names())
+
+    result = {}
+    for table in tables:
+        if table not in existing:
+            continue
+
+        columns = {column["name"] for column in inspector.get_columns(table)}
+        indexed = {
+            index["column_names"][0]
+            for index in (
+                *inspector.get_indexes(table),
+                *inspector.get_unique_constraints(table),
+            )
+            if index["column_names"]
+        }
+        indexed.update(inspector.get_pk_constraint(table)["constrained_columns"][:1])
+        result[table] = (columns, indexed)
+
+    return result
+
+
+def _find_issues(
+    statement: str,
+    plan: typing.Iterable[str],
+    dialect: str,
+    indexed: dict[str, tuple[set[str], set[str]]],
+) -> list[PlanIssue]:
+    # Map aliases back to table names (e.g., ``awards_1`` -> ``awards``).
+    tables = {}
+    for table, alias in _FROM_TABLE.findall(statement):
+        tables[alias or table] = table
+        tables.setdefault(table, table)
+
+    issues = []
+    for detail in plan:
+        match = _FULL_SCAN[dialect].search(detail.strip())
+        if not match:
+            continue
+
+        alias = next(group for group in match.groups() if group)
+        table = tables.get(alias, alias)
+        if table in indexed:
+            columns, indexed_columns = indexed[table]
+            issues.append(
+                PlanIssue(
+                    table,
+                    detail.strip(),
+                    [
+                        f"CREATE INDEX ix_{table}_{column} ON {table} ({column})"
+                        for column in _filter_columns(statement, alias)
+                        if column in columns and column not in indexed_columns
+                    ],
+                )
+            )
+
+    return issues
+
+
+def _filter_columns(statement: str, alias: str) -> list[str]:
+    """
+    Finds the columns of a table that are used to filter, join or sort it.
+    """
+    # Skip the select list.
+    clauses = re.split(r"\bFROM\b", statement, maxsplit=1, flags=re.IGNORECASE)[-1]
+    return list(dict.fromkeys(re.findall(rf"\b{re.escape(alias)}\.(\w+)\b", clauses)))
@@ -1,16 +1,136 @@
-__all__ = ["MigrationService"]
+__all__ = [
+    "Backfill",
+    "BackfillProgress",
+    "MigrationService",
+    "postgres_replication_lag",
+]
 
 import asyncio
+import math
+import re
+import sqlite3
+import time
+import typing
+from dataclasses import dataclass
+from functools import partial
+from pathlib import Path
 from typing import Self
 
-from alembic import context
-from sqlalchemy import Connection
+from alembic import command, context
+from alembic.config import Config
+from sqlalchemy import (
+    Column,
+    Connection,
+    DateTime,
+    Engine,
+    Integer,
+    MetaData,
+    Row,
+    String,
+    Table,
+    create_engine,
+    event,
+    func,
+    insert,
+    select,
+    text,
+    update,
+)
 from sqlalchemy.ext.asyncio import AsyncEngine
+from sqlalchemy.pool import StaticPool
 
 from models.base import Base
 from services import DatabaseService
 from services.base import BaseService
 
+# Alembic config file, used when running migrations programmatically.
+ALEMBIC_INI = Path(__file__).parents[3] / "alembic.ini"
+
+# The migrations are written for Postgres, which has a ``now()`` function; SQLite
+# doesn't (see :py:func:`_sqlite_server_defaults`).
+_POSTGRES_NOW = re.compile(r"\bnow\(\)", re.IGNORECASE)
+
+# Records how far each backfill has got, so that it can resume if it's interrupted.
+# This isn't part of the models' metadata, as it's only used by migrations (it is
+# created automatically the first time a backfill runs).
+backfill_metadata = MetaData()
+backfill_checkpoints = Table(
+    "backfill_checkpoints",
+    backfill_metadata,
+    Column("name", String, primary_key=True),
+    # Primary key of the last row that was processed.
+    Column("last_key", Integer, nullable=False),
+    Column("rows", Integer, nullable=False),
+    Column("updated_at", DateTime, server_default=func.now(), onupdate=func.now()),
+)
+
+
+@dataclass(slots=True)
+class Backfill:
+    """
+    Describes a data migration, for :py:meth:`MigrationService.run_backfill`.
+
+    Rows are processed in batches, in primary key order (keyset pagination), with each
+    batch committed in its own short transaction, so that live traffic isn't blocked.
+
+    Example (in a migration script)::
+
+       def upgrade() -> None:
+           op.add_column("awards", sa.Column("slug", sa.String(), nullable=True))
+
+           def add_slugs(connection, rows):
+               connection.execute(
+                   sa.update(awards).where(awards.c.id == sa.bindparam("key")),
+                   [{"key": row.id, "slug": slugify(row.title)} for row in rows],
+               )
+
+           # Commit the DDL, so that each batch can be committed separately.
+           with op.get_context().autocommit_block():
+               MigrationService.run_backfill(
+                   op.get_bind().engine,
+                   Backfill("award-slugs", awards, add_slugs, columns=["title"]),
+               )
+    """
+
+    # Unique name, used to checkpoint progress.
+    name: str
+    # Table to backfill.  Must have a single integer primary key column.
+    table: Table
+    # Called with each batch of rows (inside the batch's transaction).
+    process: typing.Callable[[Connection, typing.Sequence[Row]], None]
+    # Columns to select for each row, in addition to the primary key.
+    columns: typing.Sequence[str] = ()
+    batch_size: int = 1000
+    # Maximum number of rows to process per second (``None`` for no limit).
+    max_rate: float | None = None
+    # Pause while ``lag`` returns more than this many seconds (e.g., to let replicas
+    # catch up).  See :py:func:`postgres_replication_lag`.
+    max_lag: float | None = None
+    lag: typing.Callable[[Connection], float] | None = None
+    # How long to wait before checking the lag again (seconds).
+    lag_poll_interval: float = 1.0
+
+    @property
+    def key(self) -> Column:
+        (key,) = self.table.primary_key.columns
+        return key
+
+
+@dataclass(slots=True)
+class BackfillProgress:
+    """
+    Result of running (or estimating) a backfill.
+    """
+
+    rows: int = 0
+    batches: int = 0
+    # Primary key of the last row that was processed.
+    last_key: int = 0
+    # Seconds spent running the backfill (or, for a dry run, the estimated duration).
+    elapsed: float = 0.0
+    # Seconds spent waiting for throttling.
+    throttled: float = 0.0
+
 
 class MigrationService(BaseService):
     """
@@ -41,6 +161,72 @@ class MigrationService(BaseService):
             await connection.run_sync(Base.metadata.drop_all)
             await connection.run_sync(Base.metadata.create_all)
 
+    @staticmethod
+    def create_template(from_migrations: bool = False) -> sqlite3.Connection:
+        """
+        Creates an in-memory SQLite database containing just the schema, which can then
+        be copied into each test's database (see :py:meth:`create_tables_from_template`).
+
+        Building the schema is (relatively) slow, and gets slower as more tables and
+        migrations are added, whereas copying it is near enough instant.  Create the
+        template once per test session (in-memory databases are private to the process,
+        so each worker gets its own when tests are run in parallel).
+
+        :param from_migrations: whether to build the schema by running the Alembic
+            migrations (slower, but exactly matches production) instead of inspecting
+            the model classes.
+        """
+        template = sqlite3.connect(":memory:", check_same_thread=False)
+
+        engine = create_engine(
+            "sqlite://", creator=lambda: template, poolclass=StaticPool
+        )
+        # Not in a transaction, as Alembic manages its own (some migrations need to
+        # commit part-way through).
+        if from_migrations:
+            event.listen(
+                engine, "before_cursor_execute", _sqlite_server_defaults, retval=True
+            )
+
+        with engine.connect() as connection:
+            if from_migrations:
+                MigrationService.run_migrations(connection)
+            else:
+                Base.metadata.create_all(connection)
+                connection.commit()
+
+        return template
+
+    def create_tables_from_template(self, template: sqlite3.Connection):
+        """
+        Copies the schema from a template (see :py:meth:`create_template`) into the
+        database, instead of creating the tables from scratch.
+
+        The copy is made when the engine first connects to the database, so call this
+        before the engine is used.
+        """
+        engine = self.db.engine.sync_engine
+        if engine.dialect.name != "sqlite":
+            raise ValueError(
+                f"Templates are only supported for SQLite (got {engine.dialect.name})."
+            )
+
+        event.listen(engine, "connect", partial(_copy_template, template), once=True)
+
+    @staticmethod
+    def run_migrations(connection: Connection):
+        """
+        Runs all the migrations on an existing (synchronous) connection.
+
+        :see: https://alembic.sqlalchemy.org/en/latest/cookbook.html#connection-sharing
+        """
+        config = Config(ALEMBIC_INI)
+        config.set_main_option("script_location", str(ALEMBIC_INI.parent / "alembic"))
+        # :see: ``alembic/env.py``
+        config.attributes["connection"] = connection
+
+        command.upgrade(config, "head")
+
     def run_migrations_from_env_py(self):
         """
         Runs migrations on the database "synchronously".
@@ -58,7 +244,11 @@ class MigrationService(BaseService):
                 """
                 :see: :py:func:`alembic.command.upgrade`
                 """
-                context.configure(connection=connection, target_metadata=Base.metadata)
+                context.configure(
+                    connection=connection,
+                    target_metadata=Base.metadata,
+                    include_object=_include_object,
+                )
 
                 with context.begin_transaction():
                     context.run_migrations()
@@ -87,3 +277,207 @@ class MigrationService(BaseService):
 
         with context.begin_transaction():
             context.run_migrations()
+
+    @staticmethod
+    def run_backfill(
+        engine: Engine,
+        backfill: Backfill,
+        dry_run: bool = False,
+        sleep: typing.Callable[[float], None] = time.sleep,
+    ) -> BackfillProgress:
+        """
+        Processes every row in a table in batches (see :py:class:`Backfill`).
+
+        Progress is checkpointed after each batch (in the same transaction), so if the
+        backfill is interrupted, running it again resumes from where it stopped.  Rows
+        added after the backfill finishes are picked up by the next run.
+
+        :param engine: engine to connect to the database with.  In a migration script,
+            use ``op.get_bind().engine`` inside ``op.get_context().autocommit_block()``.
+        :param dry_run: instead of running the backfill, process one batch and roll it
+            back, and use how long it took to estimate the total duration.
+        :param sleep: function used to wait while throttling.
+        """
+        if len(backfill.table.primary_key.columns) != 1:
+            raise ValueError(f"{backfill.table.name} must have a single primary key.")
+
+        with engine.connect() as connection:
+            with connection.begin():
+                backfill_metadata.create_all(connection)
+                progress = _load_checkpoint(connection, backfill.name)
+
+            if dry_run:
+                return _estimate_backfill(connection, backfill, progress)
+
+            start = time.perf_counter()
+            while True:
+                progress.throttled += _wait_for_lag(connection, backfill, sleep)
+
+                with connection.begin():
+                    rows = _next_batch(connection, backfill, progress.last_key)
+                    if not rows:
+                        break
+
+                    backfill.process(connection, rows)
+
+                    progress.rows += len(rows)
+                    progress.batches += 1
+                    progress.last_key = rows[-1][0]
+                    _save_checkpoint(
+                        connection, backfill.name, progress.last_key, len(rows)
+                    )
+
+                if backfill.max_rate:
+                    # Wait until the average rate is back under the limit.
+                    delay = progress.rows / backfill.max_rate - (
+                        time.perf_counter() - start
+                    )
+                    if delay > 0:
+                        sleep(delay)
+                        progress.throttled += delay
+
+            progress.elapsed = time.perf_counter() - start
+            return progress
+
+
+def postgres_replication_lag(connection: Connection) -> float:
+    """
+    Returns how far behind the most out-of-date replica is (seconds), for use as
+    :py:attr:`Backfill.lag`.
+    """
+    return connection.scalar(
+        text(
+            "SELECT COALESCE(MAX(EXTRACT(EPOCH FROM replay_lag)), 0) "
+            "FROM pg_stat_replication"
+        )
+    )
+
+
+def _include_object(obj, name: str, type_: str, reflected: bool, compare_to) -> bool:
+    """
+    Prevents autogenerate from dropping tables that aren't part of the models.
+    """
+    return not (type_ == "table" and name in backfill_metadata.tables)
+
+
+def _load_checkpoint(connection: Connection, name: str) -> BackfillProgress:
+    checkpoint = connection.execute(
+        select(backfill_checkpoints.c.last_key).where(
+            backfill_checkpoints.c.name == name
+        )
+    ).first()
+
+    return BackfillProgress(last_key=checkpoint.last_key if checkpoint else 0)
+
+
+def _save_checkpoint(connection: Connection, name: str, last_key: int, rows: int):
+    result = connection.execute(
+        update(backfill_checkpoints)
+        .where(backfill_checkpoints.c.name == name)
+        .values(last_key=last_key, rows=backfill_checkpoints.c.rows + rows)
+    )
+
+    if not result.rowcount:
+        connection.execute(
+            insert(backfill_checkpoints).values(name=name, last_key=last_key, rows=rows)
+        )
+
+
+def _next_batch(
+    connection: Connection, backfill: Backfill, after: int
+) -> typing.Sequence[Row]:
+    key = backfill.key
+
+    return connection.execute(
+        select(key, *(backfill.table.c[c] for c in backfill.columns))
+        .where(key > after)
+        .order_by(key)
+        .limit(backfill.batch_size)
+    ).all()
+
+
+def _wait_for_lag(
+    connection: Connection, backfill: Backfill, sleep: typing.Callable[[float], None]
+) -> float:
+    """
+    Waits until the lag is acceptable.
+
+    :returns: how long it waited (seconds).
+    """
+    if backfill.lag is None or backfill.max_lag is None:
+        return 0.0
+
+    def current_lag() -> float:
+        with connection.begin():
+            return backfill.lag(connection)
+
+    waited = 0.0
+    while current_lag() > backfill.max_lag:
+        sleep(backfill.lag_poll_interval)
+        waited += backfill.lag_poll_interval
+
+    return waited
+
+
+def _estimate_backfill(
+    connection: Connection, backfill: Backfill, progress: BackfillProgress
+) -> BackfillProgress:
+    """
+    Estimates how long a backfill will take, by timing one batch (and then rolling it
+    back).
+    """
+    transaction = connection.begin()
+    try:
+        remaining = connection.scalar(
+            select(func.count())
+            .select_from(backfill.table)
+            .where(backfill.key > progress.last_key)
+        )
+        if not remaining:
+            return progress
+
+        start = time.perf_counter()
+        rows = _next_batch(connection, backfill, progress.last_key)
+        backfill.process(connection, rows)
+        batch_time = time.perf_counter() - start
+    finally:
+        transaction.rollback()
+
+    batches = math.ceil(remaining / backfill.batch_size)
+    if backfill.max_rate:
+        batch_time = max(batch_time, backfill.batch_size / backfill.max_rate)
+
+    return BackfillProgress(
+        rows=remaining,
+        batches=batches,
+        last_key=progress.last_key,
+        elapsed=batches * batch_time,
+    )
+
+
+def _sqlite_server_defaults(
+    conn, cursor, statement: str, parameters, context, executemany
+) -> tuple[str, typing.Any]:
+    """
+    Translates Postgres server defaults in the migrations' DDL (e.g.,
+    ``DEFAULT (now())``) to their SQLite equivalents, so that the migrations can build
+    the test template.
+    """
+    if statement.lstrip().upper().startswith(("CREATE", "ALTER")):
+        statement = _POSTGRES_NOW.sub("CURRENT_TIMESTAMP", statement)
+
+    return statement, parameters
+
+
+def _copy_template(template: sqlite3.Connection, dbapi_connection, connection_record):
+    """
+    Copies the template database into a new connection's database, using SQLite's
+    backup API.
+
+    :see: https://docs.python.org/3/library/sqlite3.html#sqlite3.Connection.backup
+    """
+    # The DBAPI connection is SQLAlchemy's adapter for aiosqlite, which wraps the actual
+    # sqlite3 connection.  That connection belongs to aiosqlite's worker thread, so run
+    # the backup there (the same way the adapter runs everything else).
+    connection = dbapi_connection.driver_connection
+    dbapi_connection.await_(connection._execute(template.backup, connection._conn))
@@ -0,0 +1,199 @@
+"""
+Generates synthetic profiles and awards, for filling the database with large amounts of
+realistic-looking data without relying on an external API.
+"""
+__all__ = ["SyntheticBatch", "SyntheticDataGenerator", "to_raw_profile"]
+
+import typing
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from random import Random
+
+# Word lists used to generate values.  Usernames follow the same pattern as Random User
+# Generator API (e.g., ``purpledog816``), but with a 6-digit suffix, so that they never
+# clash with profiles loaded from the API.
+ADJECTIVES = (
+    "angry brave calm crazy eager fancy gentle golden happy heavy jolly lazy lucky "
+    "orange proud purple quick red silly tiny ugly white yellow"
+).split()
+ANIMALS = (
+    "bear bird butterfly cat dog duck elephant fish frog goose gorilla kangaroo koala "
+    "leopard lion monkey mouse ostrich panda peacock rabbit snake swan tiger wolf zebra"
+).split()
+FIRST_NAMES = (
+    "Aiden Amelia Arthur Charlotte Ella Emily Ethan Florence Grace Hannah Isla Jack "
+    "Jake James Lewis Liam Lily Molly Natalie Nathaniel Noah Oliver Olivia Ruby Sophie "
+    "Thomas William Zoe"
+).split()
+LAST_NAMES = (
+    "Anderson Brown Chen Clark Edwards Green Harris Jones King Lee Martin Moore Patel "
+    "Roberts Robinson Scott Singh Smith Taylor Thompson Walker Wang Watson White Wilson "
+    "Wood Young"
+).split()
+STREET_NAMES = (
+    "Crawford Street|Maunganui Road|Marshland Road|Saint Aubyn Street|Queen Street|"
+    "Victoria Avenue|Great North Road|Riccarton Road|Cuba Street|Ponsonby Road"
+).split("|")
+PASSWORDS = (
+    "bassman dragon hunter letmein longjohn monkey qwerty shadow sunshine united"
+).split()
+AWARD_TITLES = (
+    "Bug Squasher|Code Reviewer|Deploy Hero|Docs Champion|Incident Commander|"
+    "Mentor|Performance Wizard|Release Captain|SQLAlchemist|Test Whisperer"
+).split("|")
+GENDERS = ("female", "male")
+
+
+@dataclass(slots=True)
+class SyntheticBatch:
+    """
+    A batch of generated data.
+    """
+
+    # Column values for each profile.
+    profiles: list[dict[str, typing.Any]] = field(default_factory=list)
+
+    # Column values for each profile's awards (without ``profile_id``, which isn't known
+    # until the profiles are inserted).  Same order as :py:attr:`profiles`.
+    awards: list[list[dict[str, typing.Any]]] = field(default_factory=list)
+
+    @property
+    def award_count(self) -> int:
+        return sum(map(len, self.awards))
+
+
+class SyntheticDataGenerator:
+    """
+    Generates profiles, and awards for each profile.
+
+    The number of awards per profile follows a power law (Pareto distribution): most
+    profiles have few or no awards, and a small number of profiles have lots.
+
+    Output is deterministic: the same ``seed`` and ``batch_size`` always produce the
+    same data.
+
+    Each batch is generated a column at a time (e.g., all the first names, then all the
+    last names, etc.), which is much faster than generating a row at a time.
+    """
+
+    def __init__(
+        self,
+        seed: int = 0,
+        batch_size: int = 10_000,
+        award_alpha: float = 1.5,
+        max_awards: int = 100,
+        awards_since: datetime = datetime(2023, 1, 1),
+        awards_span: timedelta = timedelta(days=365),
+    ):
+        """
+        :param seed: seed for the random number generator.
+        :param batch_size: number of profiles in each batch.
+        :param award_alpha: shape of the awards distribution; smaller values give more
+            awards to the most-awarded profiles.  ``0`` disables awards.
+        :param max_awards: maximum number of awards per profile.
+        :param awards_since: awards are spread over ``awards_span`` from this date.
+        :param awards_span: see ``awards_since``.
+        """
+        self.seed = seed
+        self.batch_size = batch_size
+        self.award_alpha = award_alpha
+        self.max_awards = max_awards
+        self.awards_since = awards_since
+        self.awards_span = awards_span.total_seconds()
+
+    def batches(self, count: int, start: int = 0) -> typing.Iterator[SyntheticBatch]:
+        """
+        Generates ``count`` profiles, in batches.
+
+        :param start: number of the first profile, used to make usernames unique.  Use
+            a different value each time you add profiles to the same database.
+        """
+        random = Random(self.seed)
+
+        for offset in range(0, count, self.batch_size):
+            yield self._batch(
+                random, start + offset, min(self.batch_size, count - offset)
+            )
+
+    def _batch(self, random: Random, start: int, size: int) -> SyntheticBatch:
+        first_names = random.choices(FIRST_NAMES, k=size)
+        last_names = random.choices(LAST_NAMES, k=size)
+        usernames = [
+            f"{adjective}{animal}{n:06d}"
+            for adjective, animal, n in zip(
+                random.choices(ADJECTIVES, k=size),
+                random.choices(ANIMALS, k=size),
+                range(start, start + size),
+            )
+        ]
+
+        profiles = [
+            {
+                "username": username,
+                "password": password,
+                "gender": gender,
+                "full_name": f"{first} {last}",
+                "street_address": f"{number} {street}",
+                "email": f"{first.lower()}.{last.lower()}{n}@example.com",
+            }
+            for username, password, gender, first, last, number, street, n in zip(
+                usernames,
+                random.choices(PASSWORDS, k=size),
+                random.choices(GENDERS, k=size),
+                first_names,
+                last_names,
+                (random.randrange(1, 10_000) for _ in range(size)),
+                random.choices(STREET_NAMES, k=size),
+                range(start, start + size),
+            )
+        ]
+
+        return SyntheticBatch(profiles, self._awards(random, size))
+
+    def _awards(self, random: Random, size: int) -> list[list[dict[str, typing.Any]]]:
+        if not self.award_alpha:
+            return [[] for _ in range(size)]
+
+        # ``paretovariate`` returns values >= 1, so subtract 1 to allow profiles to
+        # have no awards.
+        counts = [
+            min(int(random.paretovariate(self.award_alpha)) - 1, self.max_awards)
+            for _ in range(size)
+        ]
+        total = sum(counts)
+
+        titles = iter(random.choices(AWARD_TITLES, k=total))
+        timestamps = iter(
+            self.awards_since + timedelta(seconds=random.random() * self.awards_span)
+            for _ in range(total)
+        )
+
+        return [
+            [
+                {"title": next(titles), "created_at": next(timestamps)}
+                for _ in range(count)
+            ]
+            for count in counts
+        ]
+
+
+def to_raw_profile(
+    profile: dict[str, typing.Any], awards: typing.Sequence[dict[str, typing.Any]] = ()
+) -> dict:
+    """
+    Converts a generated profile into the same format as Random User Generator API
+    results, so that it can be read by :py:func:`cli.commands.generate.extract_profile`.
+
+    Awards are included as an extra ``awards`` key (list of titles).
+    """
+    first, _, last = profile["full_name"].partition(" ")
+    number, _, street = profile["street_address"].partition(" ")
+
+    return {
+        "gender": profile["gender"],
+        "name": {"first": first, "last": last},
+        "location": {"street": {"number": int(number), "name": street}},
+        "email": profile["email"],
+        "login": {"username": profile["username"], "password": profile["password"]},
+        "awards": [award["title"] for award in awards],
+    }
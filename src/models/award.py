@@ -3,7 +3,7 @@ __all__ = ["Award"]
 from datetime import datetime
 from typing import TYPE_CHECKING
 
-from sqlalchemy import ForeignKey, func
+from sqlalchemy import ForeignKey, Index, func
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from models.base import Base
@@ -20,6 +20,10 @@ class Award(Base):
     """
 
     __tablename__ = "awards"
+    __table_args__ = (
+        # Supports the recent awards feed (keyset pagination, newest first).
+        Index("ix_awards_created_at_id", "created_at", "id"),
+    )
 
     id: Mapped[int] = mapped_column(init=False, primary_key=True)
     title: Mapped[str] = mapped_column()
@@ -28,4 +32,4 @@ class Award(Base):
     # :see: https://docs.sqlalchemy.org/en/20/orm/queryguide/relationships.html#configuring-loader-strategies-at-mapping-time
     # :see: https://docs.sqlalchemy.org/en/20/orm/queryguide/relationships.html#what-kind-of-loading-to-use
     profile: Mapped["Profile"] = relationship(back_populates="awards", lazy="joined")
-    profile_id: Mapped[int] = mapped_column(ForeignKey("profiles.id"))
+    profile_id: Mapped[int] = mapped_column(ForeignKey("profiles.id"), index=True)
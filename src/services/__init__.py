@@ -3,12 +3,26 @@
 # each class is imported, it gets added to the registry automatically.
 # :see: https://class-registry.readthedocs.io/en/latest/advanced_topics.html
 __all__ = [
+    "AwardService",
+    "CaptureService",
     "ConfigService",
+    "CredentialService",
     "DatabaseService",
+    "LoopMonitorService",
+    "MetricsService",
     "ProfileService",
+    "ProfilerService",
     "get_service",
 ]
 from services.base import get_service
+from services.capture import CaptureService
 from services.config import ConfigService
+from services.credentials import CredentialService
 from services.database import DatabaseService
+
+# ORM services depend on ``DatabaseService``, so they must be imported after it.
+from services.award import AwardService
+from services.loop_monitor import LoopMonitorService
+from services.metrics import MetricsService
 from services.profile import ProfileService
+from services.profiler import ProfilerService
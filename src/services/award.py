@@ -0,0 +1,115 @@
+__all__ = ["AwardService", "decode_cursor", "encode_cursor"]
+
+import base64
+from datetime import UTC, datetime
+from typing import Any, Sequence
+
+import orjson
+from sqlalchemy import select, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from models import Award, Profile
+from models.service import BaseOrmService
+
+
+def encode_cursor(created_at: datetime, id: int) -> str:
+    """
+    Encodes the position of an award in the feed, so that the next page can start after
+    it (see :py:meth:`AwardService.recent_awards`).
+    """
+    return base64.urlsafe_b64encode(orjson.dumps([created_at.isoformat(), id])).decode()
+
+
+def decode_cursor(cursor: str) -> tuple[datetime, int]:
+    """
+    Reverses :py:func:`encode_cursor`.
+
+    :raises ValueError: if the cursor is malformed.
+    """
+    try:
+        created_at, id = orjson.loads(base64.urlsafe_b64decode(cursor))
+        return datetime.fromisoformat(created_at), int(id)
+    except (TypeError, ValueError) as e:
+        raise ValueError(f"Invalid cursor: {cursor}") from e
+
+
+def _naive_utc(value: datetime) -> datetime:
+    """
+    ``created_at`` is stored without a time zone (in UTC), so convert aware datetimes
+    before comparing.
+    """
+    if value.tzinfo is None:
+        return value
+    return value.astimezone(UTC).replace(tzinfo=None)
+
+
+class AwardService(BaseOrmService):
+    """
+    Use cases for working with awards across all profiles.
+    """
+
+    provides = "award"
+
+    @staticmethod
+    async def recent_awards(
+        session: AsyncSession,
+        limit: int = 20,
+        since: datetime | None = None,
+        until: datetime | None = None,
+        after: tuple[datetime, int] | None = None,
+        with_profile: bool = False,
+    ) -> Sequence[dict[str, Any]]:
+        """
+        Returns the most recent awards (newest first), as plain dicts.
+
+        Uses keyset pagination on ``(created_at, id)``, backed by an index, so every
+        page costs the same no matter how far back it is, or how many profiles there
+        are.  Awards are selected directly, without loading their profiles as ORM
+        instances.
+
+        :param since: only include awards created at or after this time.
+        :param until: only include awards created before this time.
+        :param after: ``(created_at, id)`` of the last award on the previous page (see
+            :py:func:`decode_cursor`).
+        :param with_profile: whether to include a summary of each award's profile (ID,
+            username and full name).
+        """
+        columns = [Award.id, Award.title, Award.created_at, Award.profile_id]
+        if with_profile:
+            columns += [Profile.username, Profile.full_name]
+
+        query = select(*columns)
+        if with_profile:
+            query = query.join(Profile, Profile.id == Award.profile_id)
+
+        if since is not None:
+            query = query.where(Award.created_at >= _naive_utc(since))
+        if until is not None:
+            query = query.where(Award.created_at < _naive_utc(until))
+        if after is not None:
+            created_at, id = after
+            query = query.where(
+                tuple_(Award.created_at, Award.id) < (_naive_utc(created_at), id)
+            )
+
+        rows = await session.execute(
+            query.order_by(Award.created_at.desc(), Award.id.desc()).limit(limit)
+        )
+
+        awards = []
+        for row in rows:
+            award = {
+                "id": row.id,
+                "title": row.title,
+                "created_at": row.created_at,
+                "profile_id": row.profile_id,
+            }
+            if with_profile:
+                award["profile"] = {
+                    "id": row.profile_id,
+                    "username": row.username,
+                    "full_name": row.full_name,
+                }
+            awards.append(award)
+
+        return awards
@@ -1,13 +1,82 @@
-__all__ = ["BaseService", "ServiceRegistry", "get_service", "registry"]
+__all__ = [
+    "BaseService",
+    "InstantiationPolicy",
+    "Lifetime",
+    "ServiceDependencyError",
+    "ServiceInstanceCache",
+    "ServiceRegistry",
+    "ServiceScope",
+    "ServiceScopeError",
+    "after_fork",
+    "close_services",
+    "get_service",
+    "registry",
+    "request_scope",
+    "start_services",
+]
 
+import asyncio
 import typing
 from abc import abstractmethod
-from inspect import signature
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+from enum import StrEnum, auto
+from graphlib import CycleError, TopologicalSorter
+from inspect import Parameter, isclass, signature
+from time import perf_counter
 from typing import Self
 
 from class_registry import AutoRegister, ClassRegistry, ClassRegistryInstanceCache
 
 
+class ServiceDependencyError(TypeError):
+    """
+    Indicates that a service's dependencies cannot be resolved (e.g., a factory kwarg
+    is missing its annotation, or two services depend on each other).
+    """
+
+
+class ServiceScopeError(RuntimeError):
+    """
+    Indicates that a scoped service was requested outside of its scope (e.g., a
+    request-scoped service was requested outside of :py:func:`request_scope`).
+    """
+
+
+class Lifetime(StrEnum):
+    """
+    Determines how long each instance of a service lives (see
+    :py:attr:`BaseService.lifetime`).
+    """
+
+    # One instance for the whole process.
+    singleton = auto()
+
+    # One instance per :py:func:`request_scope` (each API request or CLI command).
+    request = auto()
+
+    # One instance per asyncio task.
+    task = auto()
+
+
+# Services may only depend on services that live at least as long as they do, otherwise
+# they would hang on to instances after their scope has ended.
+_LIFETIME_RANKS = {Lifetime.singleton: 0, Lifetime.request: 1, Lifetime.task: 2}
+
+
+class InstantiationPolicy(StrEnum):
+    """
+    Determines what :py:func:`start_services` does once it has checked the service
+    dependency graph.
+    """
+
+    # Instantiate every service straight away, in dependency order.
+    eager = auto()
+
+    # Only check the graph; services are instantiated the first time they are used.
+    lazy = auto()
+
+
 class ServiceRegistry(ClassRegistry):
     """
     Registry of all services for the application.
@@ -16,23 +85,304 @@ class ServiceRegistry(ClassRegistry):
     def __init__(self):
         super().__init__(attr_name="provides", unique=True)
 
+        # Dependencies for each service class, so that we only have to inspect each
+        # factory method's signature once.
+        self._dependencies: dict[type, dict[str, type]] = {}
+
+        # Services whose factories are currently running, used to detect cycles when
+        # services are instantiated without calling :py:meth:`build_graph` first.
+        self._constructing: set[type] = set()
+
+        # How long (in seconds) each service's factory method took to run, keyed by
+        # the service's ``provides`` value.  Time spent constructing dependencies is
+        # not included.
+        self.construction_times: dict[str, float] = {}
+
     def create_instance(
         self, class_: "typing.Type[BaseService]", *args, **kwargs
     ) -> object:
-        # Intuit dependencies from the method's kwargs.
-        dependencies = {
-            param.name: get_service(param.annotation)
-            for param in signature(class_.factory).parameters.values()
-        }
+        if class_ in self._constructing:
+            raise ServiceDependencyError(
+                f"Circular dependency detected while instantiating {class_.__name__}"
+            )
+
+        self._constructing.add(class_)
+        try:
+            # Resolve dependencies first, so that they don't count towards this
+            # service's construction time.
+            dependencies = {
+                name: get_service(dependency)
+                for name, dependency in self.dependencies(class_).items()
+            }
+
+            # Call the factory method and pass in dependencies.
+            start = perf_counter()
+            instance = class_.factory(**dependencies)
+            self.construction_times[class_.provides] = perf_counter() - start
+        finally:
+            self._constructing.discard(class_)
+
+        return instance
+
+    def dependencies(self, class_: "typing.Type[BaseService]") -> dict[str, type]:
+        """
+        Intuits a service's dependencies from its factory method's kwargs.
+
+        :returns: the service class for each kwarg, keyed by kwarg name.
+        :raises ServiceDependencyError: if a kwarg is not annotated with a service class
+            that is registered with this registry.
+        """
+        try:
+            return self._dependencies[class_]
+        except KeyError:
+            pass
+
+        dependencies = {}
+        for param in signature(class_.factory, eval_str=True).parameters.values():
+            if param.annotation is Parameter.empty:
+                raise ServiceDependencyError(
+                    f"{class_.__name__}.factory() is missing an annotation "
+                    f"for {param.name!r}"
+                )
+
+            provides = (
+                getattr(param.annotation, "provides", None)
+                if isclass(param.annotation)
+                else None
+            )
+            if not isinstance(provides, str) or provides not in self:
+                raise ServiceDependencyError(
+                    f"{class_.__name__}.factory() has an invalid annotation "
+                    f"for {param.name!r} ({param.annotation!r}); "
+                    f"registered service class expected"
+                )
+
+            dependencies[param.name] = param.annotation
+
+        self._dependencies[class_] = dependencies
+        return dependencies
+
+    def build_graph(self) -> list[type]:
+        """
+        Checks the dependencies for every registered service.
+
+        :returns: the registered service classes, ordered so that each service comes
+            after all of the services that it depends on.
+        :raises ServiceDependencyError: if any service has invalid or circular
+            dependencies.
+        """
+        sorter = TopologicalSorter()
+
+        for class_ in self.values():
+            dependencies = [
+                self.get_class(dependency.provides)
+                for dependency in self.dependencies(class_).values()
+            ]
+
+            lifetime = getattr(class_, "lifetime", Lifetime.singleton)
+            for dependency in dependencies:
+                dependency_lifetime = getattr(
+                    dependency, "lifetime", Lifetime.singleton
+                )
+                if _LIFETIME_RANKS[dependency_lifetime] > _LIFETIME_RANKS[lifetime]:
+                    raise ServiceDependencyError(
+                        f"{class_.__name__} ({lifetime}) cannot depend on "
+                        f"{dependency.__name__} ({dependency_lifetime})"
+                    )
+
+            sorter.add(class_, *dependencies)
+
+        try:
+            return list(sorter.static_order())
+        except CycleError as e:
+            cycle = " -> ".join(class_.__name__ for class_ in e.args[1])
+            raise ServiceDependencyError(
+                f"Circular dependency detected: {cycle}"
+            ) from e
+
+
+class ServiceScope:
+    """
+    Holds the instances of scoped services for a single request or task, so that they
+    can be cleaned up when the scope ends.
+    """
+
+    def __init__(self, class_registry: ServiceRegistry):
+        self._registry = class_registry
+        self._instances: dict[type, object] = {}
+
+    def get_instance[S](self, service: typing.Type[S]) -> S:
+        """
+        Returns this scope's instance of the specified service, creating it if
+        necessary.
+        """
+        try:
+            return self._instances[service]
+        except KeyError:
+            instance = self._instances[service] = self._registry.get(service.provides)
+            return instance
+
+    async def close(self) -> None:
+        """
+        Calls :py:meth:`BaseService.close` for each instance in the scope.
+
+        Instances are closed in the reverse order that they were created, so that each
+        service is closed before the services that it depends on.  If an instance fails
+        to close, the rest are still closed.
+
+        :raises ExceptionGroup: if any instances failed to close.
+        """
+        instances = list(self._instances.values())
+        self._instances.clear()
+
+        await _close_instances(instances)
+
+
+async def _close_instances(instances: typing.Sequence["BaseService"]) -> None:
+    """
+    Calls :py:meth:`BaseService.close` for each instance, in the reverse order that they
+    were created, so that each service is closed before the services that it depends
+    on.
+
+    If an instance fails to close, the rest are still closed.
+
+    :raises ExceptionGroup: if any instances failed to close.
+    """
+    errors = []
+
+    for instance in reversed(instances):
+        try:
+            await instance.close()
+        except Exception as e:
+            errors.append(e)
+
+    if errors:
+        raise ExceptionGroup("Failed to close services", errors)
+
+
+# Scope for request-scoped services; see :py:func:`request_scope`.
+_request_scope: ContextVar[ServiceScope | None] = ContextVar(
+    "request_scope", default=None
+)
 
-        # Call the factory method and pass in dependencies.
-        return class_.factory(**dependencies)
+# Scope for task-scoped services, along with the task that owns it.  New tasks inherit a
+# copy of their parent's context, so we have to check the owner to tell whether the
+# scope belongs to the current task or its parent.
+_task_scope: ContextVar[tuple[asyncio.Task, ServiceScope] | None] = ContextVar(
+    "task_scope", default=None
+)
+
+# Keep references to tasks that are closing task scopes, so that they don't get garbage
+# collected before they finish.
+# :see: https://docs.python.org/3/library/asyncio-task.html#asyncio.create_task
+_closing_tasks: set[asyncio.Task] = set()
+
+
+class ServiceInstanceCache(ClassRegistryInstanceCache):
+    """
+    Wraps the service registry, caching service instances as they are created.
+
+    Singleton instances are also indexed by class, so that once a service has been
+    instantiated, :py:meth:`get_instance` can return it without going through
+    ``provides``.
+    """
+
+    def __init__(self, class_registry: ServiceRegistry):
+        super().__init__(class_registry)
+
+        self._instances: dict[type, object] = {}
+
+    def get_instance[S](self, service: typing.Type[S]) -> S:
+        """
+        Returns the instance of the specified service for the current scope, creating
+        it if necessary.
+
+        :raises ServiceScopeError: if the service is scoped, and its scope isn't
+            active.
+        """
+        try:
+            return self._instances[service]
+        except KeyError:
+            pass
+
+        match self._registry.get_class(service.provides).lifetime:
+            case Lifetime.request:
+                return self._get_request_scope().get_instance(service)
+            case Lifetime.task:
+                return self._get_task_scope().get_instance(service)
+
+        instance = self._instances[service] = self[service.provides]
+        return instance
+
+    async def close(self) -> None:
+        """
+        Calls :py:meth:`BaseService.close` for each singleton instance, and clears the
+        cache.
+
+        Instances are closed in the reverse order that they were created, so that each
+        service is closed before the services that it depends on.  If an instance fails
+        to close, the rest are still closed.
+
+        :raises ExceptionGroup: if any instances failed to close.
+        """
+        instances = list(self._cache.values())
+
+        self._cache.clear()
+        self._key_map.clear()
+        self._instances.clear()
+
+        await _close_instances(instances)
+
+    def after_fork(self) -> None:
+        """
+        Calls :py:meth:`BaseService.after_fork` for each singleton instance.
+        """
+        for instance in self._cache.values():
+            instance.after_fork()
+
+    @staticmethod
+    def _get_request_scope() -> ServiceScope:
+        scope = _request_scope.get()
+
+        if scope is None:
+            raise ServiceScopeError(
+                "Request-scoped services can only be used inside request_scope()"
+            )
+
+        return scope
+
+    def _get_task_scope(self) -> ServiceScope:
+        try:
+            task = asyncio.current_task()
+        except RuntimeError:
+            task = None
+
+        if task is None:
+            raise ServiceScopeError(
+                "Task-scoped services can only be used inside an asyncio task"
+            )
+
+        current = _task_scope.get()
+        if current and current[0] is task:
+            return current[1]
+
+        scope = ServiceScope(self._registry)
+        _task_scope.set((task, scope))
+
+        def close_scope(_: asyncio.Task) -> None:
+            # :py:func:`close_services` waits for these tasks to finish.
+            closing = task.get_loop().create_task(scope.close())
+            _closing_tasks.add(closing)
+            closing.add_done_callback(_closing_tasks.discard)
+
+        task.add_done_callback(close_scope)
+        return scope
 
 
 # Wrap the service registry in a cache, so that we only instantiate each service
 # instance once.
 _registry = ServiceRegistry()
-registry = ClassRegistryInstanceCache(_registry)
+registry = ServiceInstanceCache(_registry)
 
 
 class BaseService(metaclass=AutoRegister(_registry)):
@@ -46,6 +396,10 @@ class BaseService(metaclass=AutoRegister(_registry)):
        :see: https://class-registry.readthedocs.io/en/latest/advanced_topics.html
     """
 
+    # How long each instance of the service lives.  Scoped services are cleaned up (see
+    # :py:meth:`close`) when their scope ends.
+    lifetime: typing.ClassVar[Lifetime] = Lifetime.singleton
+
     @property
     @abstractmethod
     def provides(self) -> str:
@@ -91,9 +445,108 @@ class BaseService(metaclass=AutoRegister(_registry)):
         """
         raise NotImplementedError()
 
+    async def close(self) -> None:
+        """
+        Releases any resources held by the service instance (connections, caches,
+        etc.).
+
+        This gets called when the instance's scope ends; for singletons, that's when
+        :py:func:`close_services` is called (e.g., when the server shuts down).
+        """
+
+    def after_fork(self) -> None:
+        """
+        Replaces any resources that can't be shared with the process that the instance
+        was created in (connections, threads, etc.).
+
+        This gets called in each worker process after it is forked (see
+        :py:func:`after_fork`).  Don't close the resources; they still belong to the
+        parent process.
+        """
+
 
 def get_service[S: BaseService](service: typing.Type[S]) -> S:
     """
     Returns the specified service instance from the registry.
     """
-    return registry[service.provides]
+    return registry.get_instance(service)
+
+
+def start_services(
+    policy: InstantiationPolicy = InstantiationPolicy.lazy,
+) -> list[typing.Type[BaseService]]:
+    """
+    Checks the dependency graph for all registered services, so that misconfigured
+    services fail at startup rather than partway through a request.
+
+    :param policy: whether to also instantiate every service now (eager), or wait until
+        each service is first used (lazy).
+    :returns: the registered service classes, in dependency order.
+    :raises ServiceDependencyError: if any service has invalid or circular dependencies.
+    """
+    order = _registry.build_graph()
+
+    if policy == InstantiationPolicy.eager:
+        for service in order:
+            # Scoped services can't be created until their scope is active.
+            if service.lifetime == Lifetime.singleton:
+                get_service(service)
+
+    return order
+
+
+async def close_services() -> None:
+    """
+    Closes all singleton service instances, e.g., when the server shuts down.
+
+    First waits for task-scoped services that are still closing (they may depend on
+    singletons).
+
+    Services will be recreated the next time they are requested.
+
+    :raises ExceptionGroup: if any instances failed to close.
+    """
+    # Tasks schedule their done callbacks (which start closing their scopes) when they
+    # finish, so let any pending callbacks run first.
+    await asyncio.sleep(0)
+
+    loop = asyncio.get_running_loop()
+    closing = [task for task in _closing_tasks if task.get_loop() is loop]
+    results = await asyncio.gather(*closing, return_exceptions=True)
+    errors = [result for result in results if isinstance(result, Exception)]
+
+    try:
+        await registry.close()
+    except ExceptionGroup as e:
+        errors.extend(e.exceptions)
+
+    if errors:
+        raise ExceptionGroup("Failed to close services", errors)
+
+
+def after_fork() -> None:
+    """
+    Prepares singleton service instances for use in a forked process (e.g., a server
+    worker; see :py:class:`api.prefork.PreforkServer`).
+    """
+    registry.after_fork()
+
+
+@asynccontextmanager
+async def request_scope() -> typing.AsyncIterator[ServiceScope]:
+    """
+    Opens a scope for request-scoped services.  Instances are shared by everything
+    that runs inside the scope (including tasks that it spawns), and closed when the
+    scope ends::
+
+       async with request_scope():
+           ...
+    """
+    scope = ServiceScope(_registry)
+    token = _request_scope.set(scope)
+
+    try:
+        yield scope
+    finally:
+        _request_scope.reset(token)
+        await scope.close()
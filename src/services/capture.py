@@ -0,0 +1,161 @@
+"""
+Records API traffic, so that it can be replayed later (e.g., to benchmark a new build
+with a realistic mix of requests).
+"""
+__all__ = ["CaptureService", "CapturedRequest", "read_capture", "redact"]
+
+import os
+import typing
+from dataclasses import dataclass
+from pathlib import Path
+from random import random
+from typing import Self
+
+import orjson
+
+from services.base import BaseService
+from services.config import ConfigService
+
+# Fields whose values are removed from captured request bodies.
+REDACTED_FIELDS = frozenset({"password"})
+REDACTED = "[REDACTED]"
+
+
+@dataclass(slots=True)
+class CapturedRequest:
+    """
+    A request recorded by :py:class:`CaptureService`.
+    """
+
+    # When the request was received (seconds since the epoch).
+    time: float
+    method: str
+    # Path, including the query string (if any).
+    path: str
+    # Path template of the route that handled the request (e.g.,
+    # ``/v1/profile/{profile_id}``), if it matched one.
+    route: str | None
+    # JSON request body, or ``None`` if the request didn't have one.
+    body: typing.Any
+    status: int
+    # How long the request took to handle (seconds).
+    duration: float
+
+
+def redact(value: typing.Any) -> typing.Any:
+    """
+    Returns a copy of a JSON value, with sensitive fields (e.g., passwords) redacted.
+    """
+    if isinstance(value, dict):
+        return {
+            k: REDACTED if k in REDACTED_FIELDS else redact(v) for k, v in value.items()
+        }
+
+    if isinstance(value, list):
+        return [redact(v) for v in value]
+
+    return value
+
+
+def read_capture(path: Path) -> typing.Iterator[CapturedRequest]:
+    """
+    Reads requests from a capture file, in the order they were recorded.
+    """
+    with open(path, "rb") as f:
+        for line in f:
+            if line.strip():
+                yield CapturedRequest(**orjson.loads(line))
+
+
+class CaptureService(BaseService):
+    """
+    Appends a sample of API requests to a file, one JSON object per line (see
+    :py:class:`CapturedRequest`).
+
+    Capturing is enabled by setting the ``capture_file`` config value.
+    ``capture_sample_rate`` controls the fraction of requests that are recorded.
+
+    Request bodies are recorded with sensitive fields redacted (see :py:func:`redact`).
+    Response bodies are not recorded.
+
+    Each request is written with a single unbuffered write to a file opened in append
+    mode, so requests aren't lost if the process is killed, and processes that share
+    the file (e.g., prefork workers) don't interleave partial lines.
+    """
+
+    provides = "capture"
+
+    @classmethod
+    def factory(cls, config: ConfigService = None) -> Self:
+        return CaptureService(config)
+
+    def __init__(self, config: ConfigService):
+        super().__init__()
+
+        self.config = config
+        self._fd: int | None = None
+
+    @property
+    def enabled(self) -> bool:
+        return self.config.capture_file is not None
+
+    def should_capture(self) -> bool:
+        """
+        Decides whether to capture the next request, based on the sample rate.
+        """
+        return self.enabled and random() < self.config.capture_sample_rate
+
+    def record(
+        self,
+        *,
+        time: float,
+        method: str,
+        path: str,
+        route: str | None,
+        body: bytes,
+        status: int,
+        duration: float,
+    ) -> None:
+        """
+        Appends a request to the capture file.
+
+        :param body: the raw request body.  Bodies that aren't JSON are not recorded.
+        """
+        try:
+            data = redact(orjson.loads(body)) if body else None
+        except orjson.JSONDecodeError:
+            data = None
+
+        if self._fd is None:
+            capture_file = Path(self.config.capture_file)
+            capture_file.parent.mkdir(parents=True, exist_ok=True)
+            self._fd = os.open(
+                capture_file, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644
+            )
+
+        os.write(
+            self._fd,
+            orjson.dumps(
+                {
+                    "time": time,
+                    "method": method,
+                    "path": path,
+                    "route": route,
+                    "body": data,
+                    "status": status,
+                    "duration": duration,
+                }
+            )
+            + b"\n",
+        )
+
+    async def close(self) -> None:
+        if self._fd is not None:
+            os.close(self._fd)
+            self._fd = None
+
+    def after_fork(self) -> None:
+        # Each worker opens the file for itself.
+        if self._fd is not None:
+            os.close(self._fd)
+            self._fd = None
@@ -2,6 +2,8 @@ __all__ = ["ConfigService", "Env"]
 
 from enum import StrEnum, auto
 from os import getenv
+from pathlib import Path
+from tempfile import gettempdir
 from typing import Any, ClassVar, Self, TYPE_CHECKING
 
 from pydantic import BaseModel
@@ -43,6 +45,78 @@ class BaseConfig(BaseModel):
     db_database: str
     db_protocol: str
 
+    # Requests that take at least this many seconds to process are logged, along with
+    # details about the SQL statements that they executed.
+    slow_request_threshold: float = 1.0
+
+    # If a request executes the same SQL statement at least this many times, it is
+    # logged as a possible N+1 query.
+    repeated_query_threshold: int = 3
+
+    # Where to save profiles (see :py:class:`services.profiler.ProfilerService`).
+    profile_dir: Path = Path(gettempdir()) / "app-profiles"
+
+    # How often (in seconds) the sampling profiler captures the call stack.
+    profile_sample_interval: float = 0.001
+
+    # Clients must send this token to profile requests in production.  If not set,
+    # profiling is disabled in production.
+    profiler_token: str | None = None
+
+    # If set, a sample of API requests is appended to this file, so that they can be
+    # replayed later (see :py:class:`services.capture.CaptureService`).
+    capture_file: Path | None = None
+
+    # Fraction of requests to capture (between 0 and 1).
+    capture_sample_rate: float = 1.0
+
+    # If enabled, ``GET /v1/profile/{profile_id}`` builds the JSON response inside the
+    # database (see :py:meth:`services.profile.ProfileService.get_json_by_id`).
+    profile_json_from_db: bool = False
+
+    # If enabled, ``POST /v1/profile/{profile_id}/award`` saves awards from concurrent
+    # requests together, in one transaction (see
+    # :py:meth:`services.profile.ProfileService.queue_award`).
+    award_group_commit: bool = False
+
+    # Maximum time (in seconds) that an award waits for others to be saved with it.
+    award_group_commit_delay: float = 0.005
+
+    # Maximum number of awards to save in one transaction.
+    award_group_commit_size: int = 500
+
+    # Work factors for hashing passwords with scrypt (see
+    # :py:class:`services.credentials.CredentialService`): CPU/memory cost (as a power
+    # of 2), block size and parallelism.  The defaults are one of OWASP's recommended
+    # configurations, and use 16 MiB of memory (and ~0.3 s of CPU) per hash.
+    # :see: https://cheatsheetseries.owasp.org/cheatsheets/Password_Storage_Cheat_Sheet.html#scrypt
+    password_hash_cost: int = 14
+    password_hash_block_size: int = 8
+    password_hash_parallelism: int = 5
+
+    # Number of processes for hashing passwords.  If 0, passwords are hashed in threads
+    # instead (still off the event loop, but competing with the app for the CPU).
+    # Each server process has its own pool (e.g., every ``app-cli serve`` worker), so
+    # keep this small; the pools are only started once a password needs hashing.
+    password_hash_workers: int = 2
+
+    # Maximum number of passwords to send to a worker at once, when hashing many
+    # passwords (e.g., importing profiles).
+    password_hash_batch_size: int = 100
+
+    # How often (in seconds) to check how quickly the event loop responds (see
+    # :py:class:`services.loop_monitor.LoopMonitorService`).  Set to 0 to disable.
+    loop_monitor_interval: float = 0.1
+
+    # If the event loop is blocked for longer than this (in seconds), capture the call
+    # stack of the code that is blocking it.
+    loop_monitor_threshold: float = 0.1
+
+    # If enabled, time every step of every task, and log the ones that block the event
+    # loop for longer than ``loop_monitor_threshold``.  Adds overhead to every task, so
+    # only enable this while investigating.
+    loop_monitor_debug: bool = False
+
     @property
     def db_connection_string(self) -> str:
         """
@@ -110,6 +184,34 @@ class TestConfig(BaseSettings):
     env: ClassVar[Env] = Env.test
     db_connection_string: ClassVar[str] = "sqlite+aiosqlite://"
 
+    slow_request_threshold: ClassVar[float] = 1.0
+    repeated_query_threshold: ClassVar[int] = 3
+
+    profile_dir: ClassVar[Path] = Path(gettempdir()) / "app-profiles"
+    profile_sample_interval: ClassVar[float] = 0.001
+    profiler_token: ClassVar[str | None] = None
+
+    capture_file: ClassVar[Path | None] = None
+    capture_sample_rate: ClassVar[float] = 1.0
+
+    profile_json_from_db: ClassVar[bool] = False
+
+    award_group_commit: ClassVar[bool] = False
+    award_group_commit_delay: ClassVar[float] = 0.005
+    award_group_commit_size: ClassVar[int] = 500
+
+    # Cheap work factors, to keep tests fast.
+    password_hash_cost: ClassVar[int] = 4
+    password_hash_block_size: ClassVar[int] = 1
+    password_hash_parallelism: ClassVar[int] = 1
+    password_hash_workers: ClassVar[int] = 0
+    password_hash_batch_size: ClassVar[int] = 100
+
+    # Tests that need the monitor start it themselves.
+    loop_monitor_interval: ClassVar[float] = 0.0
+    loop_monitor_threshold: ClassVar[float] = 0.1
+    loop_monitor_debug: ClassVar[bool] = False
+
     is_production: ClassVar[bool] = False
     is_development: ClassVar[bool] = False
     is_test: ClassVar[bool] = True
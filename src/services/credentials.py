@@ -0,0 +1,274 @@
+"""
+Hashes and verifies passwords, without blocking the event loop.
+"""
+__all__ = ["CredentialService", "PasswordCheck", "WorkFactors", "is_password_hash"]
+
+import asyncio
+import hashlib
+import typing
+from base64 import b64decode, b64encode
+from concurrent.futures import Executor, ProcessPoolExecutor
+from dataclasses import dataclass
+from functools import partial
+from hmac import compare_digest
+from multiprocessing import get_context
+from os import urandom
+from typing import Self
+
+from services.base import BaseService
+from services.config import ConfigService
+
+# Prefix for hashes created by this module, in the same format as passlib (e.g.,
+# ``$scrypt$ln=14,r=8,p=5$<salt>$<hash>``).
+# :see: https://passlib.readthedocs.io/en/stable/lib/passlib.hash.scrypt.html
+SCHEME = "$scrypt$"
+
+SALT_SIZE = 16
+KEY_SIZE = 32
+
+
+@dataclass(slots=True, frozen=True)
+class WorkFactors:
+    """
+    Work factors for scrypt.
+
+    :see: https://cheatsheetseries.owasp.org/cheatsheets/Password_Storage_Cheat_Sheet.html#scrypt
+    """
+
+    # CPU/memory cost, as a power of 2 (scrypt's ``N`` is ``2 ** cost``).
+    cost: int
+    # Block size (``r``).
+    block_size: int
+    # Parallelism (``p``).
+    parallelism: int
+
+    @classmethod
+    def parse(cls, value: str) -> Self:
+        """
+        Parses work factors from a hash (e.g., ``ln=14,r=8,p=5``).
+        """
+        params = dict(param.split("=", 1) for param in value.split(","))
+        return cls(int(params["ln"]), int(params["r"]), int(params["p"]))
+
+    def __str__(self) -> str:
+        return f"ln={self.cost},r={self.block_size},p={self.parallelism}"
+
+    @property
+    def maxmem(self) -> int:
+        """
+        Memory needed to compute the hash (OpenSSL rejects anything over 32 MiB by
+        default), with a little extra to be safe.
+        """
+        return 128 * self.block_size * (2**self.cost + self.parallelism + 2) + 2**20
+
+
+@dataclass(slots=True, frozen=True)
+class PasswordCheck:
+    """
+    Result of :py:meth:`CredentialService.verify`.
+    """
+
+    ok: bool
+    # New hash to store instead, if the password is correct but was hashed with
+    # outdated work factors (or not hashed at all).
+    rehash: str | None = None
+
+
+def is_password_hash(value: str) -> bool:
+    """
+    :returns: whether a stored password was hashed by :py:class:`CredentialService`
+        (older profiles may still have plain text passwords).
+    """
+    return value.startswith(SCHEME)
+
+
+def _b64encode(data: bytes) -> str:
+    return b64encode(data).decode("ascii").rstrip("=")
+
+
+def _b64decode(data: str) -> bytes:
+    return b64decode(data + "=" * (-len(data) % 4))
+
+
+def _hash_batch(passwords: list[str], factors: WorkFactors) -> list[str]:
+    """
+    Hashes passwords (runs in a worker process).
+    """
+    hashes = []
+    for password in passwords:
+        salt = urandom(SALT_SIZE)
+        key = hashlib.scrypt(
+            password.encode(),
+            salt=salt,
+            n=2**factors.cost,
+            r=factors.block_size,
+            p=factors.parallelism,
+            maxmem=factors.maxmem,
+            dklen=KEY_SIZE,
+        )
+        hashes.append(f"{SCHEME}{factors}${_b64encode(salt)}${_b64encode(key)}")
+    return hashes
+
+
+def _verify(password: str, hashed: str) -> bool:
+    """
+    Checks a password against a hash (runs in a worker process).
+
+    Malformed hashes (e.g., corrupted in the database) never match.
+    """
+    try:
+        factors, salt, key = hashed.removeprefix(SCHEME).split("$")
+        factors = WorkFactors.parse(factors)
+        expected = _b64decode(key)
+
+        actual = hashlib.scrypt(
+            password.encode(),
+            salt=_b64decode(salt),
+            n=2**factors.cost,
+            r=factors.block_size,
+            p=factors.parallelism,
+            maxmem=factors.maxmem,
+            dklen=len(expected),
+        )
+    except (KeyError, ValueError):
+        return False
+
+    return compare_digest(actual, expected)
+
+
+class CredentialService(BaseService):
+    """
+    Hashes and verifies passwords using scrypt, which is deliberately slow and
+    memory-hard, to make stolen hashes expensive to crack.
+
+    With the default work factors, each hash takes around 0.3 seconds of CPU time,
+    which would stall every other request if it ran on the event loop, so hashes are
+    computed in a pool of worker processes instead (or threads, if
+    ``password_hash_workers`` is 0).
+
+    At most one job per worker is submitted to the pool at a time; the rest wait here,
+    so that requests that are cancelled while waiting (e.g., the client disconnected)
+    never reach the pool.
+    """
+
+    provides = "credentials"
+
+    @classmethod
+    def factory(cls, config: ConfigService = None) -> Self:
+        return CredentialService(
+            WorkFactors(
+                config.password_hash_cost,
+                config.password_hash_block_size,
+                config.password_hash_parallelism,
+            ),
+            workers=config.password_hash_workers,
+            batch_size=config.password_hash_batch_size,
+        )
+
+    def __init__(self, factors: WorkFactors, workers: int = 1, batch_size: int = 100):
+        """
+        :param factors: work factors for new hashes.
+        :param workers: number of worker processes (0 to use threads instead).
+        :param batch_size: maximum number of passwords to send to a worker at once
+            (see :py:meth:`hash_many`).
+        """
+        super().__init__()
+
+        self.factors = factors
+        self.workers = workers
+        self.batch_size = batch_size
+
+        self._executor: Executor | None = None
+        self._slots = asyncio.Semaphore(workers or 1)
+
+    async def hash(self, password: str) -> str:
+        """
+        Hashes a password, using the current work factors.
+        """
+        (hashed,) = await self._submit(_hash_batch, [password], self.factors)
+        return hashed
+
+    async def hash_many(self, passwords: typing.Sequence[str]) -> list[str]:
+        """
+        Hashes many passwords (e.g., when importing profiles).
+
+        Passwords are sent to the workers in batches, which is much cheaper than
+        submitting them one at a time, and the batches are spread out so that every
+        worker has something to do.
+
+        :returns: the hashes, in the same order as ``passwords``.
+        """
+        if not passwords:
+            return []
+
+        size = min(self.batch_size, -(-len(passwords) // (self.workers or 1)))
+        batches = await asyncio.gather(
+            *(
+                self._submit(_hash_batch, list(passwords[i : i + size]), self.factors)
+                for i in range(0, len(passwords), size)
+            )
+        )
+        return [hashed for batch in batches for hashed in batch]
+
+    async def verify(self, password: str, hashed: str) -> PasswordCheck:
+        """
+        Checks a password against a stored hash.
+
+        If the password is correct, but the hash uses different work factors than the
+        current ones (or the stored password isn't hashed at all), then the result
+        includes a new hash; store it, to upgrade the old one.
+        """
+        if not is_password_hash(hashed):
+            if not compare_digest(password.encode(), hashed.encode()):
+                return PasswordCheck(False)
+            return PasswordCheck(True, await self.hash(password))
+
+        if not await self._submit(_verify, password, hashed):
+            return PasswordCheck(False)
+
+        if self.needs_rehash(hashed):
+            return PasswordCheck(True, await self.hash(password))
+
+        return PasswordCheck(True)
+
+    def needs_rehash(self, hashed: str) -> bool:
+        """
+        :returns: whether a stored password should be hashed again, because it isn't
+            hashed, or was hashed with different work factors.
+        """
+        if not is_password_hash(hashed):
+            return True
+
+        factors = hashed.removeprefix(SCHEME).split("$", 1)[0]
+        return WorkFactors.parse(factors) != self.factors
+
+    async def close(self) -> None:
+        if self._executor:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    def after_fork(self) -> None:
+        # The parent's worker processes can't be used from a forked process.
+        self._executor = None
+        self._slots = asyncio.Semaphore(self.workers or 1)
+
+    async def _submit[T](self, fn: typing.Callable[..., T], *args) -> T:
+        async with self._slots:
+            return await asyncio.get_running_loop().run_in_executor(
+                self._get_executor(), partial(fn, *args)
+            )
+
+    def _get_executor(self) -> Executor | None:
+        """
+        Starts the worker processes the first time they are needed.
+
+        :returns: the pool, or ``None`` to use the event loop's default thread pool.
+        """
+        if self.workers and not self._executor:
+            # Forking a process that is running an event loop (and holding database
+            # connections) isn't safe, so fork workers from a clean server process.
+            self._executor = ProcessPoolExecutor(
+                self.workers, mp_context=get_context("forkserver")
+            )
+
+        return self._executor
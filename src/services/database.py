@@ -1,8 +1,14 @@
-__all__ = ["DatabaseService"]
+__all__ = ["DatabaseService", "QueryStats"]
 
+import typing
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
 from functools import cached_property
+from time import perf_counter
 from typing import Self
 
+from sqlalchemy import event
 from sqlalchemy.ext.asyncio import (
     AsyncEngine,
     AsyncSession,
@@ -14,6 +20,55 @@ from services.base import BaseService
 from services.config import ConfigService
 
 
+class QueryStats:
+    """
+    Keeps track of the SQL statements executed during a request (or any other block of
+    code; see :py:meth:`DatabaseService.track_queries`).
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.total_time = 0.0
+        self.slowest_time = 0.0
+        self.slowest_statement: str | None = None
+
+        # Number of times each distinct statement was executed.  Note that parameters
+        # are not included, so (e.g.) loading awards for 50 different profiles one at
+        # a time counts as 50 executions of the same statement.
+        self.statement_counts: Counter[str] = Counter()
+
+    def record(self, statement: str, elapsed: float) -> None:
+        """
+        Records an executed statement.
+
+        :param statement: the SQL statement.
+        :param elapsed: how long the statement took to execute (seconds).
+        """
+        self.count += 1
+        self.total_time += elapsed
+        self.statement_counts[statement] += 1
+
+        if elapsed >= self.slowest_time:
+            self.slowest_time = elapsed
+            self.slowest_statement = statement
+
+    def repeated(self, min_count: int = 2) -> dict[str, int]:
+        """
+        Returns statements that were executed at least ``min_count`` times, which
+        usually indicates an N+1 query (e.g., lazy-loading a relationship in a loop).
+        """
+        return {
+            statement: count
+            for statement, count in self.statement_counts.items()
+            if count >= min_count
+        }
+
+
+# Stats for the request (or other block of code) that is currently running; see
+# :py:meth:`DatabaseService.track_queries`.
+_query_stats: ContextVar[QueryStats | None] = ContextVar("query_stats", default=None)
+
+
 class DatabaseService(BaseService):
     """
     Provides methods to interact with the database at a low-ish level.
@@ -24,6 +79,10 @@ class DatabaseService(BaseService):
     def __init__(self, config: ConfigService):
         self.config = config
 
+        # Stats that record every statement executed by the engine, regardless of
+        # which request executed it; see :py:meth:`collect_queries`.
+        self._collectors: list[QueryStats] = []
+
     @classmethod
     def factory(cls, config: ConfigService = None) -> Self:
         """
@@ -47,13 +106,77 @@ class DatabaseService(BaseService):
         session.sync_session.expire_on_commit = expire_on_commit
         return session
 
+    @contextmanager
+    def track_queries(self) -> typing.Iterator[QueryStats]:
+        """
+        Records the SQL statements executed inside the block, by the current task (and
+        any tasks it spawns)::
+
+           with db.track_queries() as stats:
+               ...
+
+           print(stats.count, stats.total_time)
+        """
+        stats = QueryStats()
+        token = _query_stats.set(stats)
+
+        try:
+            yield stats
+        finally:
+            _query_stats.reset(token)
+
+    @contextmanager
+    def collect_queries(self) -> typing.Iterator[QueryStats]:
+        """
+        Records every SQL statement that the engine executes inside the block, no
+        matter which task or thread executes it.
+
+        This is mostly useful for tests, where the code under test might be running in
+        a different thread (e.g., requests sent via FastAPI's ``TestClient``).
+        """
+        stats = QueryStats()
+        self._collectors.append(stats)
+
+        try:
+            yield stats
+        finally:
+            self._collectors.remove(stats)
+
+    async def close(self) -> None:
+        """
+        Closes all connections in the engine's connection pool.
+        """
+        # Avoid creating an engine just so that we can dispose of it.
+        if "engine" in self.__dict__:
+            await self.engine.dispose()
+
+    def after_fork(self) -> None:
+        """
+        Discards the engine, so that the forked process creates its own (with its own
+        connection pool).
+        """
+        if "engine" in self.__dict__:
+            # Don't close connections in the pool; they belong to the parent process.
+            # :see: https://docs.sqlalchemy.org/en/20/core/pooling.html#using-connection-pools-with-multiprocessing-or-os-fork
+            self.engine.sync_engine.dispose(close=False)
+
+            del self.__dict__["engine"]
+            self.__dict__.pop("session_factory", None)
+
     @cached_property
     def engine(self) -> AsyncEngine:
         """
         Returns the engine, used internally by SQLAlchemy to establish database
         connections.
         """
-        return create_async_engine(self.config.db_connection_string)
+        engine = create_async_engine(self.config.db_connection_string)
+
+        # Time each statement, so that we can report on them.
+        # :see: https://docs.sqlalchemy.org/en/20/faq/performance.html#query-profiling
+        event.listen(engine.sync_engine, "before_cursor_execute", _start_timer)
+        event.listen(engine.sync_engine, "after_cursor_execute", self._record_query)
+
+        return engine
 
     @cached_property
     def session_factory(self) -> async_sessionmaker:
@@ -62,3 +185,21 @@ class DatabaseService(BaseService):
         designed for ORM operations).
         """
         return async_sessionmaker(self.engine)
+
+    def _record_query(self, conn, cursor, statement, parameters, context, executemany):
+        stats = _query_stats.get()
+
+        if stats is None and not self._collectors:
+            return
+
+        elapsed = perf_counter() - context.query_start_time
+
+        if stats is not None:
+            stats.record(statement, elapsed)
+
+        for collector in self._collectors:
+            collector.record(statement, elapsed)
+
+
+def _start_timer(conn, cursor, statement, parameters, context, executemany):
+    context.query_start_time = perf_counter()
@@ -0,0 +1,343 @@
+"""
+Measures how quickly the event loop responds, and finds out what is blocking it.
+"""
+__all__ = ["BlockedLoop", "LoopMonitorService", "current_request"]
+
+import asyncio
+import logging
+import sys
+import threading
+import traceback
+import typing
+from collections import deque
+from collections.abc import Coroutine
+from contextlib import suppress
+from contextvars import ContextVar
+from dataclasses import dataclass
+from time import monotonic, perf_counter
+from typing import Self
+
+from services.base import BaseService
+from services.config import ConfigService
+from services.metrics import MetricsService
+
+logger = logging.getLogger(__name__)
+
+# ASGI scope of the request that the current task is handling, if any (set by
+# :py:class:`api.middleware.LoopMonitorMiddleware`).
+current_request: ContextVar[typing.Mapping[str, typing.Any] | None] = ContextVar(
+    "current_request", default=None
+)
+
+# Route labels for work that isn't part of a request (e.g., background tasks), and for
+# requests that didn't match any route.
+NO_ROUTE = "<none>"
+UNMATCHED_ROUTE = "<unmatched>"
+
+# Number of blocked loops to keep in :py:attr:`LoopMonitorService.blocked`.
+MAX_BLOCKED = 100
+
+# Buckets for the lag histogram.  Lag is usually well under a millisecond, so the
+# default (request latency) buckets are too coarse.
+LAG_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+
+
+@dataclass(slots=True)
+class BlockedLoop:
+    """
+    A time that the event loop was blocked for longer than the threshold.
+    """
+
+    # How long (in seconds) the loop was blocked for.
+    duration: float
+    # Route of the request that was blocking the loop (see :py:func:`_route_label`).
+    route: str
+    # Name of the task that was blocking the loop, if it was running in a task.
+    task: str | None
+    # Call stack of the code that was blocking the loop, captured while it was running.
+    stack: list[str]
+
+
+def _route_label(scope: typing.Mapping[str, typing.Any] | None) -> str:
+    """
+    :returns: the route (path template) of a request, for labelling metrics and logs.
+    """
+    if scope is None:
+        return NO_ROUTE
+
+    # The router adds the matched route to the scope.
+    route = scope.get("route")
+    return route.path if route else UNMATCHED_ROUTE
+
+
+class _TimedCoroutine(Coroutine):
+    """
+    Wraps a task's coroutine, to time each step that it runs on the event loop (see
+    :py:meth:`LoopMonitorService._task_factory`).
+    """
+
+    __slots__ = ("_coro", "_monitor")
+
+    def __init__(self, coro: typing.Coroutine, monitor: "LoopMonitorService"):
+        self._coro = coro
+        self._monitor = monitor
+
+    def send(self, value: typing.Any) -> typing.Any:
+        start = perf_counter()
+        try:
+            return self._coro.send(value)
+        finally:
+            self._monitor._check_step(self._coro, perf_counter() - start)
+
+    def throw(self, *args) -> typing.Any:
+        start = perf_counter()
+        try:
+            return self._coro.throw(*args)
+        finally:
+            self._monitor._check_step(self._coro, perf_counter() - start)
+
+    def close(self) -> None:
+        self._coro.close()
+
+    def __await__(self) -> typing.Iterator:
+        return self
+
+    def __iter__(self) -> typing.Iterator:
+        return self
+
+    def __next__(self) -> typing.Any:
+        return self.send(None)
+
+    def __getattr__(self, name: str) -> typing.Any:
+        # ``cr_frame``, ``cr_running``, etc. (used by :py:mod:`inspect`, anyio, ...).
+        return getattr(self._coro, name)
+
+    def __repr__(self) -> str:
+        return repr(self._coro)
+
+
+class LoopMonitorService(BaseService):
+    """
+    Monitors the event loop, to find code that blocks it (and stalls every other request
+    in the meantime).
+
+    - A heartbeat task wakes up every ``loop_monitor_interval`` seconds, and records how
+      late it was (the loop's lag) in the ``event_loop_lag_seconds`` histogram.
+    - A watchdog thread checks that the heartbeat keeps running.  If the loop is
+      blocked for longer than ``loop_monitor_threshold``, it captures the call stack of
+      the code that is blocking it, which is logged (along with the route of the
+      request it belongs to) and kept in :py:attr:`blocked` once the loop recovers.
+
+    In debug mode (``loop_monitor_debug``), every step of every task is timed, and any
+    step that takes longer than ``loop_monitor_threshold`` is logged with the route of
+    its request, even if the watchdog doesn't catch it.  This adds overhead to every
+    task, so it isn't meant for production.
+    """
+
+    provides = "loop_monitor"
+
+    @classmethod
+    def factory(
+        cls, config: ConfigService = None, metrics: MetricsService = None
+    ) -> Self:
+        return LoopMonitorService(
+            metrics,
+            interval=config.loop_monitor_interval,
+            threshold=config.loop_monitor_threshold,
+            debug=config.loop_monitor_debug,
+        )
+
+    def __init__(
+        self,
+        metrics: MetricsService,
+        interval: float = 0.1,
+        threshold: float = 0.1,
+        debug: bool = False,
+    ):
+        """
+        :param interval: time between heartbeats (seconds; 0 to disable monitoring).
+        :param threshold: capture the call stack if the loop is blocked for longer than
+            this (seconds).
+        :param debug: whether to time every step of every task.
+        """
+        super().__init__()
+
+        self.interval = interval
+        self.threshold = threshold
+        self.debug = debug
+
+        # Recent times that the loop was blocked, oldest first.
+        self.blocked: deque[BlockedLoop] = deque(maxlen=MAX_BLOCKED)
+
+        self.lag = metrics.histogram(
+            "event_loop_lag_seconds",
+            "Time that the event loop took to run a scheduled callback",
+            buckets=LAG_BUCKETS,
+        )
+        self.blocked_total = metrics.counter(
+            "event_loop_blocked_total",
+            "Number of times the event loop was blocked for longer than the threshold",
+            labels=["route"],
+        )
+        self.slow_steps = metrics.counter(
+            "event_loop_slow_steps_total",
+            "Number of task steps that took longer than the threshold (debug mode)",
+            labels=["route"],
+        )
+
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._loop_thread: int | None = None
+        self._heartbeat: asyncio.Task | None = None
+        self._watchdog: threading.Thread | None = None
+        self._stop = threading.Event()
+        self._previous_factory: typing.Callable | None = None
+
+        # Time of the last heartbeat (written by the heartbeat), and the blocked loop
+        # that the watchdog captured since then, if any (written by the watchdog thread,
+        # and reported by the heartbeat once the loop recovers).
+        self._last_beat = 0.0
+        self._captured: BlockedLoop | None = None
+
+    @property
+    def running(self) -> bool:
+        return self._heartbeat is not None
+
+    def start(self) -> None:
+        """
+        Starts monitoring the running event loop.
+        """
+        if self.running or not self.interval:
+            return
+
+        self._loop = asyncio.get_running_loop()
+        self._loop_thread = threading.get_ident()
+        self._last_beat = monotonic()
+        self._captured = None
+
+        if self.debug:
+            self._previous_factory = self._loop.get_task_factory()
+            self._loop.set_task_factory(self._task_factory)
+
+        self._heartbeat = self._loop.create_task(
+            self._beat(), name="loop-monitor-heartbeat"
+        )
+
+        self._stop.clear()
+        self._watchdog = threading.Thread(
+            target=self._watch, name="loop-monitor-watchdog", daemon=True
+        )
+        self._watchdog.start()
+
+    async def close(self) -> None:
+        if not self.running:
+            return
+
+        self._stop.set()
+        self._watchdog.join()
+        self._watchdog = None
+
+        heartbeat, self._heartbeat = self._heartbeat, None
+        heartbeat.cancel()
+        if heartbeat.get_loop() is asyncio.get_running_loop():
+            with suppress(asyncio.CancelledError):
+                await heartbeat
+
+        if self.debug and self._loop.get_task_factory() == self._task_factory:
+            self._loop.set_task_factory(self._previous_factory)
+
+        self._loop = None
+
+    def after_fork(self) -> None:
+        # Threads don't survive a fork; each worker starts its own monitor.
+        self._heartbeat = None
+        self._watchdog = None
+        self._loop = None
+
+    async def _beat(self) -> None:
+        """
+        Measures the loop's lag, and reports any blocked loop that the watchdog
+        captured.
+        """
+        while True:
+            self._last_beat = monotonic()
+            expected = self._last_beat + self.interval
+
+            await asyncio.sleep(self.interval)
+            lag = max(0.0, monotonic() - expected)
+            self.lag.observe(lag)
+
+            captured, self._captured = self._captured, None
+            if captured:
+                # The watchdog only saw the start of it.
+                captured.duration = lag
+                self._report(captured)
+
+    def _watch(self) -> None:
+        """
+        Runs in the watchdog thread, and captures the call stack of the event loop's
+        thread if the heartbeat is late.
+        """
+        last_captured = None
+
+        while not self._stop.wait(min(self.interval, self.threshold) / 2):
+            last_beat = self._last_beat
+            blocked_for = monotonic() - last_beat - self.interval
+
+            # Only capture each blocked loop once.
+            if blocked_for <= self.threshold or last_beat == last_captured:
+                continue
+
+            frame = sys._current_frames().get(self._loop_thread)
+            if frame is None:
+                continue
+
+            task = asyncio.current_task(self._loop)
+            scope = task.get_context().get(current_request) if task else None
+
+            self._captured = BlockedLoop(
+                duration=blocked_for,
+                route=_route_label(scope),
+                task=task.get_name() if task else None,
+                stack=traceback.format_stack(frame),
+            )
+            last_captured = last_beat
+
+    def _report(self, blocked: BlockedLoop) -> None:
+        self.blocked.append(blocked)
+        self.blocked_total.labels(blocked.route).inc()
+
+        logger.warning(
+            "Event loop blocked for %.3fs by %s (task %s); stack while blocked:\n%s",
+            blocked.duration,
+            blocked.route,
+            blocked.task,
+            "".join(blocked.stack),
+        )
+
+    def _task_factory(
+        self, loop: asyncio.AbstractEventLoop, coro: typing.Coroutine, **kwargs
+    ) -> asyncio.Future:
+        """
+        Creates tasks whose steps are timed (debug mode).
+        """
+        if self._previous_factory:
+            return self._previous_factory(loop, _TimedCoroutine(coro, self), **kwargs)
+
+        return asyncio.Task(_TimedCoroutine(coro, self), loop=loop, **kwargs)
+
+    def _check_step(self, coro: typing.Coroutine, elapsed: float) -> None:
+        """
+        Logs a task step that blocked the loop for too long (debug mode).
+        """
+        if elapsed <= self.threshold:
+            return
+
+        route = _route_label(current_request.get())
+        self.slow_steps.labels(route).inc()
+
+        logger.warning(
+            "Slow callback: %s blocked the event loop for %.3fs in %s",
+            route,
+            elapsed,
+            getattr(coro, "__qualname__", coro),
+        )
@@ -0,0 +1,400 @@
+__all__ = ["Counter", "Gauge", "Histogram", "MetricsService"]
+
+import typing
+from bisect import bisect_left
+from math import inf
+from typing import Self
+
+from services.base import BaseService
+from services.database import DatabaseService
+
+# Default histogram buckets (in seconds), suitable for measuring request latency.
+# :see: https://prometheus.io/docs/practices/histograms/
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _escape(value: str) -> str:
+    """
+    Escapes a label value for the Prometheus text format.
+
+    :see: https://prometheus.io/docs/instrumenting/exposition_formats/#text-format-details
+    """
+    return value.replace("\\", r"\\").replace('"', r"\"").replace("\n", r"\n")
+
+
+def _format_labels(names: typing.Sequence[str], values: typing.Sequence[str]) -> str:
+    if not names:
+        return ""
+
+    return (
+        "{"
+        + ",".join(
+            f'{name}="{_escape(str(value))}"' for name, value in zip(names, values)
+        )
+        + "}"
+    )
+
+
+class _CounterValue:
+    __slots__ = ("value",)
+
+    def __init__(self):
+        self.value = 0.0
+
+    def inc(self, amount: float = 1.0) -> None:
+        self.value += amount
+
+
+class _GaugeValue(_CounterValue):
+    __slots__ = ()
+
+    def dec(self, amount: float = 1.0) -> None:
+        self.value -= amount
+
+    def set(self, value: float) -> None:
+        self.value = value
+
+
+class _HistogramValue:
+    __slots__ = ("bounds", "counts", "count", "sum")
+
+    def __init__(self, bounds: tuple[float, ...]):
+        self.bounds = bounds
+
+        # Per-bucket (i.e., non-cumulative) counts; the last slot is for ``+Inf``.
+        self.counts = [0] * (len(bounds) + 1)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.count += 1
+        self.sum += value
+
+
+class _Metric:
+    """
+    Base class for metrics.
+
+    Each combination of label values gets its own child, which holds the actual
+    value(s).  Look up the child once (see :py:meth:`labels`) and keep hold of it, so
+    that recording a value is just an attribute update.
+
+    .. note::
+
+       Metrics don't use locks, as they are designed to be updated from the event
+       loop.  Updates made from other threads may occasionally be lost.
+    """
+
+    type_name: typing.ClassVar[str]
+
+    def __init__(self, name: str, help: str, labels: typing.Sequence[str] = ()):
+        self.name = name
+        self.help = help
+        self.label_names = tuple(labels)
+
+        self._children: dict[tuple[str, ...], typing.Any] = {}
+
+    def labels(self, *values: str) -> typing.Any:
+        """
+        Returns the child for the specified label values, creating it if necessary.
+        """
+        try:
+            return self._children[values]
+        except KeyError:
+            if len(values) != len(self.label_names):
+                raise ValueError(
+                    f"{self.name} expects labels {self.label_names}, got {values}"
+                )
+
+            child = self._children[values] = self._create_child()
+            return child
+
+    def render(self) -> typing.Iterator[str]:
+        """
+        Generates lines describing the metric in Prometheus text format.
+        """
+        yield f"# HELP {self.name} {self.help}"
+        yield f"# TYPE {self.name} {self.type_name}"
+
+        for values, child in self._children.items():
+            yield from self._render_child(
+                _format_labels(self.label_names, values), child
+            )
+
+    def _create_child(self) -> typing.Any:
+        raise NotImplementedError()
+
+    def _render_child(self, labels: str, child: typing.Any) -> typing.Iterator[str]:
+        yield f"{self.name}{labels} {child.value}"
+
+
+class Counter(_Metric):
+    """
+    A value that only goes up (e.g., number of requests served).
+    """
+
+    type_name = "counter"
+
+    def _create_child(self) -> _CounterValue:
+        return _CounterValue()
+
+    def inc(self, amount: float = 1.0) -> None:
+        """
+        Shortcut for incrementing a counter that has no labels.
+        """
+        self.labels().inc(amount)
+
+
+class Gauge(_Metric):
+    """
+    A value that can go up and down (e.g., number of requests in flight).
+
+    If ``callback`` is provided, the gauge's value is read from it each time metrics
+    are rendered instead (return ``None`` to omit the value).
+    """
+
+    type_name = "gauge"
+
+    def __init__(
+        self,
+        name: str,
+        help: str,
+        labels: typing.Sequence[str] = (),
+        callback: typing.Callable[[], float | None] | None = None,
+    ):
+        super().__init__(name, help, labels)
+
+        self.callback = callback
+
+    def _create_child(self) -> _GaugeValue:
+        return _GaugeValue()
+
+    def inc(self, amount: float = 1.0) -> None:
+        """
+        Shortcut for incrementing a gauge that has no labels.
+        """
+        self.labels().inc(amount)
+
+    def dec(self, amount: float = 1.0) -> None:
+        """
+        Shortcut for decrementing a gauge that has no labels.
+        """
+        self.labels().dec(amount)
+
+    def set(self, value: float) -> None:
+        """
+        Shortcut for setting the value of a gauge that has no labels.
+        """
+        self.labels().set(value)
+
+    def render(self) -> typing.Iterator[str]:
+        if self.callback is None:
+            yield from super().render()
+            return
+
+        value = self.callback()
+        if value is not None:
+            yield f"# HELP {self.name} {self.help}"
+            yield f"# TYPE {self.name} {self.type_name}"
+            yield f"{self.name} {value}"
+
+
+class Histogram(_Metric):
+    """
+    Counts observed values in buckets (e.g., request latency).
+    """
+
+    type_name = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        help: str,
+        labels: typing.Sequence[str] = (),
+        buckets: typing.Sequence[float] = DEFAULT_BUCKETS,
+    ):
+        super().__init__(name, help, labels)
+
+        self.buckets = tuple(sorted(buckets))
+
+    def _create_child(self) -> _HistogramValue:
+        return _HistogramValue(self.buckets)
+
+    def observe(self, value: float) -> None:
+        """
+        Shortcut for observing a value for a histogram that has no labels.
+        """
+        self.labels().observe(value)
+
+    def _render_child(
+        self, labels: str, child: _HistogramValue
+    ) -> typing.Iterator[str]:
+        # Bucket counts are cumulative in the text format.
+        cumulative = 0
+        for bound, count in zip((*self.buckets, inf), child.counts):
+            cumulative += count
+            le = "+Inf" if bound == inf else repr(bound)
+            bucket_labels = f'{labels[:-1]},le="{le}"}}' if labels else f'{{le="{le}"}}'
+            yield f"{self.name}_bucket{bucket_labels} {cumulative}"
+
+        yield f"{self.name}_sum{labels} {child.sum}"
+        yield f"{self.name}_count{labels} {child.count}"
+
+
+class MetricsService(BaseService):
+    """
+    Collects application metrics, and renders them in Prometheus text format.
+
+    Other services can register their own metrics, e.g.::
+
+       awards_bestowed = metrics.counter(
+           "awards_bestowed_total", "Number of awards bestowed", labels=["title"]
+       )
+       awards_bestowed.labels(award.title).inc()
+
+    :see: https://prometheus.io/docs/instrumenting/exposition_formats/
+    """
+
+    provides = "metrics"
+
+    @classmethod
+    def factory(cls, db: DatabaseService = None) -> Self:
+        return MetricsService(db)
+
+    def __init__(self, db: DatabaseService):
+        super().__init__()
+
+        self.db: DatabaseService = db
+        self.metrics: dict[str, _Metric] = {}
+
+        # HTTP metrics, recorded by :py:class:`api.middleware.MetricsMiddleware`.
+        self.http_requests = self.counter(
+            "http_requests_total",
+            "Number of HTTP requests handled",
+            labels=["method", "route", "status"],
+        )
+        self.http_request_duration = self.histogram(
+            "http_request_duration_seconds",
+            "Time taken to handle HTTP requests",
+            labels=["method", "route"],
+        )
+        self.http_requests_in_flight = self.gauge(
+            "http_requests_in_flight", "Number of HTTP requests being handled"
+        )
+
+        # Children of the HTTP metrics, cached by method, route and status (see
+        # :py:meth:`record_request`).
+        self.http_in_flight = self.http_requests_in_flight.labels()
+        self._http_children: dict[
+            str, dict[str, dict[int, tuple[_CounterValue, _HistogramValue]]]
+        ] = {}
+
+        # Database connection pool metrics.
+        # Not every pool implementation keeps track of these (e.g., SQLite in-memory
+        # databases use a single static connection), so they are omitted if the pool
+        # doesn't support them.
+        for name, method, help in (
+            ("db_pool_size", "size", "Configured size of the DB connection pool"),
+            ("db_pool_checked_in", "checkedin", "Idle connections in the DB pool"),
+            ("db_pool_checked_out", "checkedout", "DB connections currently in use"),
+            ("db_pool_overflow", "overflow", "DB connections opened beyond pool size"),
+        ):
+            self.gauge(name, help, callback=self._pool_stat(method))
+
+    def record_request(
+        self, method: str, route: str, status: int, duration: float
+    ) -> None:
+        """
+        Records an HTTP request (see :py:class:`api.middleware.MetricsMiddleware`).
+
+        The metrics' children for each combination of method, route and status are
+        looked up once, then cached, so that recording a request doesn't build label
+        tuples or status strings; it's just a few dict lookups and attribute updates.
+        """
+        try:
+            requests, request_duration = self._http_children[method][route][status]
+        except KeyError:
+            requests, request_duration = self._http_children.setdefault(
+                method, {}
+            ).setdefault(route, {})[status] = (
+                self.http_requests.labels(method, route, str(status)),
+                self.http_request_duration.labels(method, route),
+            )
+
+        requests.inc()
+        request_duration.observe(duration)
+
+    def counter(
+        self, name: str, help: str, labels: typing.Sequence[str] = ()
+    ) -> Counter:
+        """
+        Registers a counter, or returns the existing one if it is already registered.
+        """
+        return self._register(Counter, name, help, labels)
+
+    def gauge(
+        self,
+        name: str,
+        help: str,
+        labels: typing.Sequence[str] = (),
+        callback: typing.Callable[[], float | None] | None = None,
+    ) -> Gauge:
+        """
+        Registers a gauge, or returns the existing one if it is already registered.
+        """
+        return self._register(Gauge, name, help, labels, callback=callback)
+
+    def histogram(
+        self,
+        name: str,
+        help: str,
+        labels: typing.Sequence[str] = (),
+        buckets: typing.Sequence[float] = DEFAULT_BUCKETS,
+    ) -> Histogram:
+        """
+        Registers a histogram, or returns the existing one if it is already registered.
+        """
+        return self._register(Histogram, name, help, labels, buckets=buckets)
+
+    def render(self) -> str:
+        """
+        Renders all metrics in Prometheus text format.
+        """
+        return (
+            "\n".join(
+                line for metric in self.metrics.values() for line in metric.render()
+            )
+            + "\n"
+        )
+
+    def _register[
+        M: _Metric
+    ](
+        self,
+        type_: typing.Type[M],
+        name: str,
+        help: str,
+        labels: typing.Sequence[str],
+        **kwargs: typing.Any,
+    ) -> M:
+        existing = self.metrics.get(name)
+
+        if existing is not None:
+            if type(existing) is not type_ or existing.label_names != tuple(labels):
+                raise ValueError(
+                    f"Metric {name} is already registered as a {existing.type_name} "
+                    f"with labels {existing.label_names}"
+                )
+
+            return existing
+
+        metric = self.metrics[name] = type_(name, help, labels, **kwargs)
+        return metric
+
+    def _pool_stat(self, method: str) -> typing.Callable[[], float | None]:
+        def callback() -> float | None:
+            stat = getattr(self.db.engine.pool, method, None)
+            return stat() if callable(stat) else None
+
+        return callback
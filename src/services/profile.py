@@ -1,14 +1,41 @@
-__all__ = ["EditAwardRequest", "EditProfileRequest", "ProfileService"]
+__all__ = [
+    "AwardRecord",
+    "EditAwardRequest",
+    "EditProfileRequest",
+    "ProfileRecord",
+    "ProfileService",
+    "profile_json_query",
+]
 
-from typing import Iterable, Sequence
+import asyncio
+from dataclasses import asdict, dataclass, fields
+from datetime import datetime
+from itertools import chain
+from typing import Any, AsyncIterator, Iterable, Mapping, Self, Sequence
 
+import orjson
 from pydantic import BaseModel
-from sqlalchemy import select
+from sqlalchemy import (
+    ColumnElement,
+    Row,
+    Select,
+    Text,
+    case,
+    cast,
+    func,
+    insert,
+    literal_column,
+    select,
+)
+from sqlalchemy.dialects import postgresql, sqlite
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from models import Award
 from models.profile import Profile
 from models.service import BaseOrmService
+from services import ConfigService, CredentialService, DatabaseService
+from services.credentials import is_password_hash
+from services.metrics import MetricsService
 
 
 class EditAwardRequest(BaseModel):
@@ -32,6 +59,68 @@ class EditProfileRequest(BaseModel):
     email: str
 
 
+@dataclass(slots=True, frozen=True)
+class AwardRecord:
+    """
+    Read-only award, loaded without the ORM (see :py:meth:`ProfileService.read_profiles`).
+    """
+
+    id: int
+    title: str
+    created_at: datetime
+    profile_id: int
+
+
+@dataclass(slots=True, frozen=True)
+class ProfileRecord:
+    """
+    Read-only profile, loaded without the ORM (see :py:meth:`ProfileService.read_profiles`).
+
+    Much cheaper to create than a :py:class:`Profile` (no instance state, identity map,
+    etc.), and serialises to the same JSON as :py:func:`model_encoder`.
+    """
+
+    id: int
+    username: str
+    password: str
+    gender: str
+    full_name: str
+    street_address: str
+    email: str
+    # ``None`` if awards weren't loaded.
+    awards: tuple[AwardRecord, ...] | None = None
+
+    @classmethod
+    def from_row(cls, row: Row, awards: Sequence[AwardRecord] | None = None) -> Self:
+        return cls(*row, awards=None if awards is None else tuple(awards))
+
+    def to_dict(self) -> dict[str, Any]:
+        """
+        Converts the record into a dict (omitting ``awards`` if they weren't loaded).
+        """
+        data = asdict(self)
+        if self.awards is None:
+            del data["awards"]
+        return data
+
+    def to_json(self) -> bytes:
+        """
+        Serialises the record to JSON.
+        """
+        # orjson serialises dataclasses natively, which is much faster than
+        # converting to a dict first.
+        if self.awards is None:
+            return orjson.dumps(self.to_dict())
+        return orjson.dumps(self)
+
+
+# Columns to select for each type of record, in the same order as its fields.
+_award_columns = [Award.__table__.c[f.name] for f in fields(AwardRecord)]
+_profile_columns = [
+    Profile.__table__.c[f.name] for f in fields(ProfileRecord) if f.name != "awards"
+]
+
+
 class ProfileService(BaseOrmService):
     """
     Use cases for working with profiles.
@@ -39,6 +128,69 @@ class ProfileService(BaseOrmService):
 
     provides = "profile"
 
+    @classmethod
+    def factory(
+        cls,
+        database: DatabaseService = None,
+        credentials: CredentialService = None,
+        metrics: MetricsService = None,
+        config: ConfigService = None,
+    ) -> Self:
+        return cls(
+            database,
+            credentials,
+            metrics,
+            group_commit_delay=config.award_group_commit_delay,
+            group_commit_size=config.award_group_commit_size,
+        )
+
+    def __init__(
+        self,
+        db: DatabaseService,
+        credentials: CredentialService,
+        metrics: MetricsService,
+        group_commit_delay: float = 0.005,
+        group_commit_size: int = 500,
+    ):
+        """
+        :param group_commit_delay: maximum time (in seconds) that
+            :py:meth:`queue_award` waits for other awards to save with.
+        :param group_commit_size: maximum number of awards that
+            :py:meth:`queue_award` saves at once.
+        """
+        super().__init__(db)
+
+        self.credentials: CredentialService = credentials
+        self.group_commit_delay = group_commit_delay
+        self.group_commit_size = group_commit_size
+
+        # Business metrics.  Changes are counted when they are made, before the caller
+        # commits them (so a failed commit is still counted), except for batches saved
+        # by :py:meth:`queue_award`, which are counted once they are committed.  The
+        # children are looked up once, so counting is just an attribute update.
+        self.profiles_created = metrics.counter(
+            "profiles_created_total", "Number of profiles created"
+        ).labels()
+        self.profiles_edited = metrics.counter(
+            "profiles_edited_total", "Number of profiles edited"
+        ).labels()
+        self.awards_bestowed = metrics.counter(
+            "awards_bestowed_total", "Number of awards bestowed"
+        ).labels()
+        logins = metrics.counter(
+            "profile_logins_total", "Number of login attempts", labels=["result"]
+        )
+        self.logins_succeeded = logins.labels("success")
+        self.logins_failed = logins.labels("failure")
+
+        # Awards waiting to be saved by :py:meth:`queue_award` (with their profile
+        # IDs), along with the futures that resolve to the updated profiles.
+        self._queued_awards: list[
+            tuple[int, EditAwardRequest, asyncio.Future[Profile | None]]
+        ] = []
+        self._flush_timer: asyncio.TimerHandle | None = None
+        self._flushes: set[asyncio.Task] = set()
+
     @staticmethod
     async def load_profiles(session: AsyncSession) -> Sequence[Profile]:
         """
@@ -47,6 +199,88 @@ class ProfileService(BaseOrmService):
         """
         return (await session.scalars(select(Profile))).unique().all()
 
+    @staticmethod
+    async def stream_profiles(
+        session: AsyncSession, chunk_size: int = 1000, with_awards: bool = True
+    ) -> AsyncIterator[list[ProfileRecord]]:
+        """
+        Streams every profile in the database, in chunks, ordered by ID.
+
+        Unlike :py:meth:`load_profiles`, memory usage stays flat no matter how many
+        profiles there are:
+
+        - Profiles are read using a server-side cursor (where the database supports it),
+          so only one chunk is held in memory at a time.
+        - Awards are loaded with one query per chunk, rather than joined onto every
+          profile row.
+        - Rows are returned as :py:class:`ProfileRecord` instances, skipping the overhead
+          of creating ORM instances (see :py:meth:`read_profiles`).
+
+        :param with_awards: whether to include each profile's awards.
+        """
+        # :see: https://docs.sqlalchemy.org/en/20/orm/queryguide/api.html#fetching-large-result-sets-with-yield-per
+        result = await session.stream(
+            select(*_profile_columns)
+            .order_by(Profile.id)
+            .execution_options(yield_per=chunk_size)
+        )
+
+        async for partition in result.partitions():
+            yield await ProfileService._to_records(session, partition, with_awards)
+
+    @staticmethod
+    async def read_profiles(
+        session: AsyncSession,
+        ids: Iterable[int] | None = None,
+        after: int | None = None,
+        limit: int | None = None,
+        with_awards: bool = True,
+    ) -> list[ProfileRecord]:
+        """
+        Loads profiles as lightweight, read-only records, ordered by ID.
+
+        Use this instead of the ORM for read-only paths that return lots of profiles
+        (lists, exports, etc.).  Rows are mapped straight into
+        :py:class:`ProfileRecord` instances, skipping ORM instance state, the identity
+        map and joined eager loading, and awards are loaded with a single extra query.
+
+        :param ids: only load profiles with these IDs.
+        :param after: only load profiles with IDs greater than this (keyset
+            pagination).
+        :param limit: maximum number of profiles to load.
+        :param with_awards: whether to include each profile's awards.
+        """
+        query = select(*_profile_columns)
+        if after is not None:
+            query = query.where(Profile.id > after)
+        if ids is not None:
+            query = query.where(Profile.id.in_(list(ids)))
+
+        rows = (await session.execute(query.order_by(Profile.id).limit(limit))).all()
+        return await ProfileService._to_records(session, rows, with_awards)
+
+    @staticmethod
+    async def _to_records(
+        session: AsyncSession, rows: Sequence[Row], with_awards: bool
+    ) -> list[ProfileRecord]:
+        """
+        Converts profile rows into records, loading their awards (if requested) with a
+        single query.
+        """
+        if not with_awards:
+            return [ProfileRecord.from_row(row) for row in rows]
+
+        awards: dict[int, list[AwardRecord]] = {row.id: [] for row in rows}
+        if awards:
+            for row in await session.execute(
+                select(*_award_columns)
+                .where(Award.profile_id.in_(awards.keys()))
+                .order_by(Award.id)
+            ):
+                awards[row.profile_id].append(AwardRecord(*row))
+
+        return [ProfileRecord.from_row(row, awards[row.id]) for row in rows]
+
     @staticmethod
     def save_profiles(session: AsyncSession, profiles: Iterable[Profile]) -> None:
         """
@@ -58,6 +292,145 @@ class ProfileService(BaseOrmService):
         """
         session.add_all(profiles)
 
+    @staticmethod
+    async def existing_usernames(
+        session: AsyncSession, usernames: Iterable[str]
+    ) -> set[str]:
+        """
+        :returns: the usernames that already belong to a profile in the database.
+        """
+        return set(
+            await session.scalars(
+                select(Profile.username).where(Profile.username.in_(list(usernames)))
+            )
+        )
+
+    @staticmethod
+    async def last_id(session: AsyncSession) -> int:
+        """
+        :returns: the highest profile ID in the database, or 0 if there are no profiles.
+        """
+        return await session.scalar(select(func.max(Profile.id))) or 0
+
+    @staticmethod
+    async def insert_profiles(
+        session: AsyncSession, rows: Sequence[Mapping[str, Any]]
+    ) -> list[int]:
+        """
+        Inserts many profiles at once, bypassing the ORM's unit of work.
+
+        This is much faster than :py:meth:`save_profiles` for large batches, as rows are
+        sent to the database in multi-row ``INSERT`` statements, and no model instances
+        are created.
+
+        .. important:: Remember to call ``session.commit()`` to commit the transaction.
+
+        :param rows: column values for each profile (see :py:class:`EditProfileRequest`).
+        :returns: the new profiles' IDs, in the same order as ``rows``.
+        """
+        if not rows:
+            return []
+
+        # :see: https://docs.sqlalchemy.org/en/20/orm/queryguide/dml.html#orm-bulk-insert-statements
+        return list(
+            await session.scalars(
+                insert(Profile).returning(Profile.id, sort_by_parameter_order=True),
+                rows,
+            )
+        )
+
+    @staticmethod
+    async def upsert_profiles(
+        session: AsyncSession, rows: Sequence[Mapping[str, Any]]
+    ) -> None:
+        """
+        Inserts many profiles at once, updating existing profiles that have the same
+        username instead.
+
+        Rows must have unique usernames.
+
+        .. important:: Remember to call ``session.commit()`` to commit the transaction.
+
+        :param rows: column values for each profile (see :py:class:`EditProfileRequest`).
+        :raises NotImplementedError: if the database doesn't support upserts.
+        """
+        if not rows:
+            return
+
+        # :see: https://docs.sqlalchemy.org/en/20/orm/queryguide/dml.html#orm-upsert-statements
+        match session.bind.dialect.name:
+            case "postgresql":
+                statement = postgresql.insert(Profile)
+            case "sqlite":
+                statement = sqlite.insert(Profile)
+            case name:
+                raise NotImplementedError(f"Upserts are not supported for {name}")
+
+        columns = EditProfileRequest.model_fields.keys() - {"username"}
+        await session.execute(
+            statement.on_conflict_do_update(
+                index_elements=[Profile.username],
+                set_={column: statement.excluded[column] for column in columns},
+            ),
+            rows,
+        )
+
+    @staticmethod
+    def supports_copy(session: AsyncSession) -> bool:
+        """
+        :returns: whether :py:meth:`copy_profiles` can be used with the database.
+        """
+        dialect = session.bind.dialect
+        return dialect.name == "postgresql" and dialect.driver == "psycopg"
+
+    @staticmethod
+    async def copy_profiles(
+        session: AsyncSession, rows: Sequence[Mapping[str, Any]]
+    ) -> None:
+        """
+        Inserts many profiles at once using Postgres ``COPY``, which is the fastest way
+        to load large amounts of data.
+
+        Only available with the ``psycopg`` driver (see :py:meth:`supports_copy`).
+
+        .. important:: Remember to call ``session.commit()`` to commit the transaction.
+
+        :param rows: column values for each profile (see :py:class:`EditProfileRequest`).
+        :see: https://www.psycopg.org/psycopg3/docs/basic/copy.html
+        """
+        if not rows:
+            return
+
+        columns = list(EditProfileRequest.model_fields.keys())
+
+        # COPY isn't exposed by SQLAlchemy, so we have to use the driver's connection
+        # (which is still part of the session's transaction).
+        connection = await session.connection()
+        raw_connection = await connection.get_raw_connection()
+
+        async with raw_connection.driver_connection.cursor() as cursor:
+            async with cursor.copy(
+                f"COPY {Profile.__tablename__} ({', '.join(columns)}) FROM STDIN"
+            ) as copy:
+                for row in rows:
+                    await copy.write_row([row[column] for column in columns])
+
+    @staticmethod
+    async def insert_awards(
+        session: AsyncSession, rows: Sequence[Mapping[str, Any]]
+    ) -> None:
+        """
+        Inserts many awards at once, bypassing the ORM's unit of work (see
+        :py:meth:`insert_profiles`).
+
+        .. important:: Remember to call ``session.commit()`` to commit the transaction.
+
+        :param rows: column values for each award (``title``, ``profile_id`` and
+            optionally ``created_at``).
+        """
+        if rows:
+            await session.execute(insert(Award), rows)
+
     @staticmethod
     async def get_by_id(session: AsyncSession, id: int) -> Profile | None:
         """
@@ -67,12 +440,45 @@ class ProfileService(BaseOrmService):
         return await session.get(Profile, id)
 
     @staticmethod
+    async def get_json_by_id(session: AsyncSession, id: int) -> bytes | None:
+        """
+        Returns the profile with the specified ID (and its awards) as a JSON document,
+        built entirely by the database.
+
+        The result is the same as ``orjson.dumps(model_encoder(profile))``, but without
+        loading any ORM instances, sending a row per award (as the joined eager load
+        does), or serialising anything in Python.
+
+        :returns: the JSON document, or ``None`` if no such profile exists.
+        """
+        document = await session.scalar(
+            profile_json_query(session.bind.dialect.name).where(Profile.id == id)
+        )
+        return None if document is None else document.encode()
+
+    @staticmethod
+    async def get_by_ids(
+        session: AsyncSession, ids: Iterable[int]
+    ) -> dict[int, Profile]:
+        """
+        Loads many profiles with a single query.
+
+        Keep the number of IDs reasonable (e.g., a few hundred), as they are sent as
+        one ``IN (...)`` clause.
+
+        :returns: the profiles that exist, keyed by ID.
+        """
+        profiles = await session.scalars(
+            select(Profile).where(Profile.id.in_(list(ids)))
+        )
+        return {profile.id: profile for profile in profiles.unique()}
+
     async def edit_by_id(
-        session: AsyncSession, id: int, data: EditProfileRequest
+        self, session: AsyncSession, id: int, data: EditProfileRequest
     ) -> Profile | None:
         """
         Modifies the profile with the specified ID, replacing its attributes from
-        ``data``.
+        ``data`` (the password is hashed first).
 
         .. important:: Remember to call ``session.commit()`` to commit the transaction.
 
@@ -83,25 +489,91 @@ class ProfileService(BaseOrmService):
         if not profile:
             return None
 
-        for column, new_value in dict(data).items():
+        return self.apply_edit(
+            profile, data, await self.credentials.hash(data.password)
+        )
+
+    def apply_edit(
+        self, profile: Profile, data: EditProfileRequest, password_hash: str
+    ) -> Profile:
+        """
+        Replaces a profile's attributes from ``data``, using a password that has already
+        been hashed (e.g., by :py:meth:`CredentialService.hash_many`, for batches).
+
+        .. important:: Remember to call ``session.commit()`` to commit the transaction.
+        """
+        for column, new_value in data:
             setattr(profile, column, new_value)
+        profile.password = password_hash
 
+        self.profiles_edited.inc()
         return profile
 
-    @staticmethod
-    async def create(session: AsyncSession, data: EditProfileRequest) -> Profile:
+    async def create(self, session: AsyncSession, data: EditProfileRequest) -> Profile:
         """
-        Adds a new profile to the database and returns it.
+        Adds a new profile to the database (with its password hashed) and returns it.
 
         .. important:: Remember to call ``session.commit()`` to commit the transaction.
         """
         profile = Profile(**dict(data))
+        profile.password = await self.credentials.hash(data.password)
         session.add(profile)
+
+        self.profiles_created.inc()
         return profile
 
-    @staticmethod
+    async def authenticate(
+        self, session: AsyncSession, username: str, password: str
+    ) -> Profile | None:
+        """
+        Checks a username and password.
+
+        If the stored password needs to be upgraded (it was hashed with outdated work
+        factors, or isn't hashed at all), it is replaced with a new hash.
+
+        .. important:: Remember to call ``session.commit()`` to commit the transaction.
+
+        :returns: the profile, or ``None`` if the username or password is wrong.
+        """
+        profile = await session.scalar(
+            select(Profile).where(Profile.username == username)
+        )
+
+        if not profile:
+            # Hash anyway, so that responses take the same time whether or not the
+            # username exists.
+            await self.credentials.hash(password)
+            self.logins_failed.inc()
+            return None
+
+        check = await self.credentials.verify(password, profile.password)
+
+        if not check.ok:
+            self.logins_failed.inc()
+            return None
+
+        if check.rehash:
+            profile.password = check.rehash
+
+        self.logins_succeeded.inc()
+        return profile
+
+    async def hash_passwords(self, rows: Sequence[dict[str, Any]]) -> None:
+        """
+        Hashes the ``password`` in each row (in place), in batches, for bulk inserts
+        (see :py:meth:`insert_profiles`).
+
+        Passwords that are already hashed (e.g., rows from ``app-cli profiles export``)
+        are left as-is.
+        """
+        pending = [row for row in rows if not is_password_hash(row["password"])]
+        hashes = await self.credentials.hash_many([row["password"] for row in pending])
+
+        for row, hashed in zip(pending, hashes):
+            row["password"] = hashed
+
     async def bestow_award(
-        session: AsyncSession, profile_id: int, data: EditAwardRequest
+        self, session: AsyncSession, profile_id: int, data: EditAwardRequest
     ) -> Profile | None:
         """
         Bestows an award upon a profile.
@@ -116,4 +588,239 @@ class ProfileService(BaseOrmService):
             return None
 
         session.add(Award(**dict(data), profile=profile, profile_id=profile.id))
+
+        self.awards_bestowed.inc()
         return profile
+
+    async def queue_award(
+        self, profile_id: int, data: EditAwardRequest
+    ) -> Profile | None:
+        """
+        Bestows an award upon a profile, saving it along with awards from concurrent
+        callers (group commit).
+
+        Awards are buffered until :py:attr:`group_commit_size` are waiting, or
+        :py:attr:`group_commit_delay` has passed since the first one, then saved in one
+        transaction.  Under heavy load, this is much faster than committing each award
+        separately (see :py:meth:`bestow_award`), as the database only has to flush its
+        log to disk once per batch.  The batch's profiles are loaded (with their
+        awards) by a single query, too.
+
+        If the batch fails to save (e.g., one of the awards violates a constraint),
+        each award is retried in its own transaction, so that only the callers whose
+        awards can't be saved get an error.
+
+        Unlike :py:meth:`bestow_award`, the award is committed by the time this method
+        returns.
+
+        :returns: the updated profile, or ``None`` if no such profile exists.  Callers
+            that bestow awards upon the same profile in the same batch get the same
+            instance, so don't modify it.
+        """
+        future = asyncio.get_running_loop().create_future()
+        self._queued_awards.append((profile_id, data, future))
+
+        if len(self._queued_awards) >= self.group_commit_size:
+            self._start_flush()
+        elif not self._flush_timer:
+            self._flush_timer = asyncio.get_running_loop().call_later(
+                self.group_commit_delay, self._start_flush
+            )
+
+        return await future
+
+    async def close(self) -> None:
+        # Save any awards that are still waiting.
+        if self._queued_awards:
+            self._start_flush()
+
+        await asyncio.gather(*self._flushes)
+
+    def _start_flush(self) -> None:
+        """
+        Saves the queued awards in a new task, so that callers can keep adding awards to
+        the next batch while this one is being saved.
+        """
+        if self._flush_timer:
+            self._flush_timer.cancel()
+            self._flush_timer = None
+
+        batch, self._queued_awards = self._queued_awards, []
+
+        task = asyncio.create_task(self._flush_awards(batch))
+        self._flushes.add(task)
+        task.add_done_callback(self._flushes.discard)
+
+    async def _flush_awards(
+        self, batch: list[tuple[int, EditAwardRequest, asyncio.Future]]
+    ) -> None:
+        try:
+            async with self.session() as session:
+                # Awards for profiles that don't exist are skipped (SQLite doesn't
+                # enforce foreign keys by default).
+                profiles = await self.get_by_ids(
+                    session, {profile_id for profile_id, _, _ in batch}
+                )
+
+                awards = [
+                    Award(**dict(data), profile=profile, profile_id=profile_id)
+                    for profile_id, data, _ in batch
+                    if (profile := profiles.get(profile_id))
+                ]
+                session.add_all(awards)
+
+                await session.commit()
+        except Exception as e:
+            if len(batch) > 1:
+                return await self._retry_awards(batch)
+
+            ((_, _, future),) = batch
+            if not future.done():
+                future.set_exception(e)
+            return
+
+        self.awards_bestowed.inc(len(awards))
+
+        for profile_id, _, future in batch:
+            # The caller may have given up waiting (e.g., the request was cancelled).
+            if not future.done():
+                future.set_result(profiles.get(profile_id))
+
+    async def _retry_awards(
+        self, batch: list[tuple[int, EditAwardRequest, asyncio.Future]]
+    ) -> None:
+        """
+        Saves each award in a batch that failed in its own transaction, so that one
+        bad award doesn't fail every caller in the batch.
+        """
+        for profile_id, data, future in batch:
+            if future.done():
+                continue
+
+            try:
+                async with self.session() as session:
+                    profile = await self.bestow_award(session, profile_id, data)
+                    await session.commit()
+            except Exception as e:
+                if not future.done():
+                    future.set_exception(e)
+            else:
+                if not future.done():
+                    future.set_result(profile)
+
+
+def profile_json_query(dialect: str) -> Select:
+    """
+    Builds a query that selects each profile as a JSON document (with its awards), in
+    the same format as :py:func:`model_encoder`.
+
+    Uses ``json_build_object``/``json_agg`` for Postgres, and
+    ``json_object``/``json_group_array`` for SQLite.
+
+    :see: https://www.postgresql.org/docs/current/functions-json.html
+    :see: https://www.sqlite.org/json1.html
+    """
+    if dialect not in ("postgresql", "sqlite"):
+        raise ValueError(f"JSON documents are not supported for {dialect}.")
+
+    if dialect == "postgresql":
+        awards = func.coalesce(
+            select(
+                func.json_agg(
+                    postgresql.aggregate_order_by(
+                        _award_json(dialect, Award.__table__.c), Award.id
+                    )
+                )
+            )
+            .where(Award.profile_id == Profile.id)
+            .scalar_subquery(),
+            literal_column("'[]'::json"),
+        )
+    else:
+        # SQLite doesn't support ``ORDER BY`` inside aggregate functions (until 3.44),
+        # so aggregate an ordered subquery instead.  Subqueries in ``FROM`` aren't
+        # correlated automatically; filtering outside the subquery instead would scan
+        # the whole awards table for each profile.
+        ordered = (
+            select(*_award_columns)
+            .where(Award.profile_id == Profile.id)
+            .order_by(Award.id)
+            .correlate(Profile)
+            .subquery()
+        )
+        # The subquery's result is text, so ``json()`` marks it as JSON (otherwise
+        # it would be embedded as a string).
+        awards = func.json(
+            select(
+                func.json_group_array(_award_json(dialect, ordered.c))
+            ).scalar_subquery()
+        )
+
+    document = _json_object(
+        dialect,
+        {
+            **{column.name: column for column in _profile_columns},
+            "awards": awards,
+        },
+    )
+
+    # Make sure the driver returns the document as a string (psycopg decodes JSON).
+    return select(cast(document, Text) if dialect == "postgresql" else document)
+
+
+def _award_json(dialect: str, columns) -> ColumnElement:
+    """
+    Builds a JSON object for an award, from the columns of the awards table (or a
+    subquery).
+    """
+    return _json_object(
+        dialect,
+        {
+            column.name: (
+                _json_datetime(dialect, columns[column.name])
+                if column.name == "created_at"
+                else columns[column.name]
+            )
+            for column in _award_columns
+        },
+    )
+
+
+def _json_object(dialect: str, values: dict[str, ColumnElement]) -> ColumnElement:
+    """
+    Builds a JSON object from column values.
+    """
+    build = func.json_build_object if dialect == "postgresql" else func.json_object
+
+    # Keys are inlined, as Postgres can't infer the type of bound parameters in
+    # ``json_build_object``.  They are all literals defined in this module.
+    return build(
+        *chain.from_iterable(
+            (literal_column(f"'{key}'"), value) for key, value in values.items()
+        )
+    )
+
+
+def _json_datetime(dialect: str, column: ColumnElement) -> ColumnElement:
+    """
+    Formats a datetime column the same way as :py:meth:`datetime.isoformat`.
+    """
+    if dialect == "postgresql":
+        # Postgres's own JSON formatting drops trailing zeros from the fraction (e.g.
+        # ``.5`` instead of ``.500000``), so format it explicitly, and drop zero
+        # microseconds (like ``isoformat()`` does).
+        return case(
+            (
+                func.to_char(column, "US") == "000000",
+                func.to_char(column, 'YYYY-MM-DD"T"HH24:MI:SS'),
+            ),
+            else_=func.to_char(column, 'YYYY-MM-DD"T"HH24:MI:SS.US'),
+        )
+
+    # SQLite stores datetimes as text, e.g. ``2023-01-01 12:34:56.000000``.  Use a
+    # ``T`` separator, and drop zero microseconds (like ``isoformat()`` does).
+    isoformat = func.replace(column, " ", "T")
+    return case(
+        (func.substr(column, 20).in_(["", ".000000"]), func.substr(isoformat, 1, 19)),
+        else_=isoformat,
+    )
@@ -0,0 +1,221 @@
+__all__ = ["ProfileMode", "ProfilerBusyError", "ProfilerService", "SamplingProfiler"]
+
+import asyncio
+import re
+import sys
+import threading
+import typing
+from cProfile import Profile
+from collections import Counter
+from contextlib import asynccontextmanager, contextmanager
+from datetime import datetime
+from enum import StrEnum, auto
+from hmac import compare_digest
+from pathlib import Path
+from typing import Self
+from uuid import uuid4
+
+from services.base import BaseService
+from services.config import ConfigService
+
+
+class ProfileMode(StrEnum):
+    """
+    Ways to profile code.
+    """
+
+    # Periodically samples the call stack.  Low overhead, so suitable for long runs,
+    # but short functions may not show up at all.
+    # Output: folded stacks (``.folded``), e.g. for https://www.speedscope.app/ or
+    # ``flamegraph.pl``.
+    sampling = auto()
+
+    # Records every function call using :py:mod:`cProfile`.  Precise, but slows
+    # everything down, so best suited to short runs.
+    # Output: pstats (``.prof``), e.g. for ``snakeviz`` or :py:mod:`pstats`.
+    deterministic = auto()
+
+
+class ProfilerBusyError(RuntimeError):
+    """
+    Indicates that a profile was requested while another one is already running.
+    """
+
+
+class SamplingProfiler:
+    """
+    Statistical profiler that samples a thread's call stack from a background thread.
+    """
+
+    def __init__(self, interval: float, thread_id: int | None = None):
+        """
+        :param interval: time between samples (seconds).
+        :param thread_id: the thread to sample (defaults to the current thread).
+        """
+        self.interval = interval
+        self.thread_id = thread_id or threading.get_ident()
+
+        # Number of times each call stack was sampled, keyed by folded stack.
+        self.samples: Counter[str] = Counter()
+
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def start(self) -> None:
+        self._stop.clear()
+        self._thread = threading.Thread(
+            target=self._run, name="sampling-profiler", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._thread.join()
+
+    def dump_stats(self, path: Path) -> None:
+        """
+        Writes the samples in folded stack format (one line per call stack, with the
+        frames separated by semicolons, followed by the sample count).
+        """
+        with open(path, "w") as f:
+            for stack, count in self.samples.items():
+                f.write(f"{stack} {count}\n")
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(
+                    f"{code.co_qualname} ({code.co_filename}:{code.co_firstlineno})"
+                )
+                frame = frame.f_back
+
+            if stack:
+                self.samples[";".join(reversed(stack))] += 1
+
+
+class ProfilerService(BaseService):
+    """
+    Profiles blocks of code on demand, and saves the results to files that standard
+    viewers can read (see :py:class:`ProfileMode`).
+    """
+
+    provides = "profiler"
+
+    @classmethod
+    def factory(cls, config: ConfigService = None) -> Self:
+        return ProfilerService(config)
+
+    def __init__(self, config: ConfigService):
+        super().__init__()
+
+        self.config = config
+
+        # Only one profile can run at a time (:py:mod:`cProfile` doesn't allow more
+        # than one active profiler, and stacks sampled from the event loop thread would
+        # include the other profile's code anyway).
+        self._lock = threading.Lock()
+
+    def is_allowed(self, token: str | None) -> bool:
+        """
+        Returns whether a client is allowed to request a profile.
+
+        Profiling is always allowed outside production.  In production, the client
+        must provide the configured ``profiler_token``.
+        """
+        if not self.config.is_production:
+            return True
+
+        expected = self.config.profiler_token
+        if not (expected and token):
+            return False
+
+        # Compare in constant time, to avoid leaking the token via timing attacks.
+        return compare_digest(token.encode("utf-8"), expected.encode("utf-8"))
+
+    @contextmanager
+    def profile(self, mode: ProfileMode, label: str) -> typing.Iterator[Path]:
+        """
+        Profiles the code inside the block::
+
+           with profiler.profile(ProfileMode.sampling, "generate-profiles") as path:
+               ...
+
+           print(f"Profile saved to {path}")
+
+        :param mode: how to profile the code.
+        :param label: included in the filename, to make it easier to find.
+        :returns: the path the profile will be saved to when the block exits.
+        :raises ProfilerBusyError: if another profile is already running.
+        """
+        profiler, path = self._start(mode, label)
+        try:
+            yield path
+        finally:
+            try:
+                self._stop(profiler)
+                profiler.dump_stats(path)
+            finally:
+                self._lock.release()
+
+    @asynccontextmanager
+    async def profile_async(
+        self, mode: ProfileMode, label: str
+    ) -> typing.AsyncIterator[Path]:
+        """
+        Like :py:meth:`profile`, but writes the profile in a worker thread, so that
+        saving it doesn't block the event loop (e.g., when profiling a request).
+        """
+        profiler, path = self._start(mode, label)
+        try:
+            yield path
+        finally:
+            try:
+                self._stop(profiler)
+                await asyncio.to_thread(profiler.dump_stats, path)
+            finally:
+                self._lock.release()
+
+    def _start(
+        self, mode: ProfileMode, label: str
+    ) -> tuple[Profile | SamplingProfiler, Path]:
+        """
+        Acquires the lock and starts profiling (the caller must release the lock).
+        """
+        if not self._lock.acquire(blocking=False):
+            raise ProfilerBusyError("Another profile is already running")
+
+        try:
+            profile_dir = Path(self.config.profile_dir)
+            profile_dir.mkdir(parents=True, exist_ok=True)
+            path = profile_dir / self._filename(mode, label)
+
+            if mode == ProfileMode.sampling:
+                profiler = SamplingProfiler(self.config.profile_sample_interval)
+                profiler.start()
+            else:
+                profiler = Profile()
+                profiler.enable()
+        except BaseException:
+            self._lock.release()
+            raise
+
+        return profiler, path
+
+    @staticmethod
+    def _stop(profiler: Profile | SamplingProfiler) -> None:
+        if isinstance(profiler, Profile):
+            profiler.disable()
+        else:
+            profiler.stop()
+
+    @staticmethod
+    def _filename(mode: ProfileMode, label: str) -> str:
+        suffix = ".folded" if mode == ProfileMode.sampling else ".prof"
+        slug = re.sub(r"[^A-Za-z0-9]+", "-", label).strip("-") or "profile"
+        timestamp = datetime.now().strftime("%Y%m%d-%H%M%S")
+
+        return f"{timestamp}-{slug}-{uuid4().hex[:8]}{suffix}"
@@ -0,0 +1,169 @@
+"""
+Benchmarks for the ``/v1`` API routes.
+
+See ``../conftest.py`` for how to run them, and how to save and compare baselines.
+"""
+from random import Random
+
+from httpx import AsyncClient
+
+from dev.benchmark import run_benchmark
+
+
+async def test_index(bench_client: AsyncClient, bench_settings, check_result):
+    """
+    ``GET /v1`` (baseline for the framework overhead, as it doesn't touch the DB).
+    """
+    check_result(
+        await run_benchmark(
+            "GET /v1",
+            lambda n: bench_client.get("/v1/"),
+            bench_settings.requests,
+            bench_settings.concurrency,
+            bench_settings.dataset,
+        )
+    )
+
+
+async def test_get_profile(bench_client: AsyncClient, bench_settings, check_result):
+    """
+    ``GET /v1/profile/{profile_id}``
+    """
+    ids = _profile_ids(bench_settings)
+
+    check_result(
+        await run_benchmark(
+            "GET /v1/profile/{profile_id}",
+            lambda n: bench_client.get(f"/v1/profile/{next(ids)}"),
+            bench_settings.requests,
+            bench_settings.concurrency,
+            bench_settings.dataset,
+        )
+    )
+
+
+async def test_edit_profile(bench_client: AsyncClient, bench_settings, check_result):
+    """
+    ``PUT /v1/profile/{profile_id}``
+    """
+    ids = _profile_ids(bench_settings)
+
+    def send(n: int):
+        profile_id = next(ids)
+        return bench_client.put(
+            f"/v1/profile/{profile_id}",
+            json={
+                "username": f"user{profile_id}",
+                "password": f"edited{n}",
+                "gender": "female",
+                "full_name": f"Edited User {n}",
+                "street_address": f"{n} Benchmark Road",
+                "email": f"user{profile_id}@example.com",
+            },
+        )
+
+    check_result(
+        await run_benchmark(
+            "PUT /v1/profile/{profile_id}",
+            send,
+            bench_settings.requests,
+            bench_settings.concurrency,
+            bench_settings.dataset,
+        )
+    )
+
+
+async def test_create_profile(bench_client: AsyncClient, bench_settings, check_result):
+    """
+    ``POST /v1/profile``
+    """
+
+    def send(n: int):
+        return bench_client.post(
+            "/v1/profile",
+            json={
+                "username": f"newuser{n}",
+                "password": f"password{n}",
+                "gender": "male",
+                "full_name": f"New User {n}",
+                "street_address": f"{n} Benchmark Road",
+                "email": f"newuser{n}@example.com",
+            },
+        )
+
+    check_result(
+        await run_benchmark(
+            "POST /v1/profile",
+            send,
+            bench_settings.requests,
+            bench_settings.concurrency,
+            bench_settings.dataset,
+        )
+    )
+
+
+async def test_bestow_award(bench_client: AsyncClient, bench_settings, check_result):
+    """
+    ``POST /v1/profile/{profile_id}/award``
+    """
+    ids = _profile_ids(bench_settings)
+
+    check_result(
+        await run_benchmark(
+            "POST /v1/profile/{profile_id}/award",
+            lambda n: bench_client.post(
+                f"/v1/profile/{next(ids)}/award", json={"title": f"Benchmark {n}"}
+            ),
+            bench_settings.requests,
+            bench_settings.concurrency,
+            bench_settings.dataset,
+        )
+    )
+
+
+async def test_list_profiles(bench_client: AsyncClient, bench_settings, check_result):
+    """
+    ``GET /v1/profiles`` (read-only records, rather than ORM instances)
+    """
+    ids = _profile_ids(bench_settings)
+
+    check_result(
+        await run_benchmark(
+            "GET /v1/profiles",
+            lambda n: bench_client.get(
+                "/v1/profiles", params={"after": next(ids), "limit": 100}
+            ),
+            bench_settings.requests,
+            bench_settings.concurrency,
+            bench_settings.dataset,
+        )
+    )
+
+
+async def test_recent_awards(bench_client: AsyncClient, bench_settings, check_result):
+    """
+    ``GET /v1/awards``
+    """
+    check_result(
+        await run_benchmark(
+            "GET /v1/awards",
+            lambda n: bench_client.get("/v1/awards", params={"with_profile": True}),
+            bench_settings.requests,
+            bench_settings.concurrency,
+            bench_settings.dataset,
+        )
+    )
+
+
+def _profile_ids(bench_settings):
+    """
+    Generates random (but repeatable) IDs of profiles in the benchmark dataset, so that
+    each run requests the same profiles in the same order.
+
+    The tables are recreated before seeding, so the database numbers the profiles from
+    1.
+    """
+    random = Random(0)
+
+    while True:
+        yield random.randint(1, bench_settings.profiles)
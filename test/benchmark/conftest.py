@@ -0,0 +1,168 @@
+"""
+Fixtures for the API benchmark suite.
+
+Benchmarks are slow, so they only run when the ``BENCHMARK`` environment variable is
+set, e.g.::
+
+   BENCHMARK=1 pytest test/benchmark
+
+The following environment variables configure the benchmarks:
+
+``BENCHMARK_PROFILES``, ``BENCHMARK_AWARDS``
+   Number of profiles to seed the database with, and number of awards per profile.
+
+``BENCHMARK_REQUESTS``, ``BENCHMARK_CONCURRENCY``
+   Number of requests to send to each route, and how many to keep in flight.
+
+``BENCHMARK_DB_URL``
+   Run against this database instead of a temporary SQLite file (e.g., a Postgres
+   database).  All tables will be dropped and recreated, so use a dedicated database!
+
+``BENCHMARK_SAVE``
+   Save results to this JSON file, to use as a baseline later.
+
+``BENCHMARK_BASELINE``, ``BENCHMARK_TOLERANCE``
+   Compare results against a baseline JSON file, failing any benchmark that is worse
+   than the baseline by more than the tolerance (default ``0.2``, i.e., 20%).
+"""
+from dataclasses import dataclass
+from os import getenv
+from pathlib import Path
+
+import pytest
+from httpx import ASGITransport, AsyncClient
+
+from api.main import app
+from dev.benchmark import (
+    BenchmarkResult,
+    compare_results,
+    load_results,
+    save_result,
+    seed_dataset,
+)
+from dev.services.migration import MigrationService
+from services import DatabaseService, base, get_service
+from services.config import TestConfig
+
+
+def pytest_collection_modifyitems(items: list[pytest.Item]) -> None:
+    if getenv("BENCHMARK"):
+        return
+
+    skip = pytest.mark.skip(reason="set BENCHMARK=1 to run benchmarks")
+    benchmark_dir = Path(__file__).parent
+
+    for item in items:
+        if benchmark_dir in item.path.parents:
+            item.add_marker(skip)
+
+
+@dataclass
+class BenchmarkSettings:
+    """
+    Benchmark configuration, loaded from environment variables.
+    """
+
+    profiles: int
+    awards_per_profile: int
+    requests: int
+    concurrency: int
+    tolerance: float
+    save: Path | None
+    baseline: Path | None
+
+    @property
+    def dataset(self) -> dict[str, int]:
+        return {
+            "profiles": self.profiles,
+            "awards_per_profile": self.awards_per_profile,
+        }
+
+
+@pytest.fixture(name="bench_settings")
+def fixture_bench_settings() -> BenchmarkSettings:
+    save = getenv("BENCHMARK_SAVE")
+    baseline = getenv("BENCHMARK_BASELINE")
+
+    return BenchmarkSettings(
+        profiles=int(getenv("BENCHMARK_PROFILES", 1000)),
+        awards_per_profile=int(getenv("BENCHMARK_AWARDS", 5)),
+        requests=int(getenv("BENCHMARK_REQUESTS", 500)),
+        concurrency=int(getenv("BENCHMARK_CONCURRENCY", 10)),
+        tolerance=float(getenv("BENCHMARK_TOLERANCE", 0.2)),
+        save=Path(save) if save else None,
+        baseline=Path(baseline) if baseline else None,
+    )
+
+
+@pytest.fixture(name="bench_db")
+async def fixture_bench_db(
+    monkeypatch, tmp_path: Path, bench_settings: BenchmarkSettings
+) -> DatabaseService:
+    """
+    Points the app at a database that can handle concurrent connections, and seeds it
+    with the benchmark dataset.
+
+    The in-memory SQLite database used by other tests shares a single connection,
+    which would serialise every request.
+    """
+    # Shut down the services created by the global ``db`` fixture, before pointing
+    # replacements at the benchmark database.
+    await base.close_services()
+
+    monkeypatch.setattr(
+        TestConfig,
+        "db_connection_string",
+        getenv("BENCHMARK_DB_URL") or f"sqlite+aiosqlite:///{tmp_path / 'bench.db'}",
+    )
+    monkeypatch.setattr(base, "registry", base.ServiceInstanceCache(base._registry))
+
+    await get_service(MigrationService).create_tables_from_models()
+
+    db: DatabaseService = get_service(DatabaseService)
+    await seed_dataset(db, bench_settings.profiles, bench_settings.awards_per_profile)
+
+    yield db
+
+
+@pytest.fixture(name="bench_client")
+async def fixture_bench_client(bench_db: DatabaseService) -> AsyncClient:
+    """
+    HTTP client that sends requests straight to the app, without going over the
+    network.
+    """
+    async with AsyncClient(
+        transport=ASGITransport(app=app), base_url="http://benchmark"
+    ) as client:
+        yield client
+
+
+@pytest.fixture(name="check_result")
+def fixture_check_result(bench_settings: BenchmarkSettings):
+    """
+    Reports a benchmark result, saves it (if ``BENCHMARK_SAVE`` is set) and compares
+    it against the baseline (if ``BENCHMARK_BASELINE`` is set).
+    """
+
+    def check(result: BenchmarkResult) -> None:
+        print(
+            f"\n{result.name}: {result.throughput:.1f} req/s, "
+            f"p50={result.p50:.2f}ms p95={result.p95:.2f}ms p99={result.p99:.2f}ms, "
+            f"{result.errors} errors"
+        )
+
+        assert result.errors == 0
+
+        if bench_settings.save:
+            save_result(bench_settings.save, result)
+
+        if bench_settings.baseline:
+            baseline = load_results(bench_settings.baseline).get(result.name)
+
+            if baseline:
+                regressions = compare_results(
+                    baseline, result, bench_settings.tolerance
+                )
+                assert not regressions, "\n".join(regressions)
+
+    return check
@@ -2,10 +2,10 @@
 Global fixtures accessible to all tests for this project.
 """
 import asyncio
+import sqlite3
 
 import pytest
 import uvloop
-from class_registry import ClassRegistryInstanceCache
 
 from dev.services.migration import MigrationService
 from models import Profile
@@ -18,8 +18,30 @@ from services.config import Env
 asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
 
 
+def pytest_addoption(parser):
+    parser.addoption(
+        "--migrations",
+        action="store_true",
+        help="Build the test database schema by running the Alembic migrations, "
+        "instead of from the model classes.",
+    )
+
+
+@pytest.fixture(name="db_template", scope="session")
+def fixture_db_template(pytestconfig) -> sqlite3.Connection:
+    """
+    Builds the database schema once per test session (or once per worker, if running
+    tests in parallel), so that it can be copied into each test's database.
+    """
+    template = MigrationService.create_template(
+        from_migrations=pytestconfig.getoption("migrations")
+    )
+    yield template
+    template.close()
+
+
 @pytest.fixture(name="db", autouse=True)
-async def fixture_db(monkeypatch) -> None:
+async def fixture_db(monkeypatch, db_template: sqlite3.Connection) -> None:
     """
     Sets up the database for unit tests, ensuring all the migrations get run.
 
@@ -35,7 +57,7 @@ async def fixture_db(monkeypatch) -> None:
     monkeypatch.setenv("PY_ENV", "test")
     # Install a new instance cache for the service registry, so that it recreates each
     # service instance using the test configuration.
-    monkeypatch.setattr(base, "registry", ClassRegistryInstanceCache(base._registry))
+    monkeypatch.setattr(base, "registry", base.ServiceInstanceCache(base._registry))
 
     # Get ready to run migrations.
     migration_service: MigrationService = get_service(MigrationService)
@@ -44,12 +66,15 @@ async def fixture_db(monkeypatch) -> None:
     # anything.
     assert migration_service.db.config.env == Env.test
 
-    # Finally, we can run migrations (:
-    # Note that we have to call it "synchronously", as pytest-asyncio doesn't work with
-    # session-scoped async fixtures :shrug:
-    await migration_service.create_tables_from_models()
+    # Finally, we can set up the schema (:
+    # Copying it from the template is much faster than creating the tables each time.
+    migration_service.create_tables_from_template(db_template)
     yield
 
+    # Close the services that were created for this test (e.g., so that the database
+    # engine releases its connections).
+    await base.close_services()
+
 
 @pytest.fixture(name="profiles")
 async def fixture_profiles(monkeypatch) -> list[Profile]:
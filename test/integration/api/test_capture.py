@@ -0,0 +1,86 @@
+"""
+Integration tests for capturing API traffic.
+"""
+from pathlib import Path
+
+from fastapi.testclient import TestClient
+
+from models import Profile
+from services import CaptureService, get_service
+from services.capture import REDACTED, read_capture
+from services.config import TestConfig
+
+
+def test_capture_request(
+    monkeypatch, client: TestClient, profiles: list[Profile], tmp_path: Path
+):
+    """
+    Capturing a request, with the password redacted.
+    """
+    capture_file = tmp_path / "capture.ndjson"
+    monkeypatch.setattr(TestConfig, "capture_file", capture_file)
+
+    target_profile: Profile = profiles[0]
+    request_body = {
+        "username": target_profile.username,
+        "password": "hunter2",
+        "gender": target_profile.gender,
+        "full_name": "Captured Profile",
+        "street_address": target_profile.street_address,
+        "email": target_profile.email,
+    }
+
+    client.put(f"/v1/profile/{target_profile.id}", json=request_body)
+    client.get("/v1/profile/999?foo=bar")
+
+    edit, missing = read_capture(capture_file)
+
+    assert edit.method == "PUT"
+    assert edit.path == f"/v1/profile/{target_profile.id}"
+    assert edit.route == "/v1/profile/{profile_id}"
+    assert edit.status == 200
+    assert edit.body == {**request_body, "password": REDACTED}
+
+    assert missing.path == "/v1/profile/999?foo=bar"
+    assert missing.body is None
+    assert missing.status == 404
+
+
+def test_capture_sample_rate(
+    monkeypatch, client: TestClient, profiles: list[Profile], tmp_path: Path
+):
+    """
+    Requests that aren't sampled are not captured.
+    """
+    capture_file = tmp_path / "capture.ndjson"
+    monkeypatch.setattr(TestConfig, "capture_file", capture_file)
+    monkeypatch.setattr(TestConfig, "capture_sample_rate", 0.0)
+
+    client.get(f"/v1/profile/{profiles[0].id}")
+
+    assert not capture_file.exists()
+
+
+def test_capture_after_fork(
+    monkeypatch, client: TestClient, profiles: list[Profile], tmp_path: Path
+):
+    """
+    Requests are written to the file straight away, and a forked worker appends to the
+    same file through its own file descriptor.
+    """
+    capture_file = tmp_path / "capture.ndjson"
+    monkeypatch.setattr(TestConfig, "capture_file", capture_file)
+    capture: CaptureService = get_service(CaptureService)
+
+    client.get(f"/v1/profile/{profiles[0].id}")
+    assert len(list(read_capture(capture_file))) == 1
+
+    capture.after_fork()
+    assert capture._fd is None
+
+    client.get(f"/v1/profile/{profiles[1].id}")
+    assert capture._fd is not None
+
+    first, second = read_capture(capture_file)
+    assert first.path == f"/v1/profile/{profiles[0].id}"
+    assert second.path == f"/v1/profile/{profiles[1].id}"
@@ -0,0 +1,47 @@
+"""
+Integration tests for event loop monitoring.
+"""
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+
+from api.main import app
+from models import Profile
+from services import LoopMonitorService, ProfileService, get_service
+from services.config import TestConfig
+
+
+def test_blocking_route(monkeypatch: pytest.MonkeyPatch, profiles: list[Profile]):
+    """
+    Code that blocks the event loop is traced back to the route that ran it.
+    """
+    monkeypatch.setattr(TestConfig, "loop_monitor_interval", 0.01)
+    monkeypatch.setattr(TestConfig, "loop_monitor_threshold", 0.05)
+
+    get_by_id = ProfileService.get_by_id
+
+    async def blocking_get_by_id(session, id):
+        time.sleep(0.2)
+        return await get_by_id(session, id)
+
+    monkeypatch.setattr(ProfileService, "get_by_id", staticmethod(blocking_get_by_id))
+
+    # Run the app's lifespan, which starts the monitor.
+    with TestClient(app) as client:
+        monitor: LoopMonitorService = get_service(LoopMonitorService)
+        assert monitor.running
+
+        response = client.get(f"/v1/profile/{profiles[0].id}")
+        assert response.status_code == 200
+
+        # Give the monitor a chance to report it.
+        time.sleep(0.05)
+        metrics = client.get("/metrics").text
+
+    (blocked,) = monitor.blocked
+    assert blocked.route == "/v1/profile/{profile_id}"
+    assert "blocking_get_by_id" in "".join(blocked.stack)
+
+    assert 'event_loop_blocked_total{route="/v1/profile/{profile_id}"} 1.0' in metrics
+    assert "event_loop_lag_seconds_count" in metrics
@@ -0,0 +1,46 @@
+"""
+Integration tests for ``/metrics``.
+"""
+from fastapi.testclient import TestClient
+from httpx import Response
+
+from models import Profile
+
+
+def test_metrics(client: TestClient, profiles: list[Profile]):
+    """
+    Requests are counted per route template, rather than per path, and per standard
+    method.
+    """
+    for profile in profiles:
+        client.get(f"/v1/profile/{profile.id}")
+    client.get("/v1/profile/999")
+    client.get("/nowhere")
+    for method in ("BREW", "WHEN"):
+        client.request(method, "/nowhere")
+
+    response: Response = client.get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+
+    lines = response.text.splitlines()
+
+    route = 'method="GET",route="/v1/profile/{profile_id}"'
+    assert f'http_requests_total{{{route},status="200"}} {len(profiles)}.0' in lines
+    assert f'http_requests_total{{{route},status="404"}} 1.0' in lines
+    assert (
+        'http_requests_total{method="GET",route="<unmatched>",status="404"} 1.0'
+    ) in lines
+    # Non-standard methods share a label, so they can't create unlimited metrics.
+    assert (
+        'http_requests_total{method="OTHER",route="<unmatched>",status="404"} 2.0'
+    ) in lines
+    assert 'method="BREW"' not in response.text
+
+    assert (
+        f"http_request_duration_seconds_count{{{route}}} {len(profiles) + 1}" in lines
+    )
+    assert f'http_request_duration_seconds_bucket{{{route},le="+Inf"}} 4' in lines
+
+    # The request for ``/metrics`` is still in progress.
+    assert "http_requests_in_flight 1.0" in lines
@@ -0,0 +1,110 @@
+"""
+Integration tests for profiling API requests on demand.
+"""
+import asyncio
+import pstats
+from pathlib import Path
+
+import pytest
+from fastapi.testclient import TestClient
+from httpx import Response
+
+from models import Profile
+from services.config import TestConfig
+from services.profiler import SamplingProfiler
+
+
+@pytest.fixture(name="profile_dir", autouse=True)
+def fixture_profile_dir(monkeypatch: pytest.MonkeyPatch, tmp_path: Path) -> Path:
+    """
+    Saves profiles to a temporary directory.
+    """
+    monkeypatch.setattr(TestConfig, "profile_dir", tmp_path)
+    yield tmp_path
+
+
+def test_deterministic(client: TestClient, profile_dir: Path, profiles: list[Profile]):
+    """
+    Profiling a request using cProfile, triggered by a query parameter.
+    """
+    response: Response = client.get(
+        f"/v1/profile/{profiles[0].id}", params={"_profile": "deterministic"}
+    )
+    assert response.status_code == 200
+
+    path = Path(response.headers["X-Profile-Path"])
+    assert path.parent == profile_dir
+    assert path.suffix == ".prof"
+
+    stats = pstats.Stats(str(path))
+    assert any(func[2] == "get_profile" for func in stats.stats)
+
+
+def test_sampling(client: TestClient, profiles: list[Profile]):
+    """
+    Profiling a request using the sampling profiler, triggered by a header.
+    """
+    response: Response = client.get(
+        f"/v1/profile/{profiles[0].id}", headers={"X-Profile": "sampling"}
+    )
+    assert response.status_code == 200
+
+    path = Path(response.headers["X-Profile-Path"])
+    assert path.suffix == ".folded"
+    assert path.exists()
+
+
+def test_saved_off_loop(
+    client: TestClient, monkeypatch: pytest.MonkeyPatch, profiles: list[Profile]
+):
+    """
+    Request profiles are written in a worker thread, not on the event loop.
+    """
+    dump_stats = SamplingProfiler.dump_stats
+    loops = []
+
+    def recording_dump_stats(self: SamplingProfiler, path: Path) -> None:
+        try:
+            loops.append(asyncio.get_running_loop())
+        except RuntimeError:
+            loops.append(None)
+        dump_stats(self, path)
+
+    monkeypatch.setattr(SamplingProfiler, "dump_stats", recording_dump_stats)
+
+    response: Response = client.get(
+        f"/v1/profile/{profiles[0].id}", headers={"X-Profile": "sampling"}
+    )
+    assert response.status_code == 200
+    assert Path(response.headers["X-Profile-Path"]).exists()
+    assert loops == [None]
+
+
+def test_invalid_mode(client: TestClient):
+    """
+    Requesting a profile mode that doesn't exist.
+    """
+    response: Response = client.get("/v1", headers={"X-Profile": "psychic"})
+    assert response.status_code == 400
+
+
+def test_production(client: TestClient, monkeypatch: pytest.MonkeyPatch):
+    """
+    In production, profiling requires the profiler token.
+    """
+    monkeypatch.setattr(TestConfig, "is_production", True)
+    monkeypatch.setattr(TestConfig, "profiler_token", "open sesame")
+
+    response: Response = client.get("/v1", headers={"X-Profile": "sampling"})
+    assert response.status_code == 403
+
+    response = client.get(
+        "/v1", headers={"X-Profile": "sampling", "X-Profile-Token": "open sesame"}
+    )
+    assert response.status_code == 200
+    assert "X-Profile-Path" in response.headers
+
+    # Requests that don't ask to be profiled are unaffected.
+    response = client.get("/v1")
+    assert response.status_code == 200
+    assert "X-Profile-Path" not in response.headers
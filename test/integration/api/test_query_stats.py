@@ -0,0 +1,60 @@
+"""
+Integration tests for SQL statement reporting.
+"""
+import logging
+
+import pytest
+from fastapi.testclient import TestClient
+from httpx import Response
+
+from models import Profile
+from services import DatabaseService, get_service
+from services.config import TestConfig
+
+
+def test_server_timing(client: TestClient, profiles: list[Profile]):
+    """
+    Each response reports how many SQL statements it executed.
+    """
+    response: Response = client.get(f"/v1/profile/{profiles[0].id}")
+    assert response.status_code == 200
+
+    db_timing, app_timing = response.headers["Server-Timing"].split(", ")
+    assert db_timing.startswith("db;dur=")
+    assert db_timing.endswith(';desc="1 queries"')
+    assert app_timing.startswith("app;dur=")
+
+
+def test_slow_request_log(
+    caplog: pytest.LogCaptureFixture,
+    client: TestClient,
+    monkeypatch: pytest.MonkeyPatch,
+    profiles: list[Profile],
+):
+    """
+    Requests that exceed the threshold are logged, along with their slowest statement.
+    """
+    monkeypatch.setattr(TestConfig, "slow_request_threshold", 0.0)
+
+    with caplog.at_level(logging.WARNING, logger="api.middleware"):
+        client.get(f"/v1/profile/{profiles[0].id}")
+
+    assert "Slow request: GET /v1/profile/1" in caplog.text
+    assert "1 queries" in caplog.text
+    assert "FROM profiles" in caplog.text
+
+
+async def test_repeated_statements(profiles: list[Profile]):
+    """
+    Executing the same statement repeatedly (N+1 pattern) is detected.
+    """
+    db: DatabaseService = get_service(DatabaseService)
+
+    with db.track_queries() as stats:
+        for profile in profiles:
+            async with db.session() as session:
+                await session.get(Profile, profile.id)
+
+    assert stats.count == len(profiles)
+    assert list(stats.repeated(len(profiles)).values()) == [len(profiles)]
+    assert stats.repeated(len(profiles) + 1) == {}
@@ -4,9 +4,11 @@ Unit tests for ``POST /v1/profile/{profile_id}/award``
 from fastapi.testclient import TestClient
 from httpx import Response
 
+from api.pytest_utils import assert_max_queries
 from models import Profile
 from models.base import model_encoder
 from services import get_service
+from services.config import TestConfig
 from services.profile import EditAwardRequest, ProfileService
 
 
@@ -18,10 +20,12 @@ async def test_happy_path(client: TestClient, profiles: list[Profile]):
 
     request_body = EditAwardRequest(title="SQLAlchemist")
 
-    response: Response = client.post(
-        f"/v1/profile/{target_profile.id}/award",
-        json=model_encoder(request_body),
-    )
+    # Load the profile, then insert the award.
+    with assert_max_queries(2):
+        response: Response = client.post(
+            f"/v1/profile/{target_profile.id}/award",
+            json=model_encoder(request_body),
+        )
     assert response.status_code == 200
 
     profile_service: ProfileService = get_service(ProfileService)
@@ -44,3 +48,28 @@ def test_non_existent_profile(client: TestClient):
         "/v1/profile/999/award", json=model_encoder(request_body)
     )
     assert response.status_code == 404
+
+
+def test_group_commit(client: TestClient, profiles: list[Profile], monkeypatch):
+    """
+    Bestowing an award in group commit mode.
+    """
+    monkeypatch.setattr(TestConfig, "award_group_commit", True)
+    monkeypatch.setattr(TestConfig, "award_group_commit_delay", 0)
+    target_profile: Profile = profiles[0]
+
+    request_body = EditAwardRequest(title="SQLAlchemist")
+
+    # Load the profile, then insert the award.
+    with assert_max_queries(2):
+        response: Response = client.post(
+            f"/v1/profile/{target_profile.id}/award",
+            json=model_encoder(request_body),
+        )
+    assert response.status_code == 200
+
+    awards = response.json()["awards"]
+    assert [award["title"] for award in awards] == [request_body.title]
+
+    response = client.post("/v1/profile/999/award", json=model_encoder(request_body))
+    assert response.status_code == 404
@@ -4,8 +4,10 @@ Integration tests for ``POST /v1/profile``
 from fastapi.testclient import TestClient
 from httpx import Response
 
+from api.pytest_utils import assert_max_queries
 from models.base import model_encoder
 from models.profile import Profile
+from services.credentials import is_password_hash
 from services.profile import EditProfileRequest
 
 
@@ -25,7 +27,6 @@ def test_happy_path(client: TestClient, profiles: list[Profile]):
     expected = {
         "id": len(profiles) + 1,
         "username": "calmcat451",
-        "password": "shortjane",
         "gender": "female",
         "full_name": "Ethel Chen",
         "street_address": "3775 Deerswim Lane",
@@ -33,8 +34,13 @@ def test_happy_path(client: TestClient, profiles: list[Profile]):
         "awards": [],
     }
 
-    response: Response = client.post("/v1/profile", json=model_encoder(request_body))
+    with assert_max_queries(1):
+        response: Response = client.post(
+            "/v1/profile", json=model_encoder(request_body)
+        )
     assert response.status_code == 200
 
-    # The response contains the new profile details.
-    assert response.json() == expected
+    # The response contains the new profile details (with the password hashed).
+    actual = response.json()
+    assert is_password_hash(actual.pop("password"))
+    assert actual == expected
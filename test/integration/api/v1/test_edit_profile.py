@@ -4,8 +4,10 @@ Unit tests for ``PUT /v1/profile/{profile_id}``.
 from fastapi.testclient import TestClient
 from httpx import Response
 
+from api.pytest_utils import assert_max_queries
 from models.base import model_encoder
 from models.profile import Profile
+from services.credentials import is_password_hash
 from services.profile import EditProfileRequest
 
 
@@ -24,16 +26,19 @@ def test_happy_path(client: TestClient, profiles: list[Profile]):
         email="ethel.chen@example.com",
     )
 
-    response: Response = client.put(
-        f"/v1/profile/{target_profile.id}",
-        json=model_encoder(request_body),
-    )
+    # Load the profile, then update it.
+    with assert_max_queries(2):
+        response: Response = client.put(
+            f"/v1/profile/{target_profile.id}",
+            json=model_encoder(request_body),
+        )
 
     assert response.status_code == 200
-    assert response.json() == {
+    actual = response.json()
+    assert is_password_hash(actual.pop("password"))
+    assert actual == {
         "id": target_profile.id,
         "username": "calmcat451",
-        "password": "shortjane",
         "gender": "female",
         "full_name": "Ethel Chen",
         "street_address": "3775 Deerswim Lane",
@@ -4,8 +4,10 @@ Integration tests for ``GET /v1/profile/{profile_id}``
 from fastapi.testclient import TestClient
 from httpx import Response
 
+from api.pytest_utils import assert_max_queries
 from models import Profile
 from models.base import model_encoder
+from services.config import TestConfig
 
 
 def test_happy_path(client: TestClient, profiles: list[Profile]):
@@ -14,7 +16,9 @@ def test_happy_path(client: TestClient, profiles: list[Profile]):
     """
     target_profile = profiles[0]
 
-    response: Response = client.get(f"/v1/profile/{target_profile.id}")
+    # Awards are loaded in the same query as the profile.
+    with assert_max_queries(1):
+        response: Response = client.get(f"/v1/profile/{target_profile.id}")
     assert response.status_code == 200
     assert response.json() == model_encoder(target_profile)
 
@@ -25,3 +29,32 @@ def test_non_existent_profile(client: TestClient):
     """
     response: Response = client.get("/v1/profile/999")
     assert response.status_code == 404
+
+
+def test_json_from_db(client: TestClient, profiles: list[Profile], monkeypatch):
+    """
+    The database can build the response instead.
+    """
+    monkeypatch.setattr(TestConfig, "profile_json_from_db", True)
+    target_profile = profiles[0]
+
+    with assert_max_queries(1):
+        response: Response = client.get(f"/v1/profile/{target_profile.id}")
+    assert response.status_code == 200
+    assert response.json() == model_encoder(target_profile)
+
+    response = client.get("/v1/profile/999")
+    assert response.status_code == 404
+
+
+def test_openapi_schema(client: TestClient):
+    """
+    The route documents a JSON object response, even though it sometimes returns a raw
+    response.
+    """
+    response: Response = client.get("/openapi.json")
+    assert response.status_code == 200
+
+    operation = response.json()["paths"]["/v1/profile/{profile_id}"]["get"]
+    content = operation["responses"]["200"]["content"]
+    assert content["application/json"]["schema"]["type"] == "object"
@@ -0,0 +1,38 @@
+"""
+Unit tests for ``GET /v1/profiles``
+"""
+from fastapi.testclient import TestClient
+from httpx import Response
+
+from api.pytest_utils import assert_max_queries
+from models import Profile
+from models.base import model_encoder
+
+
+def test_happy_path(client: TestClient, profiles: list[Profile]):
+    """
+    Pages through the profiles, in ID order.
+    """
+    # Profiles, then their awards.
+    with assert_max_queries(2):
+        response: Response = client.get("/v1/profiles", params={"limit": 2})
+    assert response.status_code == 200
+    assert response.json() == {
+        "profiles": [model_encoder(profile) for profile in profiles[:2]],
+        "next_after": profiles[1].id,
+    }
+
+    response = client.get("/v1/profiles", params={"after": profiles[1].id})
+    assert response.status_code == 200
+    assert response.json() == {
+        "profiles": [model_encoder(profiles[2])],
+        "next_after": None,
+    }
+
+
+def test_invalid_limit(client: TestClient):
+    """
+    The page size is capped.
+    """
+    response: Response = client.get("/v1/profiles", params={"limit": 1000})
+    assert response.status_code == 422
@@ -0,0 +1,108 @@
+"""
+Unit tests for ``GET /v1/awards``
+"""
+from datetime import datetime
+
+import pytest
+from fastapi.testclient import TestClient
+from httpx import Response
+
+from api.pytest_utils import assert_max_queries
+from models import Profile
+from services import get_service
+from services.profile import ProfileService
+
+
+@pytest.fixture(name="awards")
+async def fixture_awards(profiles: list[Profile]) -> list[dict]:
+    """
+    Bestows awards on the profiles, at known times.  Returns them newest first.
+    """
+    rows = [
+        {"title": "Bug Squasher", "created_at": datetime(2023, 1, 1), "profile_id": 1},
+        {"title": "Code Reviewer", "created_at": datetime(2023, 2, 1), "profile_id": 2},
+        {"title": "Deploy Hero", "created_at": datetime(2023, 2, 1), "profile_id": 3},
+        {"title": "Docs Champion", "created_at": datetime(2023, 3, 1), "profile_id": 1},
+        {"title": "Mentor", "created_at": datetime(2023, 4, 1), "profile_id": 2},
+    ]
+
+    service: ProfileService = get_service(ProfileService)
+    async with service.session() as session:
+        await service.insert_awards(session, rows)
+        await session.commit()
+
+    # Awards created at the same time are ordered by ID (newest first).
+    return [
+        {**row, "id": id, "created_at": row["created_at"].isoformat()}
+        for id, row in reversed(list(enumerate(rows, start=1)))
+    ]
+
+
+def test_happy_path(client: TestClient, awards: list[dict]):
+    """
+    Pages through the awards, newest first, with one query per page.
+    """
+    pages = []
+    cursor = None
+
+    while True:
+        with assert_max_queries(1):
+            response: Response = client.get(
+                "/v1/awards",
+                params={"limit": 2, "cursor": cursor} if cursor else {"limit": 2},
+            )
+        assert response.status_code == 200
+
+        body = response.json()
+        pages.append(body["awards"])
+
+        cursor = body["next_cursor"]
+        if cursor is None:
+            break
+
+    assert [len(page) for page in pages] == [2, 2, 1]
+    assert [award for page in pages for award in page] == awards
+
+
+def test_time_range(client: TestClient, awards: list[dict]):
+    """
+    Only includes awards created in ``[since, until)``.
+    """
+    response: Response = client.get(
+        "/v1/awards",
+        params={"since": "2023-02-01T00:00:00", "until": "2023-04-01T00:00:00+00:00"},
+    )
+
+    assert response.status_code == 200
+    assert [award["title"] for award in response.json()["awards"]] == [
+        "Docs Champion",
+        "Deploy Hero",
+        "Code Reviewer",
+    ]
+    assert response.json()["next_cursor"] is None
+
+
+def test_with_profile(client: TestClient, awards: list[dict], profiles: list[Profile]):
+    """
+    Includes a summary of each award's profile, when requested.
+    """
+    with assert_max_queries(1):
+        response: Response = client.get(
+            "/v1/awards", params={"limit": 1, "with_profile": True}
+        )
+
+    (award,) = response.json()["awards"]
+    assert award["profile"] == {
+        "id": profiles[1].id,
+        "username": profiles[1].username,
+        "full_name": profiles[1].full_name,
+    }
+    assert "password" not in award["profile"]
+
+
+def test_invalid_cursor(client: TestClient):
+    """
+    Malformed cursors are rejected.
+    """
+    response: Response = client.get("/v1/awards", params={"cursor": "nope"})
+    assert response.status_code == 400
@@ -3,11 +3,14 @@ Common fixtures used by CLI integration tests.
 
 :see: https://docs.pytest.org/en/7.4.x/reference/fixtures.html#conftest-py-sharing-fixtures-across-multiple-files
 """
+import typing
 
 import pytest
+from sqlalchemy import event
 
 from cli.main import app
 from cli.pytest_utils import TestCliRunner
+from services import CredentialService, DatabaseService, get_service
 
 
 @pytest.fixture(name="runner")
@@ -18,3 +21,36 @@ def fixture_runner() -> TestCliRunner:
     :see: https://typer.tiangolo.com/tutorial/testing/
     """
     yield TestCliRunner(app)
+
+
+@pytest.fixture(name="hash_outside_transactions")
+def fixture_hash_outside_transactions(monkeypatch: pytest.MonkeyPatch) -> None:
+    """
+    Fails the test if passwords are hashed while a database connection is checked out
+    (i.e., while a transaction could be open), as hashing many passwords is slow.
+    """
+    engine = get_service(DatabaseService).engine.sync_engine
+    checked_out = 0
+
+    def on_checkout(*args) -> None:
+        nonlocal checked_out
+        checked_out += 1
+
+    def on_checkin(*args) -> None:
+        nonlocal checked_out
+        checked_out -= 1
+
+    event.listen(engine, "checkout", on_checkout)
+    event.listen(engine, "checkin", on_checkin)
+
+    hash_many = CredentialService.hash_many
+
+    async def checked_hash_many(self, passwords: typing.Sequence[str]) -> list[str]:
+        assert not checked_out, "Passwords hashed while a connection is checked out"
+        return await hash_many(self, passwords)
+
+    monkeypatch.setattr(CredentialService, "hash_many", checked_hash_many)
+    yield
+
+    event.remove(engine, "checkout", on_checkout)
+    event.remove(engine, "checkin", on_checkin)
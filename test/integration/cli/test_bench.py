@@ -0,0 +1,128 @@
+"""
+Integration tests for ``app-cli bench``.
+"""
+import re
+from pathlib import Path
+
+import httpx
+import orjson
+from click.testing import Result
+from pytest_httpx import HTTPXMock
+
+from cli.commands.bench import LoadGenerator, Operation, parse_mix
+from cli.pytest_utils import TestCliRunner
+from dev.benchmark import load_results
+from models import Profile
+
+
+def test_parse_mix():
+    """
+    Parsing a request mix.
+    """
+    assert parse_mix("read=3, award=1") == {Operation.read: 3.0, Operation.award: 1.0}
+
+
+def test_invalid_mix(runner: TestCliRunner):
+    """
+    Specifying an operation that the load generator doesn't know about.
+    """
+    result: Result = runner.invoke(["bench", "load", "--mix", "read=1,delete=1"])
+
+    assert result.exit_code == 2
+    assert "Invalid mix item" in result.stdout
+
+
+def test_closed_loop(httpx_mock: HTTPXMock, runner: TestCliRunner):
+    """
+    Load testing with a fixed number of requests in flight.
+    """
+    httpx_mock.add_response(json={})
+
+    result: Result = runner.invoke(
+        [
+            "bench",
+            "load",
+            "http://testserver",
+            "--duration=0.2",
+            "--concurrency=2",
+            "--mix=read=1,edit=1,create=1,award=1",
+            "--seed=1",
+        ]
+    )
+    assert result.exception is None
+
+    methods = {request.method for request in httpx_mock.get_requests()}
+    assert methods == {"GET", "PUT", "POST"}
+
+    assert "total" in result.stdout
+    assert "Done!" in result.stdout
+
+
+async def test_open_loop_errors(httpx_mock: HTTPXMock):
+    """
+    Sending requests at a fixed rate, and counting failed requests as errors.
+    """
+    httpx_mock.add_response(method="GET", json={})
+    httpx_mock.add_response(
+        method="POST", url=re.compile(r".*/award$"), status_code=500
+    )
+
+    async with httpx.AsyncClient(base_url="http://testserver") as client:
+        generator = LoadGenerator(
+            client, parse_mix("read=1,award=1"), profile_ids=3, seed=1
+        )
+        await generator.run_open(rate=100, duration=0.2)
+
+    reads = generator.stats[Operation.read]
+    awards = generator.stats[Operation.award]
+
+    assert reads.count + awards.count == 20
+    assert reads.errors == 0
+    assert awards.errors == awards.count > 0
+
+
+def test_replay(profiles: list[Profile], runner: TestCliRunner, tmp_path: Path):
+    """
+    Replaying captured traffic in-process, and comparing against a baseline.
+    """
+    capture_file = tmp_path / "capture.ndjson"
+    with open(capture_file, "wb") as f:
+        for i, profile in enumerate(profiles):
+            f.write(
+                orjson.dumps(
+                    {
+                        "time": 1700000000.0 + i * 0.01,
+                        "method": "GET",
+                        "path": f"/v1/profile/{profile.id}",
+                        "route": "/v1/profile/{profile_id}",
+                        "body": None,
+                        "status": 200,
+                        "duration": 0.01,
+                    }
+                )
+                + b"\n"
+            )
+
+    results_file = tmp_path / "results.json"
+    result: Result = runner.invoke(
+        ["bench", "replay", str(capture_file), "--save", str(results_file)]
+    )
+    assert result.exception is None
+
+    (baseline,) = load_results(results_file).values()
+    assert baseline.name == "GET /v1/profile/{profile_id}"
+    assert baseline.requests == len(profiles)
+    assert baseline.errors == 0
+
+    result = runner.invoke(
+        [
+            "bench",
+            "replay",
+            str(capture_file),
+            "--speed=0",
+            f"--baseline={results_file}",
+            "--tolerance=1000",
+        ]
+    )
+    assert result.exception is None
+    assert "Done!" in result.stdout
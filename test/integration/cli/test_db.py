@@ -0,0 +1,52 @@
+from click.testing import Result
+from sqlalchemy import text
+
+from cli.async_support import embed_event_loop
+from cli.pytest_utils import TestCliRunner
+from models.profile import Profile
+from services import DatabaseService, get_service
+
+
+def test_explain(profiles: list[Profile], runner: TestCliRunner):
+    """
+    Checking the query plans of hot-path queries.
+    """
+    result: Result = runner.invoke(["db", "explain", "--verbose"])
+
+    assert result.exit_code == 0, result.stdout
+    assert "OK get_by_id" in result.stdout
+    assert "SEARCH profiles" in result.stdout
+
+
+def test_explain_missing_index(profiles: list[Profile], runner: TestCliRunner):
+    """
+    Flags full scans, and suggests an index.
+    """
+
+    @embed_event_loop
+    async def drop_index():
+        db: DatabaseService = get_service(DatabaseService)
+        async with db.engine.begin() as connection:
+            await connection.execute(text("DROP INDEX ix_awards_profile_id"))
+
+    drop_index()
+
+    result: Result = runner.invoke(["db", "explain"])
+
+    assert result.exit_code == 1
+    assert "FULL SCAN get_by_id" in result.stdout
+    assert "CREATE INDEX ix_awards_profile_id ON awards (profile_id)" in result.stdout
+
+    # Only configured tables are checked.
+    result = runner.invoke(["db", "explain", "--table", "profiles"])
+    assert result.exit_code == 0, result.stdout
+
+
+def test_explain_no_profiles(runner: TestCliRunner):
+    """
+    There must be a profile to query.
+    """
+    result: Result = runner.invoke(["db", "explain"])
+
+    assert result.exit_code == 1
+    assert "no profiles" in result.stdout
@@ -1,5 +1,6 @@
 from pathlib import Path
 
+import httpx
 import orjson
 import pytest
 from click.testing import Result
@@ -8,6 +9,7 @@ from pytest_httpx import HTTPXMock
 from cli.async_support import embed_event_loop
 from cli.commands.generate import extract_profile
 from cli.pytest_utils import TestCliRunner
+from dev.synthetic import SyntheticDataGenerator, to_raw_profile
 from models.profile import Profile
 from services import get_service
 from services.profile import ProfileService
@@ -83,6 +85,7 @@ def test_extract_profile_with_id(mock_api_data: dict):
 
 
 def test_generate_profiles_happy_path(
+    hash_outside_transactions,
     mock_api_response: dict,
     profiles: list[Profile],
     runner: TestCliRunner,
@@ -92,17 +95,7 @@ def test_generate_profiles_happy_path(
     """
     result = runner.invoke(["generate", "profiles"])
     assert result.exception is None
-
-    # This command outputs lots of stuff, but what we're really interested in is
-    # confirming that it found the correct profiles in the API response.
-    # Note: these values come from ``./generate/mock_api_response.json``.
-    assert (
-        "Welcome Arthur Wang!\n"
-        "Welcome Florence Walker!\n"
-        "Welcome Molly Jones!\n"
-        "Welcome Jake Green!\n"
-        "Welcome Nathaniel Edwards!"
-    ) in result.stdout
+    assert "Added 5 profiles (0 duplicates skipped)" in result.stdout
 
     # ``pytest-asyncio`` runs an event loop for async test functions, which causes an
     # error when trying to run the async ``generate_profiles()`` command (can't have
@@ -122,10 +115,17 @@ def test_generate_profiles_happy_path(
                 )
             ]
 
-            assert await profile_service.load_profiles(session) == [
-                *profiles,
-                *new_profiles,
-            ]
+            saved = await profile_service.load_profiles(session)
+
+            # Passwords are hashed before they are saved.
+            for profile, new_profile in zip(saved[len(profiles) :], new_profiles):
+                check = await profile_service.credentials.verify(
+                    new_profile.password, profile.password
+                )
+                assert check.ok
+                new_profile.password = profile.password
+
+            assert saved == [*profiles, *new_profiles]
 
     verify()
 
@@ -143,3 +143,151 @@ def test_generate_profiles_error(
     result: Result = runner.invoke(["generate", "profiles"])
     assert isinstance(result.exception, ValueError)
     assert str(result.exception) == error
+
+
+@pytest.fixture(name="mock_api_pages")
+def fixture_mock_api_pages(httpx_mock: HTTPXMock) -> list[httpx.Request]:
+    """
+    Mocks the Random User Generator API, returning different (but repeatable) profiles
+    for each page of results.
+
+    :returns: list that the mock API appends each request to.
+    """
+    requests = []
+
+    def callback(request: httpx.Request) -> httpx.Response:
+        requests.append(request)
+        page = int(request.url.params["page"])
+        size = int(request.url.params["results"])
+
+        (batch,) = SyntheticDataGenerator(seed=page, batch_size=size).batches(
+            size, start=page * 1000
+        )
+        return httpx.Response(
+            200, json={"results": [to_raw_profile(row) for row in batch.profiles]}
+        )
+
+    httpx_mock.add_callback(callback)
+    yield requests
+
+
+def test_generate_profiles_chunks(
+    mock_api_pages: list[httpx.Request], runner: TestCliRunner
+):
+    """
+    Fetching profiles in chunks, and saving each chunk as it arrives.
+    """
+    result: Result = runner.invoke(
+        ["generate", "profiles", "12", "--chunk-size=5", "--concurrency=2"]
+    )
+    assert result.exception is None
+    assert "Added 12 profiles" in result.stdout
+
+    # Every chunk uses the same seed, so that chunks can be fetched again when resuming.
+    assert sorted(
+        (request.url.params["page"], request.url.params["results"])
+        for request in mock_api_pages
+    ) == [("1", "5"), ("2", "5"), ("3", "2")]
+    assert len({request.url.params["seed"] for request in mock_api_pages}) == 1
+
+    @embed_event_loop
+    async def verify():
+        profile_service: ProfileService = get_service(ProfileService)
+        async with profile_service.session() as session:
+            assert len(await profile_service.load_profiles(session)) == 12
+
+    verify()
+
+
+def test_generate_profiles_duplicates(
+    mock_api_response: dict, profiles: list[Profile], runner: TestCliRunner
+):
+    """
+    Profiles with usernames that are already in the database are skipped.
+    """
+    # The mock API returns the same profiles for every chunk.
+    result: Result = runner.invoke(["generate", "profiles", "10", "--chunk-size=5"])
+    assert result.exception is None
+    assert "Added 5 profiles (5 duplicates skipped)" in result.stdout
+
+
+def test_generate_profiles_retry(
+    httpx_mock: HTTPXMock, mock_api_data: dict, runner: TestCliRunner
+):
+    """
+    Requests that fail with a temporary error are retried.
+    """
+    httpx_mock.add_response(status_code=503)
+    httpx_mock.add_response(json=mock_api_data)
+
+    result: Result = runner.invoke(["generate", "profiles", "--backoff=0"])
+    assert result.exception is None
+    assert "Added 5 profiles" in result.stdout
+    assert len(httpx_mock.get_requests()) == 2
+
+
+def test_generate_profiles_resume(
+    mock_api_pages: list[httpx.Request], runner: TestCliRunner, tmp_path: Path
+):
+    """
+    Resuming an interrupted run, skipping chunks that were already saved.
+    """
+    checkpoint = tmp_path / "checkpoint.json"
+    checkpoint.write_bytes(
+        orjson.dumps({"seed": "abc123", "chunk_size": 5, "completed": [1, 3]})
+    )
+
+    result: Result = runner.invoke(
+        ["generate", "profiles", "15", f"--checkpoint={checkpoint}"]
+    )
+    assert result.exception is None
+    assert "Added 5 profiles" in result.stdout
+
+    # Only the missing chunk was fetched, using the seed from the checkpoint.
+    (request,) = mock_api_pages
+    assert request.url.params["page"] == "2"
+    assert request.url.params["seed"] == "abc123"
+
+    # The run completed, so there's nothing left to resume.
+    assert not checkpoint.exists()
+
+
+def test_generate_synthetic(profiles: list[Profile], runner: TestCliRunner):
+    """
+    Generating synthetic profiles and awards, and bulk-inserting them into the database.
+    """
+    result: Result = runner.invoke(
+        ["generate", "synthetic", "25", "--batch-size=10", "--max-awards=5"]
+    )
+    assert result.exception is None
+    assert "Generated 25 profiles" in result.stdout
+
+    @embed_event_loop
+    async def verify():
+        profile_service: ProfileService = get_service(ProfileService)
+        async with profile_service.session() as session:
+            all_profiles = await profile_service.load_profiles(session)
+
+        assert len(all_profiles) == len(profiles) + 25
+        assert all(len(profile.awards) <= 5 for profile in all_profiles)
+
+        # Usernames continue from the existing profiles.
+        assert all_profiles[-1].username.endswith(f"{len(profiles) + 25:06d}")
+
+    verify()
+
+
+def test_generate_synthetic_output(runner: TestCliRunner, tmp_path: Path):
+    """
+    Writing synthetic profiles to a file, in Random User Generator API format.
+    """
+    output = tmp_path / "profiles.ndjson"
+
+    result: Result = runner.invoke(["generate", "synthetic", "5", f"--output={output}"])
+    assert result.exception is None
+
+    with open(output, "rb") as f:
+        raw_profiles = [orjson.loads(line) for line in f]
+
+    assert len(raw_profiles) == 5
+    assert all(isinstance(extract_profile(raw), Profile) for raw in raw_profiles)
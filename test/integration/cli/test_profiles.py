@@ -1,3 +1,5 @@
+import csv
+import gzip
 from pathlib import Path
 from tempfile import NamedTemporaryFile
 
@@ -6,9 +8,14 @@ import pytest
 from click.testing import Result
 from pydantic import ValidationError
 
+from api.pytest_utils import assert_max_queries
+from cli.async_support import embed_event_loop
 from cli.pytest_utils import TestCliRunner
 from models.base import model_encoder
 from models.profile import Profile
+from services import get_service
+from services.credentials import is_password_hash
+from services.profile import EditAwardRequest, ProfileService
 
 
 @pytest.fixture(name="data_filepath")
@@ -67,10 +74,11 @@ def test_update_profile_happy_path(
     )
 
     assert result.exception is None
-    assert orjson.loads(result.stdout) == {
+    actual = orjson.loads(result.stdout)
+    assert is_password_hash(actual.pop("password"))
+    assert actual == {
         "id": target_profile.id,
         "username": "calmcat451",
-        "password": "shortjane",
         "gender": "female",
         "full_name": "Ethel Chen",
         "street_address": "3775 Deerswim Lane",
@@ -138,4 +146,290 @@ def test_create_profile_happy_path(
     result: Result = runner.invoke(["profiles", "create", data_filepath])
 
     assert result.exception is None
-    assert orjson.loads(result.stdout) == model_encoder(expected)
+    actual = orjson.loads(result.stdout)
+    assert is_password_hash(actual["password"])
+    expected.password = actual["password"]
+    assert actual == model_encoder(expected)
+
+
+def _profile_row(username: str, **overrides) -> dict:
+    return {
+        "username": username,
+        "password": "shortjane",
+        "gender": "female",
+        "full_name": "Ethel Chen",
+        "street_address": "3775 Deerswim Lane",
+        "email": f"{username}@example.com",
+        **overrides,
+    }
+
+
+def test_import_profiles_ndjson(
+    hash_outside_transactions,
+    profiles: list[Profile],
+    runner: TestCliRunner,
+    tmp_path: Path,
+):
+    """
+    Importing profiles from an NDJSON file, rejecting invalid rows.
+    """
+    path = tmp_path / "profiles.ndjson"
+    path.write_bytes(
+        b"\n".join(
+            [
+                orjson.dumps(_profile_row("calmcat451")),
+                orjson.dumps({"username": "incomplete"}),
+                b"{not json",
+                orjson.dumps(_profile_row("calmcat451", full_name="Duplicate")),
+                orjson.dumps(_profile_row(profiles[0].username)),
+                orjson.dumps(_profile_row("sleepyowl123")),
+            ]
+        )
+    )
+
+    result: Result = runner.invoke(["profiles", "import", str(path), "--batch-size=4"])
+    assert result.exception is None
+    assert "Imported 2 profiles" in result.stdout
+    assert "Rejected 4 rows" in result.stdout
+
+    rejects_path = tmp_path / "profiles.ndjson.rejects.ndjson"
+    rejects = [orjson.loads(line) for line in rejects_path.read_bytes().splitlines()]
+
+    assert [reject["line"] for reject in rejects] == [3, 2, 4, 5]
+    assert rejects[0]["errors"][0].startswith("invalid JSON")
+    assert "password: Field required" in rejects[1]["errors"]
+    assert rejects[2]["errors"] == ["duplicate username in file"]
+    assert rejects[3]["errors"] == ["username already exists"]
+
+    result = runner.invoke(["profiles", "get", str(len(profiles) + 2)])
+    imported = orjson.loads(result.stdout)
+    assert imported["username"] == "sleepyowl123"
+    assert is_password_hash(imported["password"])
+
+    # Passwords that are already hashed (e.g., exported profiles) are kept as-is.
+    path.write_bytes(
+        orjson.dumps(_profile_row("angrybee7", password=imported["password"]))
+    )
+    runner.invoke(["profiles", "import", str(path)])
+    result = runner.invoke(["profiles", "get", str(len(profiles) + 3)])
+    assert orjson.loads(result.stdout)["password"] == imported["password"]
+
+
+def test_import_profiles_csv_upsert(
+    hash_outside_transactions,
+    profiles: list[Profile],
+    runner: TestCliRunner,
+    tmp_path: Path,
+):
+    """
+    Importing profiles from a gzipped CSV file, updating existing profiles.
+    """
+    target_profile = profiles[0]
+    rows = [
+        _profile_row(target_profile.username, full_name="Updated Name"),
+        _profile_row("calmcat451"),
+    ]
+
+    path = tmp_path / "profiles.csv.gz"
+    with gzip.open(path, "wt", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=list(rows[0].keys()))
+        writer.writeheader()
+        writer.writerows(rows)
+
+    result: Result = runner.invoke(["profiles", "import", str(path), "--upsert"])
+    assert result.exception is None
+    assert "Imported 2 profiles" in result.stdout
+    assert not (tmp_path / "profiles.csv.gz.rejects.ndjson").exists()
+
+    result = runner.invoke(["profiles", "get", str(target_profile.id)])
+    assert orjson.loads(result.stdout)["full_name"] == "Updated Name"
+
+    result = runner.invoke(["profiles", "get", str(len(profiles) + 1)])
+    assert orjson.loads(result.stdout)["username"] == "calmcat451"
+
+
+def test_export_profiles_ndjson(profiles: list[Profile], runner: TestCliRunner):
+    """
+    Exporting profiles (with awards) to stdout, in NDJSON format.
+    """
+
+    @embed_event_loop
+    async def add_award():
+        profile_service: ProfileService = get_service(ProfileService)
+        async with profile_service.session() as session:
+            await profile_service.bestow_award(
+                session, profiles[1].id, EditAwardRequest(title="SQLAlchemist")
+            )
+            await session.commit()
+
+    add_award()
+
+    # Use a tiny chunk size, to check that awards end up with the right profiles.
+    result: Result = runner.invoke(["profiles", "export", "--chunk-size=2"])
+    assert result.exception is None
+
+    exported = [orjson.loads(line) for line in result.stdout.splitlines()]
+    expected = [
+        orjson.loads(runner.invoke(["profiles", "get", str(profile.id)]).stdout)
+        for profile in profiles
+    ]
+
+    assert exported == expected
+    assert exported[1]["awards"][0]["title"] == "SQLAlchemist"
+
+
+def test_export_profiles_csv(
+    profiles: list[Profile], runner: TestCliRunner, tmp_path: Path
+):
+    """
+    Exporting profiles (without awards) to a gzipped CSV file.
+    """
+    output = tmp_path / "profiles.csv.gz"
+
+    result: Result = runner.invoke(
+        ["profiles", "export", f"--output={output}", "--no-awards"]
+    )
+    assert result.exception is None
+
+    with gzip.open(output, "rt", newline="") as f:
+        rows = list(csv.DictReader(f))
+
+    assert rows == [
+        {
+            key: str(value)
+            for key, value in model_encoder(profile).items()
+            if key != "awards"
+        }
+        for profile in profiles
+    ]
+
+
+def test_get_many_profiles(profiles: list[Profile], runner: TestCliRunner):
+    """
+    Fetching many profiles at once, reporting IDs that don't exist.
+    """
+    ids = [profiles[2].id, 999, profiles[0].id]
+
+    # Two queries per chunk (profiles, then their awards).
+    with assert_max_queries(4):
+        result: Result = runner.invoke(
+            ["profiles", "get-many", *map(str, ids), "--chunk-size=2"]
+        )
+    assert result.exit_code == 1
+
+    lines = result.stdout.splitlines()
+    assert "No profile exists with ID 999" in lines
+
+    assert [orjson.loads(line) for line in lines if line.startswith("{")] == [
+        model_encoder(profiles[2]),
+        model_encoder(profiles[0]),
+    ]
+
+
+def test_get_many_profiles_stdin(profiles: list[Profile], runner: TestCliRunner):
+    """
+    Reading IDs from stdin.
+    """
+    result: Result = runner.invoke(
+        ["profiles", "get-many", "--ids-file=-"],
+        input="".join(f"{profile.id}\n" for profile in profiles),
+    )
+    assert result.exit_code == 0
+
+    assert [orjson.loads(line) for line in result.stdout.splitlines()] == [
+        model_encoder(profile) for profile in profiles
+    ]
+
+
+def test_update_many_profiles(
+    hash_outside_transactions,
+    profiles: list[Profile],
+    runner: TestCliRunner,
+    tmp_path: Path,
+):
+    """
+    Updating many profiles from an NDJSON file, in multiple transactions.
+    """
+    path = tmp_path / "updates.ndjson"
+    path.write_bytes(
+        b"\n".join(
+            orjson.dumps({"id": id, **_profile_row(f"updated{id}")})
+            for id in (profiles[0].id, profiles[2].id, 999)
+        )
+    )
+
+    result: Result = runner.invoke(
+        ["profiles", "update-many", str(path), "--batch-size=2"]
+    )
+    assert result.exit_code == 1
+    assert "No profile exists with ID 999" in result.stdout
+
+    updated = [
+        orjson.loads(line)["username"]
+        for line in result.stdout.splitlines()
+        if line.startswith("{")
+    ]
+    assert updated == [f"updated{profiles[0].id}", f"updated{profiles[2].id}"]
+
+    result = runner.invoke(["profiles", "get", str(profiles[2].id)])
+    assert orjson.loads(result.stdout)["username"] == f"updated{profiles[2].id}"
+
+
+def test_update_many_profiles_directory(
+    profiles: list[Profile], runner: TestCliRunner, tmp_path: Path
+):
+    """
+    Updating many profiles from a directory of JSON files, reporting invalid data.
+    """
+    (tmp_path / f"{profiles[1].id}.json").write_bytes(
+        orjson.dumps(_profile_row("renamed"))
+    )
+    (tmp_path / f"{profiles[0].id}.json").write_bytes(
+        orjson.dumps({"username": "incomplete"})
+    )
+
+    (tmp_path / f"{profiles[2].id}.json").write_bytes(b"{not json")
+    (tmp_path / "notes.json").write_bytes(orjson.dumps(_profile_row("notes")))
+
+    result: Result = runner.invoke(["profiles", "update-many", str(tmp_path)])
+    assert result.exit_code == 1
+    assert f"Invalid data for profile {profiles[0].id}" in result.stdout
+    assert f"Invalid JSON for profile {profiles[2].id}" in result.stdout
+    assert "Invalid profile ID in filename 'notes.json'" in result.stdout
+
+    result = runner.invoke(["profiles", "get", str(profiles[1].id)])
+    assert orjson.loads(result.stdout)["username"] == "renamed"
+
+
+def test_update_many_profiles_malformed(
+    profiles: list[Profile], runner: TestCliRunner, tmp_path: Path
+):
+    """
+    Updates that can't be read are reported, without stopping the other updates.
+    """
+    path = tmp_path / "updates.ndjson"
+    path.write_bytes(
+        b"\n".join(
+            [
+                b"{not json",
+                orjson.dumps(_profile_row("noid")),
+                orjson.dumps({"id": "first", **_profile_row("badid")}),
+                orjson.dumps([1, 2, 3]),
+                orjson.dumps({"id": profiles[1].id, **_profile_row("renamed")}),
+            ]
+        )
+    )
+
+    result: Result = runner.invoke(["profiles", "update-many", str(path)])
+    assert result.exit_code == 1
+    assert result.exception is None or isinstance(result.exception, SystemExit)
+    assert "Invalid JSON on line 1" in result.stdout
+    assert "Missing profile ID on line 2" in result.stdout
+    assert "Invalid profile ID on line 3" in result.stdout
+    assert "Missing profile ID on line 4" in result.stdout
+
+    result = runner.invoke(["profiles", "get", str(profiles[1].id)])
+    assert orjson.loads(result.stdout)["username"] == "renamed"
+
+    # Batch edits are counted, like edits from the API.
+    assert get_service(ProfileService).profiles_edited.value == 1
@@ -0,0 +1,31 @@
+"""
+Integration tests for the global ``--profile`` option.
+"""
+import pstats
+from pathlib import Path
+
+from click.testing import Result
+
+from cli.pytest_utils import TestCliRunner
+from models.profile import Profile
+from services.config import TestConfig
+
+
+def test_profile_command(
+    monkeypatch, profiles: list[Profile], runner: TestCliRunner, tmp_path: Path
+):
+    """
+    Profiling a command, and saving the results to a file.
+    """
+    monkeypatch.setattr(TestConfig, "profile_dir", tmp_path)
+    target_profile: Profile = profiles[0]
+
+    result: Result = runner.invoke(
+        ["--profile", "deterministic", "profiles", "get", str(target_profile.id)]
+    )
+    assert result.exception is None
+
+    (path,) = tmp_path.iterdir()
+    assert f"Saving profile to {path}" in result.stdout
+    assert path.suffix == ".prof"
+    assert any(func[2] == "get_profile" for func in pstats.Stats(str(path)).stats)
@@ -0,0 +1,73 @@
+"""
+Integration tests for ``app-cli serve``.
+
+The server forks worker processes, so it runs in a subprocess, rather than via the CLI
+runner.
+"""
+import os
+import signal
+import socket
+import subprocess
+import sys
+import time
+
+import httpx
+import pytest
+
+# How long to wait for the server to start or stop (seconds).
+TIMEOUT = 15
+
+
+@pytest.fixture(name="port")
+def fixture_port() -> int:
+    """
+    Finds a free port for the server to listen on.
+    """
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def wait_for_server(url: str, server: subprocess.Popen) -> None:
+    deadline = time.monotonic() + TIMEOUT
+    while time.monotonic() < deadline:
+        assert server.poll() is None, "Server exited before it started"
+        try:
+            httpx.get(url)
+            return
+        except httpx.TransportError:
+            time.sleep(0.1)
+
+    pytest.fail("Server didn't start in time")
+
+
+def test_serve(port: int):
+    """
+    Serving requests from multiple workers, replacing each worker after it has handled
+    ``--max-requests`` requests.
+    """
+    url = f"http://127.0.0.1:{port}/v1/"
+    server = subprocess.Popen(
+        [sys.executable, "-m", "cli.main", "serve", f"--port={port}", "--workers=2"]
+        + ["--max-requests=2", "--max-requests-jitter=0"],
+        env={**os.environ, "PY_ENV": "test"},
+        stdout=subprocess.PIPE,
+        stderr=subprocess.STDOUT,
+        text=True,
+    )
+
+    try:
+        wait_for_server(url, server)
+
+        # Replacements are forked from the master, so they can handle requests
+        # straight away, and retiring workers don't drop connections that they have
+        # already accepted, so no requests are lost while workers are replaced.
+        for _ in range(40):
+            assert httpx.get(url).status_code == 200
+    finally:
+        server.send_signal(signal.SIGTERM)
+        output, _ = server.communicate(timeout=TIMEOUT)
+
+    assert server.returncode == 0, output
+    assert "replacing it" in output
+    assert output.count("Application shutdown complete") >= 4
@@ -0,0 +1,78 @@
+"""
+Integration tests for ``app-cli shell``.
+"""
+import asyncio
+
+import orjson
+from click.testing import Result
+
+from cli.async_support import embed_event_loop, persistent_event_loop
+from cli.pytest_utils import TestCliRunner
+from models.base import model_encoder
+from models.profile import Profile
+
+
+def test_shell(profiles: list[Profile], runner: TestCliRunner):
+    """
+    Running several commands in one process, carrying on after a command fails.
+    """
+    script = "\n".join(
+        [
+            f"profiles get {profiles[0].id}",
+            "# Comments and blank lines are ignored.",
+            "",
+            "profiles get 999",
+            f"profiles get-many {profiles[1].id} {profiles[2].id}",
+        ]
+    )
+
+    result: Result = runner.invoke(["shell", "--timing"], input=script)
+    assert result.exit_code == 1
+
+    # The failed command's error is reported, but doesn't stop the shell.
+    assert "No profile exists with ID 999" in result.stdout
+    assert result.stdout.count(" ms)") == 3
+
+    # ``profiles get`` output is indented, so we only check the ``get-many`` output.
+    lines = result.stdout.splitlines()
+    assert [orjson.loads(line) for line in lines if line.startswith('{"')] == [
+        model_encoder(profiles[1]),
+        model_encoder(profiles[2]),
+    ]
+
+
+def test_shell_stop_on_error(profiles: list[Profile], runner: TestCliRunner):
+    """
+    Stopping at the first command that fails.
+    """
+    script = f"profiles get 999\nprofiles get-many {profiles[0].id}\n"
+
+    result: Result = runner.invoke(["shell", "--stop-on-error"], input=script)
+    assert result.exit_code == 1
+    assert profiles[0].username not in result.stdout
+
+
+def test_shell_usage_error(runner: TestCliRunner):
+    """
+    Mistyped commands are reported without stopping the shell.
+    """
+    result: Result = runner.invoke(["shell"], input="profiles frobnicate\nexit\n")
+
+    assert result.exit_code == 1
+    assert "No such command 'frobnicate'" in result.stdout
+
+
+def test_persistent_event_loop():
+    """
+    Async commands share the same event loop while a persistent loop is running.
+    """
+
+    @embed_event_loop
+    async def get_loop():
+        return asyncio.get_running_loop()
+
+    with persistent_event_loop() as loop:
+        assert get_loop() is loop
+        assert get_loop() is loop
+
+    assert get_loop() is not loop
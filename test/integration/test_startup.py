@@ -0,0 +1,112 @@
+"""
+Startup budgets for the CLI and API.
+
+Each check imports the entry point in a fresh interpreter.  By default, the budgets are
+for the number of modules that the import loads, which doesn't depend on how busy the
+machine is.  Budgets can be overridden using the ``CLI_MODULE_BUDGET`` and
+``API_MODULE_BUDGET`` environment variables (e.g., after upgrading a dependency that
+imports more of its own modules).
+
+Wall clock budgets (in seconds) are only checked when the ``STARTUP_TIMING``
+environment variable is set, e.g. on a quiet machine::
+
+   STARTUP_TIMING=1 pytest test/integration/test_startup.py
+
+They can be overridden using the ``CLI_STARTUP_BUDGET`` and ``API_STARTUP_BUDGET``
+environment variables.
+"""
+import subprocess
+import sys
+from os import getenv
+
+import orjson
+import pytest
+
+# Number of times to run each measurement.  We take the fastest run, to smooth out noise
+# from whatever else is running on the machine.
+RUNS = 3
+
+# Modules that the CLI should not import until a command that needs them is invoked.
+DEFERRED_CLI_MODULES = ["httpx", "models", "services", "sqlalchemy"]
+
+
+def measure_startup(module: str) -> dict:
+    """
+    Imports a module in a fresh interpreter.
+
+    :returns: dict with the time taken to import the module (``seconds``) and the names
+        of the modules that were loaded as a result (``modules``).
+    """
+    script = (
+        "import sys, time, orjson\n"
+        "loaded = set(sys.modules)\n"
+        "start = time.perf_counter()\n"
+        f"import {module}\n"
+        "elapsed = time.perf_counter() - start\n"
+        "sys.stdout.buffer.write(orjson.dumps("
+        "{'seconds': elapsed, 'modules': [m for m in sys.modules if m not in loaded]}"
+        "))\n"
+    )
+
+    result = subprocess.run(
+        [sys.executable, "-c", script], capture_output=True, check=True
+    )
+    return orjson.loads(result.stdout)
+
+
+def fastest_startup(module: str) -> float:
+    """
+    :returns: the fastest import time for the module, out of :py:data:`RUNS` attempts.
+    """
+    return min(measure_startup(module)["seconds"] for _ in range(RUNS))
+
+
+def test_cli_defers_command_imports():
+    """
+    Loading the CLI doesn't import the dependencies for any of its commands.
+    """
+    modules = measure_startup("cli.main")["modules"]
+
+    for name in DEFERRED_CLI_MODULES:
+        assert name not in modules
+
+
+@pytest.mark.parametrize(
+    "module, budget_env_var, default_budget",
+    [
+        ("cli.main", "CLI_MODULE_BUDGET", 350),
+        ("api.main", "API_MODULE_BUDGET", 550),
+    ],
+)
+def test_module_budget(module: str, budget_env_var: str, default_budget: int):
+    """
+    Importing the entry point doesn't load more modules than its budget.
+    """
+    budget = int(getenv(budget_env_var, default_budget))
+
+    modules = measure_startup(module)["modules"]
+    assert (
+        len(modules) <= budget
+    ), f"{module} imported {len(modules)} modules (budget {budget})"
+
+
+@pytest.mark.skipif(
+    not getenv("STARTUP_TIMING"), reason="set STARTUP_TIMING=1 to check startup times"
+)
+@pytest.mark.parametrize(
+    "module, budget_env_var, default_budget",
+    [
+        ("cli.main", "CLI_STARTUP_BUDGET", 0.5),
+        ("api.main", "API_STARTUP_BUDGET", 2.0),
+    ],
+)
+def test_startup_budget(module: str, budget_env_var: str, default_budget: float):
+    """
+    Importing the entry point finishes within its budget.
+    """
+    budget = float(getenv(budget_env_var, default_budget))
+
+    elapsed = fastest_startup(module)
+    assert (
+        elapsed <= budget
+    ), f"{module} took {elapsed:.3f}s to import (budget {budget}s)"
@@ -0,0 +1,62 @@
+"""
+Unit tests for the prefork server.
+"""
+import gc
+import os
+import socket
+
+import pytest
+import uvicorn
+
+from api import prefork
+from api.prefork import PreforkServer
+
+
+# pytest-asyncio's event loop runs threads (e.g., aiosqlite's), but the child doesn't
+# use them.
+@pytest.mark.filterwarnings("ignore:This process .* is multi-threaded")
+def test_worker_gc(monkeypatch: pytest.MonkeyPatch):
+    """
+    Workers run with the garbage collector enabled, even though the master disables it
+    while forking them.
+    """
+    read_fd, write_fd = os.pipe()
+
+    class FakeServer:
+        def __init__(self, config: uvicorn.Config):
+            pass
+
+        def run(self, sockets: list[socket.socket]) -> None:
+            os.write(write_fd, b"1" if gc.isenabled() else b"0")
+
+    monkeypatch.setattr(prefork, "WorkerServer", FakeServer)
+
+    server = PreforkServer("api.main:app", workers=1)
+    with socket.socket() as sock:
+        gc.disable()
+        try:
+            server._spawn(sock)
+        finally:
+            gc.enable()
+
+    (pid,) = server.children
+    _, status = os.waitpid(pid, 0)
+    os.close(write_fd)
+
+    assert os.waitstatus_to_exitcode(status) == 0
+    assert os.read(read_fd, 1) == b"1"
+    os.close(read_fd)
+
+
+def test_no_workers_after_stop():
+    """
+    Workers aren't started once the server has been told to stop (e.g., by a signal
+    that arrived while it was starting the first workers).
+    """
+    server = PreforkServer("api.main:app", workers=1)
+    server.stopping = True
+
+    with socket.socket() as sock:
+        server._spawn(sock)
+
+    assert not server.children
@@ -0,0 +1,155 @@
+from itertools import chain, repeat
+
+import pytest
+from sqlalchemy import (
+    Connection,
+    Engine,
+    bindparam,
+    create_engine,
+    insert,
+    select,
+    update,
+)
+from sqlalchemy.pool import StaticPool
+
+from dev.services.migration import Backfill, MigrationService, backfill_checkpoints
+from models import Profile
+from models.base import Base
+
+profiles = Profile.__table__
+
+
+@pytest.fixture(name="engine")
+def fixture_engine() -> Engine:
+    """
+    Creates a (synchronous) database with some profiles, like a migration would use.
+    """
+    engine = create_engine("sqlite://", poolclass=StaticPool)
+
+    with engine.begin() as connection:
+        Base.metadata.create_all(connection)
+        connection.execute(
+            insert(profiles),
+            [
+                {
+                    "username": f"user{i}",
+                    "password": "longjohn",
+                    "gender": "male",
+                    "full_name": "Ethan Chen",
+                    "street_address": "5723 Crawford Street",
+                    "email": "ethan.chen@example.com",
+                }
+                for i in range(25)
+            ],
+        )
+
+    yield engine
+    engine.dispose()
+
+
+def upper_case_usernames(connection: Connection, rows) -> None:
+    connection.execute(
+        update(profiles).where(profiles.c.id == bindparam("key")),
+        [{"key": row.id, "username": row.username.upper()} for row in rows],
+    )
+
+
+def usernames(engine: Engine) -> list[str]:
+    with engine.connect() as connection:
+        return connection.scalars(select(profiles.c.username)).all()
+
+
+def make_backfill(**kwargs) -> Backfill:
+    return Backfill(
+        "upper-usernames",
+        profiles,
+        upper_case_usernames,
+        columns=["username"],
+        batch_size=10,
+        **kwargs,
+    )
+
+
+def test_run_backfill(engine: Engine):
+    """
+    Processes every row in batches, and checkpoints progress.
+    """
+    progress = MigrationService.run_backfill(engine, make_backfill())
+
+    assert (progress.rows, progress.batches, progress.last_key) == (25, 3, 25)
+    assert all(u.isupper() for u in usernames(engine))
+
+    with engine.connect() as connection:
+        checkpoint = connection.execute(select(backfill_checkpoints)).one()
+    assert (checkpoint.name, checkpoint.last_key, checkpoint.rows) == (
+        "upper-usernames",
+        25,
+        25,
+    )
+
+    # Running it again only processes new rows.
+    assert MigrationService.run_backfill(engine, make_backfill()).rows == 0
+
+
+def test_resume(engine: Engine):
+    """
+    An interrupted backfill resumes after the last batch that was committed.
+    """
+    batches = []
+
+    def fail_on_second_batch(connection: Connection, rows) -> None:
+        batches.append([row.id for row in rows])
+        upper_case_usernames(connection, rows)
+        if len(batches) == 2:
+            raise RuntimeError("Interrupted")
+
+    backfill = make_backfill()
+    backfill.process = fail_on_second_batch
+
+    with pytest.raises(RuntimeError):
+        MigrationService.run_backfill(engine, backfill)
+
+    # The second batch was rolled back.
+    assert sum(u.isupper() for u in usernames(engine)) == 10
+
+    progress = MigrationService.run_backfill(engine, backfill)
+
+    assert batches[2] == list(range(11, 21))
+    assert (progress.rows, progress.last_key) == (15, 25)
+    assert all(u.isupper() for u in usernames(engine))
+
+
+def test_dry_run(engine: Engine):
+    """
+    A dry run estimates how long the backfill will take, without changing anything.
+    """
+    progress = MigrationService.run_backfill(
+        engine, make_backfill(max_rate=100), dry_run=True
+    )
+
+    assert (progress.rows, progress.batches) == (25, 3)
+    # Throttling limits each batch to at least 0.1 seconds.
+    assert progress.elapsed >= 0.3
+    assert not any(u.isupper() for u in usernames(engine))
+
+
+def test_throttle(engine: Engine):
+    """
+    Waits between batches to stay under the maximum rate, and while the lag is too
+    high.
+    """
+    lags = chain([5.0, 2.0], repeat(0.0))
+    delays = []
+
+    progress = MigrationService.run_backfill(
+        engine,
+        make_backfill(max_rate=1, lag=lambda _: next(lags), max_lag=1.0),
+        sleep=delays.append,
+    )
+
+    assert progress.rows == 25
+    # Waited twice for the lag (before the first batch), then after each batch for
+    # the rate limit.
+    assert delays[:2] == [1.0, 1.0]
+    assert len(delays) == 5
+    assert progress.throttled == pytest.approx(sum(delays))
@@ -0,0 +1,80 @@
+"""
+Unit tests for the benchmark helpers.
+"""
+from dataclasses import replace
+from pathlib import Path
+
+from dev.benchmark import (
+    BenchmarkResult,
+    LatencyStats,
+    compare_results,
+    load_results,
+    save_result,
+)
+
+BASELINE = BenchmarkResult(
+    name="GET /v1",
+    requests=100,
+    concurrency=10,
+    throughput=1000.0,
+    p50=1.0,
+    p95=2.0,
+    p99=4.0,
+    errors=0,
+    dataset={"profiles": 10, "awards_per_profile": 1},
+)
+
+
+def test_percentiles():
+    """
+    Percentiles use the nearest-rank method, and are reported in milliseconds.
+    """
+    stats = LatencyStats()
+    for i in range(1, 101):
+        stats.record(i / 1000, ok=i % 10 != 0)
+
+    assert stats.summary() == {"p50": 50.0, "p95": 95.0, "p99": 99.0}
+    assert stats.error_rate == 0.1
+
+
+def test_compare_within_tolerance():
+    """
+    Small fluctuations don't count as regressions.
+    """
+    result = replace(BASELINE, throughput=950.0, p95=2.1)
+    assert compare_results(BASELINE, result, tolerance=0.1) == []
+
+
+def test_compare_regression():
+    """
+    Results that are worse than the baseline by more than the tolerance are reported.
+    """
+    result = replace(BASELINE, throughput=800.0, p99=5.0)
+    regressions = compare_results(BASELINE, result, tolerance=0.1)
+
+    assert len(regressions) == 2
+    assert "throughput" in regressions[0]
+    assert "p99" in regressions[1]
+
+
+def test_compare_different_dataset():
+    """
+    Results for a different dataset can't be compared with the baseline.
+    """
+    result = replace(BASELINE, throughput=1.0, dataset={"profiles": 10000})
+    assert compare_results(BASELINE, result, tolerance=0.1) == []
+
+
+def test_save_and_load(tmp_path: Path):
+    """
+    Saving a result adds it to the file, replacing any previous result for the same
+    benchmark.
+    """
+    path = tmp_path / "baseline.json"
+    other = replace(BASELINE, name="GET /v1/profile/{profile_id}")
+
+    save_result(path, replace(BASELINE, throughput=1.0))
+    save_result(path, other)
+    save_result(path, BASELINE)
+
+    assert load_results(path) == {BASELINE.name: BASELINE, other.name: other}
@@ -0,0 +1,78 @@
+import sqlite3
+
+import pytest
+from sqlalchemy import inspect
+
+from dev.services.migration import MigrationService
+from models import Profile
+from models.base import Base
+from services import ProfileService, get_service
+
+
+def table_names(connection: sqlite3.Connection, type_: str = "table") -> set[str]:
+    return {
+        name
+        for (name,) in connection.execute(
+            "SELECT name FROM sqlite_master WHERE type = ?", (type_,)
+        )
+    }
+
+
+@pytest.mark.parametrize("from_migrations", [False, True])
+def test_create_template(from_migrations: bool):
+    """
+    Building the template from the models or the migrations gives the same tables.
+    """
+    template = MigrationService.create_template(from_migrations=from_migrations)
+
+    try:
+        tables = table_names(template)
+        indexes = table_names(template, "index")
+    finally:
+        template.close()
+
+    assert set(Base.metadata.tables) <= tables
+    assert {
+        index.name for table in Base.metadata.tables.values() for index in table.indexes
+    } <= indexes
+    assert ("alembic_version" in tables) is from_migrations
+
+
+async def test_copy_template(db_template: sqlite3.Connection):
+    """
+    Each test gets its own copy of the template, so changes don't leak into it.
+    """
+    service: ProfileService = get_service(ProfileService)
+
+    async with service.db.engine.connect() as connection:
+        tables = await connection.run_sync(
+            lambda conn: set(inspect(conn).get_table_names())
+        )
+    assert set(Base.metadata.tables) <= tables
+
+    async with service.session() as session:
+        session.add(
+            Profile(
+                username="angrydog315",
+                password="longjohn",
+                gender="male",
+                full_name="Ethan Chen",
+                street_address="5723 Crawford Street",
+                email="ethan.chen@example.com",
+            )
+        )
+        await session.commit()
+
+    (count,) = db_template.execute("SELECT COUNT(*) FROM profiles").fetchone()
+    assert count == 0
+
+
+def test_template_requires_sqlite(db_template: sqlite3.Connection, monkeypatch):
+    """
+    Templates can't be copied into other kinds of databases.
+    """
+    service: MigrationService = get_service(MigrationService)
+    monkeypatch.setattr(service.db.engine.sync_engine.dialect, "name", "postgresql")
+
+    with pytest.raises(ValueError):
+        service.create_tables_from_template(db_template)
@@ -0,0 +1,87 @@
+import pytest
+from sqlalchemy import select, text
+
+from api.pytest_utils import assert_no_full_scans
+from dev.query_plan import check_hot_paths
+from models.profile import Profile
+from services import DatabaseService, ProfileService, get_service
+
+
+@pytest.fixture(name="db_service")
+def fixture_db_service() -> DatabaseService:
+    yield get_service(DatabaseService)
+
+
+async def drop_award_index(db_service: DatabaseService):
+    async with db_service.engine.begin() as connection:
+        await connection.execute(text("DROP INDEX ix_awards_profile_id"))
+
+
+async def test_hot_paths(profiles: list[Profile], db_service: DatabaseService):
+    """
+    None of the hot-path queries scan a large table.
+    """
+    results = await check_hot_paths(db_service)
+
+    assert set(results) == {
+        "get_by_id",
+        "get_by_ids",
+        "get_json_by_id",
+        "edit_by_id",
+        "bestow_award",
+        "recent_awards",
+    }
+    assert all(results.values())
+    assert not [
+        issue for plans in results.values() for p in plans for issue in p.issues
+    ]
+
+    # Changes were rolled back.
+    async with db_service.session() as session:
+        assert await ProfileService.load_profiles(session) == profiles
+
+
+async def test_missing_index(profiles: list[Profile], db_service: DatabaseService):
+    """
+    Flags the scan, and suggests an index to avoid it.
+    """
+    await drop_award_index(db_service)
+
+    results = await check_hot_paths(db_service)
+    (issue,) = [issue for plan in results["get_by_id"] for issue in plan.issues]
+
+    assert issue.table == "awards"
+    assert issue.suggestions == [
+        "CREATE INDEX ix_awards_profile_id ON awards (profile_id)"
+    ]
+
+    # Only tables that are configured as large are checked.
+    results = await check_hot_paths(db_service, large_tables=["profiles"])
+    assert not results["get_by_id"][0].issues
+
+
+async def test_no_profiles(db_service: DatabaseService):
+    """
+    Hot paths need a profile to query.
+    """
+    with pytest.raises(LookupError):
+        await check_hot_paths(db_service)
+
+
+async def test_assert_no_full_scans(profiles: list[Profile]):
+    """
+    The pytest helper fails if a query inside the block scans a large table.
+    """
+    service: ProfileService = get_service(ProfileService)
+
+    async with service.session() as session:
+        async with assert_no_full_scans():
+            await service.get_by_id(session, profiles[0].id)
+
+        with pytest.raises(AssertionError) as exc_info:
+            async with assert_no_full_scans():
+                await session.scalars(
+                    select(Profile).where(Profile.email == profiles[0].email)
+                )
+
+    assert "CREATE INDEX ix_profiles_email ON profiles (email)" in str(exc_info.value)
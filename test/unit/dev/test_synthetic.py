@@ -0,0 +1,67 @@
+"""
+Unit tests for the synthetic data generator.
+"""
+from cli.commands.generate import extract_profile
+from dev.synthetic import SyntheticDataGenerator, to_raw_profile
+from models import Profile
+
+
+def test_deterministic():
+    """
+    The same seed always generates the same data.
+    """
+    first = list(SyntheticDataGenerator(seed=42, batch_size=10).batches(25))
+    second = list(SyntheticDataGenerator(seed=42, batch_size=10).batches(25))
+    other = list(SyntheticDataGenerator(seed=43, batch_size=10).batches(25))
+
+    assert [len(batch.profiles) for batch in first] == [10, 10, 5]
+    assert first == second
+    assert first != other
+
+
+def test_unique_usernames():
+    """
+    Usernames are unique, including across separate runs with different start values.
+    """
+    generator = SyntheticDataGenerator(batch_size=100)
+    usernames = [
+        profile["username"]
+        for start in (0, 1000)
+        for batch in generator.batches(1000, start=start)
+        for profile in batch.profiles
+    ]
+
+    assert len(set(usernames)) == len(usernames)
+
+
+def test_awards_power_law():
+    """
+    Most profiles get few awards, and a few profiles get lots (up to the limit).
+    """
+    generator = SyntheticDataGenerator(batch_size=1000, award_alpha=1.2, max_awards=20)
+    (batch,) = generator.batches(1000)
+    counts = sorted(len(awards) for awards in batch.awards)
+
+    assert counts[len(counts) // 2] <= 1
+    assert counts[-1] == 20
+
+
+def test_no_awards():
+    """
+    Setting ``award_alpha`` to 0 disables awards.
+    """
+    (batch,) = SyntheticDataGenerator(award_alpha=0).batches(10)
+    assert batch.award_count == 0
+
+
+def test_to_raw_profile():
+    """
+    Generated profiles can be converted to the Random User Generator API format.
+    """
+    (batch,) = SyntheticDataGenerator().batches(1)
+    (row,) = batch.profiles
+
+    raw = to_raw_profile(row, batch.awards[0])
+
+    assert extract_profile(raw) == Profile(**row)
+    assert raw["awards"] == [award["title"] for award in batch.awards[0]]
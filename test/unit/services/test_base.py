@@ -0,0 +1,325 @@
+"""
+Unit tests for the service registry.
+"""
+import asyncio
+from typing import Self
+
+import pytest
+from sqlalchemy import select
+
+from services import ConfigService, DatabaseService, ProfileService, base
+from services.base import (
+    BaseService,
+    InstantiationPolicy,
+    Lifetime,
+    ServiceDependencyError,
+    ServiceRegistry,
+    ServiceScopeError,
+    after_fork,
+    close_services,
+    get_service,
+    request_scope,
+    start_services,
+)
+
+
+@pytest.fixture(name="service_registry")
+def fixture_service_registry() -> ServiceRegistry:
+    """
+    Creates an empty service registry, so that tests can register dummy services
+    without affecting the application's registry.
+    """
+    yield ServiceRegistry()
+
+
+def test_build_graph_order(service_registry: ServiceRegistry):
+    """
+    Services are ordered so that each one comes after its dependencies.
+    """
+
+    @service_registry.register
+    class Leaf:
+        provides = "leaf"
+
+        @classmethod
+        def factory(cls):
+            return cls()
+
+    @service_registry.register
+    class Branch:
+        provides = "branch"
+
+        @classmethod
+        def factory(cls, leaf: Leaf):
+            return cls()
+
+    @service_registry.register
+    class Trunk:
+        provides = "trunk"
+
+        @classmethod
+        def factory(cls, branch: Branch, leaf: Leaf):
+            return cls()
+
+    assert service_registry.build_graph() == [Leaf, Branch, Trunk]
+    assert service_registry.dependencies(Trunk) == {"branch": Branch, "leaf": Leaf}
+
+
+def test_build_graph_cycle(service_registry: ServiceRegistry):
+    """
+    Services that depend on each other are detected before they are instantiated.
+    """
+
+    @service_registry.register
+    class Chicken:
+        provides = "chicken"
+
+    @service_registry.register
+    class Egg:
+        provides = "egg"
+
+        @classmethod
+        def factory(cls, chicken: Chicken):
+            return cls()
+
+    # ``Egg`` doesn't exist yet when ``Chicken`` is declared, so we have to attach its
+    # factory afterwards.
+    def chicken_factory(cls, egg: Egg):
+        return cls()
+
+    Chicken.factory = classmethod(chicken_factory)
+
+    with pytest.raises(ServiceDependencyError, match="Circular dependency"):
+        service_registry.build_graph()
+
+
+def test_build_graph_lifetime_mismatch(service_registry: ServiceRegistry):
+    """
+    A service cannot depend on a service that has a shorter lifetime.
+    """
+
+    @service_registry.register
+    class PerRequest:
+        provides = "per_request"
+        lifetime = Lifetime.request
+
+        @classmethod
+        def factory(cls):
+            return cls()
+
+    @service_registry.register
+    class Singleton:
+        provides = "singleton"
+        lifetime = Lifetime.singleton
+
+        @classmethod
+        def factory(cls, per_request: PerRequest):
+            return cls()
+
+    with pytest.raises(ServiceDependencyError, match="cannot depend on"):
+        service_registry.build_graph()
+
+
+def test_build_graph_missing_annotation(service_registry: ServiceRegistry):
+    """
+    A factory kwarg without an annotation is reported up front.
+    """
+
+    @service_registry.register
+    class Unannotated:
+        provides = "unannotated"
+
+        @classmethod
+        def factory(cls, config):
+            return cls()
+
+    with pytest.raises(ServiceDependencyError, match="missing an annotation"):
+        service_registry.build_graph()
+
+
+def test_build_graph_invalid_annotation(service_registry: ServiceRegistry):
+    """
+    A factory kwarg that isn't annotated with a registered service is reported up
+    front.
+    """
+
+    @service_registry.register
+    class Misannotated:
+        provides = "misannotated"
+
+        @classmethod
+        def factory(cls, config: dict):
+            return cls()
+
+    with pytest.raises(ServiceDependencyError, match="invalid annotation"):
+        service_registry.build_graph()
+
+
+def test_start_services_eager():
+    """
+    Eager instantiation creates every service up front, and records how long each one
+    took to construct.
+    """
+    order = start_services(InstantiationPolicy.eager)
+
+    assert order.index(ConfigService) < order.index(DatabaseService)
+    assert order.index(DatabaseService) < order.index(ProfileService)
+
+    for service in order:
+        assert service.provides in base._registry.construction_times
+
+    # The services have already been instantiated, so they are served from the cache.
+    assert get_service(ProfileService).db is get_service(DatabaseService)
+
+
+async def test_after_fork():
+    """
+    After forking, the database service creates its own engine.
+    """
+    db = get_service(DatabaseService)
+    engine = db.engine
+
+    after_fork()
+
+    assert db.engine is not engine
+    async with db.engine.connect() as connection:
+        assert await connection.scalar(select(1)) == 1
+
+    # Services that haven't created an engine don't create one just to discard it.
+    await db.close()
+    del db.__dict__["engine"]
+    after_fork()
+    assert "engine" not in db.__dict__
+
+
+@pytest.fixture(name="scoped_services")
+def fixture_scoped_services() -> tuple[type[BaseService], type[BaseService]]:
+    """
+    Registers a request-scoped service and a task-scoped service, and unregisters them
+    after the test.
+
+    :returns: the request-scoped and task-scoped service classes, in that order.
+    """
+
+    class RequestScoped(BaseService):
+        provides = "test_request_scoped"
+        lifetime = Lifetime.request
+
+        @classmethod
+        def factory(cls, config: ConfigService) -> Self:
+            return cls()
+
+        def __init__(self):
+            self.closed = False
+
+        async def close(self) -> None:
+            self.closed = True
+
+    class TaskScoped(RequestScoped):
+        provides = "test_task_scoped"
+        lifetime = Lifetime.task
+
+    yield RequestScoped, TaskScoped
+
+    del base._registry[RequestScoped.provides]
+    del base._registry[TaskScoped.provides]
+
+
+async def test_request_scope(scoped_services: tuple[type[BaseService], ...]):
+    """
+    Request-scoped services are shared within a scope, and closed when it ends.
+    """
+    service, _ = scoped_services
+
+    async with request_scope():
+        first = get_service(service)
+        assert get_service(service) is first
+
+        # Tasks spawned inside the scope share the same instance.
+        assert await asyncio.create_task(_get_service_async(service)) is first
+
+    assert first.closed
+
+    async with request_scope():
+        assert get_service(service) is not first
+
+
+def test_request_scope_inactive(scoped_services: tuple[type[BaseService], ...]):
+    """
+    Requesting a request-scoped service outside a request scope.
+    """
+    service, _ = scoped_services
+
+    with pytest.raises(ServiceScopeError):
+        get_service(service)
+
+
+async def test_task_scope(scoped_services: tuple[type[BaseService], ...]):
+    """
+    Each task gets its own instance of a task-scoped service, which is closed when the
+    task finishes.
+    """
+    _, service = scoped_services
+
+    first, second = await asyncio.gather(
+        _get_service_async(service, times=2),
+        _get_service_async(service, times=2),
+    )
+    assert first is not second
+
+    # Give the event loop a chance to run the cleanup tasks.
+    await asyncio.sleep(0)
+    assert first.closed
+    assert second.closed
+
+
+async def test_task_scope_closed_on_shutdown(
+    scoped_services: tuple[type[BaseService], ...]
+):
+    """
+    Closing services waits for task-scoped services that are still closing.
+    """
+    _, service = scoped_services
+
+    instance = await asyncio.create_task(_get_service_async(service))
+
+    await close_services()
+    assert instance.closed
+
+
+async def test_close_errors(scoped_services: tuple[type[BaseService], ...]):
+    """
+    If a service fails to close, the other services in the scope are still closed.
+    """
+    service, _ = scoped_services
+
+    class Broken(service):
+        provides = "test_broken"
+
+        async def close(self) -> None:
+            raise RuntimeError("Broken")
+
+    try:
+        with pytest.raises(ExceptionGroup) as exc_info:
+            async with request_scope():
+                first = get_service(service)
+                get_service(Broken)
+
+        assert first.closed
+        assert [str(e) for e in exc_info.value.exceptions] == ["Broken"]
+    finally:
+        del base._registry[Broken.provides]
+
+
+async def _get_service_async(service: type[BaseService], times: int = 1):
+    """
+    Gets a service from inside a task, checking that the same instance is returned
+    each time.
+    """
+    instance = get_service(service)
+
+    for _ in range(times - 1):
+        await asyncio.sleep(0)
+        assert get_service(service) is instance
+
+    return instance
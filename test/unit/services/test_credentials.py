@@ -0,0 +1,119 @@
+"""
+Unit tests for the credential service.
+"""
+import pytest
+
+from services import get_service
+from services.credentials import (
+    CredentialService,
+    PasswordCheck,
+    WorkFactors,
+    is_password_hash,
+)
+
+
+@pytest.fixture(name="service")
+def fixture_service() -> CredentialService:
+    """
+    Convenience alias for the CredentialService.
+    """
+    yield get_service(CredentialService)
+
+
+async def test_hash_and_verify(service: CredentialService):
+    """
+    Hashing a password, then checking it.
+    """
+    hashed = await service.hash("shortjane")
+
+    assert is_password_hash(hashed)
+    assert hashed.startswith(f"$scrypt${service.factors}$")
+    assert "shortjane" not in hashed
+
+    # Each hash has its own salt.
+    assert await service.hash("shortjane") != hashed
+
+    assert await service.verify("shortjane", hashed) == PasswordCheck(True)
+    assert await service.verify("longjohn", hashed) == PasswordCheck(False)
+
+
+async def test_hash_many(service: CredentialService):
+    """
+    Hashing passwords in batches.
+    """
+    service.batch_size = 2
+    passwords = [f"password{i}" for i in range(5)]
+
+    hashes = await service.hash_many(passwords)
+
+    assert len(set(hashes)) == 5
+    for password, hashed in zip(passwords, hashes):
+        assert (await service.verify(password, hashed)).ok
+
+    assert await service.hash_many([]) == []
+
+
+async def test_rehash_outdated(service: CredentialService):
+    """
+    Passwords hashed with old work factors are rehashed when they are verified.
+    """
+    old_hash = await service.hash("shortjane")
+    service.factors = WorkFactors(cost=5, block_size=2, parallelism=1)
+    assert service.needs_rehash(old_hash)
+
+    check = await service.verify("shortjane", old_hash)
+    assert check.ok
+    assert check.rehash.startswith("$scrypt$ln=5,r=2,p=1$")
+    assert not service.needs_rehash(check.rehash)
+
+    # Wrong passwords never get rehashed.
+    assert await service.verify("longjohn", old_hash) == PasswordCheck(False)
+
+
+async def test_upgrade_plain_text(service: CredentialService):
+    """
+    Passwords stored in plain text (from before passwords were hashed) are upgraded
+    when they are verified.
+    """
+    assert service.needs_rehash("shortjane")
+
+    check = await service.verify("shortjane", "shortjane")
+    assert check.ok
+    assert (await service.verify("shortjane", check.rehash)) == PasswordCheck(True)
+
+    assert await service.verify("longjohn", "shortjane") == PasswordCheck(False)
+
+
+@pytest.mark.parametrize(
+    "hashed",
+    [
+        "$scrypt$",
+        "$scrypt$ln=4,r=1,p=1$c2FsdA",
+        "$scrypt$ln=4,r=1$c2FsdA$a2V5",
+        "$scrypt$ln=x,r=1,p=1$c2FsdA$a2V5",
+        "$scrypt$ln=4,r=1,p=1$c2FsdA$",
+        "$scrypt$ln=4,r=1,p=1$c2FsdA$a2V5a",
+    ],
+)
+async def test_verify_malformed(service: CredentialService, hashed: str):
+    """
+    Stored hashes that are malformed (e.g., corrupted) never match.
+    """
+    assert await service.verify("shortjane", hashed) == PasswordCheck(False)
+
+
+async def test_process_pool():
+    """
+    Hashing passwords in worker processes.
+    """
+    service = CredentialService(
+        WorkFactors(cost=4, block_size=1, parallelism=1), workers=2
+    )
+
+    try:
+        hashes = await service.hash_many(["shortjane", "longjohn", "qwerty"])
+        assert (await service.verify("longjohn", hashes[1])).ok
+    finally:
+        await service.close()
+
+    assert service._executor is None
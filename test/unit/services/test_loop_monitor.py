@@ -0,0 +1,108 @@
+"""
+Unit tests for the event loop monitor.
+"""
+import asyncio
+import logging
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from services import LoopMonitorService, MetricsService, get_service
+from services.config import TestConfig
+from services.loop_monitor import current_request
+
+
+@pytest.fixture(name="service")
+def fixture_service(monkeypatch) -> LoopMonitorService:
+    """
+    Convenience alias for the LoopMonitorService, with monitoring enabled.
+    """
+    monkeypatch.setattr(TestConfig, "loop_monitor_interval", 0.01)
+    monkeypatch.setattr(TestConfig, "loop_monitor_threshold", 0.05)
+
+    yield get_service(LoopMonitorService)
+
+
+async def handle_slow_request(duration: float) -> None:
+    """
+    Simulates a request that blocks the event loop.
+    """
+    current_request.set({"route": SimpleNamespace(path="/v1/slow/{id}")})
+    time.sleep(duration)
+
+
+async def test_lag(service: LoopMonitorService):
+    """
+    The loop's lag is recorded continuously.
+    """
+    service.start()
+    await asyncio.sleep(0.05)
+    await service.close()
+
+    assert not service.running
+    assert service.lag.labels().count >= 2
+    assert not service.blocked
+
+
+async def test_blocked(service: LoopMonitorService, caplog):
+    """
+    Capturing the stack (and route) of the code that blocks the loop.
+    """
+    service.start()
+    await asyncio.sleep(0.02)
+
+    with caplog.at_level(logging.WARNING, logger="services.loop_monitor"):
+        await asyncio.create_task(handle_slow_request(0.2))
+        await asyncio.sleep(0.02)
+
+    await service.close()
+
+    (blocked,) = service.blocked
+    assert blocked.duration >= 0.15
+    assert blocked.route == "/v1/slow/{id}"
+    assert "handle_slow_request" in "".join(blocked.stack)
+
+    assert "Event loop blocked for" in caplog.text
+    assert "handle_slow_request" in caplog.text
+
+    metrics: MetricsService = get_service(MetricsService)
+    assert 'event_loop_blocked_total{route="/v1/slow/{id}"} 1.0' in metrics.render()
+
+
+async def test_debug(monkeypatch, service: LoopMonitorService, caplog):
+    """
+    In debug mode, every slow task step is logged with its route, even if it is too
+    short for the watchdog to catch.
+    """
+    service.debug = True
+    service.interval = 10.0
+
+    loop = asyncio.get_running_loop()
+    service.start()
+    assert loop.get_task_factory() is not None
+
+    with caplog.at_level(logging.WARNING, logger="services.loop_monitor"):
+        # Fast steps aren't logged.
+        await asyncio.create_task(handle_slow_request(0))
+        assert not caplog.text
+
+        await asyncio.create_task(handle_slow_request(0.06))
+
+    await service.close()
+
+    assert loop.get_task_factory() is None
+    assert not service.blocked
+    assert "Slow callback: /v1/slow/{id} blocked the event loop" in caplog.text
+    assert "handle_slow_request" in caplog.text
+    assert service.slow_steps.labels("/v1/slow/{id}").value == 1
+
+
+async def test_disabled():
+    """
+    Monitoring is disabled if the interval is 0.
+    """
+    service: LoopMonitorService = get_service(LoopMonitorService)
+
+    service.start()
+    assert not service.running
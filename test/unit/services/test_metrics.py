@@ -0,0 +1,97 @@
+"""
+Unit tests for the metrics service.
+"""
+import pytest
+
+from services import get_service
+from services.metrics import Counter, MetricsService
+
+
+@pytest.fixture(name="service")
+def fixture_service() -> MetricsService:
+    """
+    Convenience alias for the MetricsService.
+    """
+    yield get_service(MetricsService)
+
+
+def test_register_counter(service: MetricsService):
+    """
+    Registering a counter, e.g. from another service.
+    """
+    counter = service.counter("awards_total", "Awards bestowed", labels=["title"])
+    counter.labels("SQLAlchemist").inc()
+    counter.labels("SQLAlchemist").inc(2)
+    counter.labels('"Quoted"').inc()
+
+    # Registering the same metric again returns the existing one.
+    assert service.counter("awards_total", "Awards bestowed", ["title"]) is counter
+    assert isinstance(counter, Counter)
+
+    lines = service.render().splitlines()
+    assert "# TYPE awards_total counter" in lines
+    assert 'awards_total{title="SQLAlchemist"} 3.0' in lines
+    assert r'awards_total{title="\"Quoted\""} 1.0' in lines
+
+
+def test_register_conflict(service: MetricsService):
+    """
+    Attempting to register a metric with the same name as a different metric.
+    """
+    service.counter("conflicted", "A counter")
+
+    with pytest.raises(ValueError):
+        service.gauge("conflicted", "A gauge")
+
+
+def test_histogram(service: MetricsService):
+    """
+    Histogram buckets are rendered cumulatively.
+    """
+    histogram = service.histogram("latency", "Latency", buckets=[0.1, 1.0])
+    for value in (0.05, 0.1, 0.5, 5.0):
+        histogram.observe(value)
+
+    lines = service.render().splitlines()
+    assert 'latency_bucket{le="0.1"} 2' in lines
+    assert 'latency_bucket{le="1.0"} 3' in lines
+    assert 'latency_bucket{le="+Inf"} 4' in lines
+    assert "latency_count 4" in lines
+    assert "latency_sum 5.65" in lines
+
+
+def test_gauge_callback(service: MetricsService):
+    """
+    Callback gauges are read when the metrics are rendered, and omitted if the
+    callback returns ``None``.
+    """
+    values = [42, None]
+    service.gauge("answer", "The answer", callback=lambda: values[0])
+
+    assert "answer 42" in service.render().splitlines()
+
+    values[0] = None
+    assert "answer" not in service.render()
+
+
+def test_record_request(service: MetricsService):
+    """
+    Recording HTTP requests reuses the metrics' children for each method, route and
+    status.
+    """
+    service.record_request("GET", "/v1/profile/{profile_id}", 200, 0.01)
+    service.record_request("GET", "/v1/profile/{profile_id}", 200, 0.02)
+    service.record_request("GET", "/v1/profile/{profile_id}", 404, 0.01)
+
+    requests, duration = service._http_children["GET"]["/v1/profile/{profile_id}"][200]
+    assert requests is service.http_requests.labels(
+        "GET", "/v1/profile/{profile_id}", "200"
+    )
+    assert requests.value == 2
+    assert duration.count == 3
+
+    lines = service.render().splitlines()
+    assert (
+        'http_requests_total{method="GET",route="/v1/profile/{profile_id}",'
+        'status="404"} 1.0'
+    ) in lines
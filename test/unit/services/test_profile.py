@@ -1,10 +1,22 @@
 """
 Unit tests for the profile service.
 """
+import asyncio
+from datetime import datetime
+from os import getenv
+
+import orjson
 import pytest
+from sqlalchemy.exc import IntegrityError
 
+from api.pytest_utils import assert_max_queries
+from dev.services.migration import MigrationService
+from models.base import model_encoder
 from models.profile import Profile
-from services import get_service
+from services import base, get_service
+from services.config import TestConfig
+from services.credentials import is_password_hash
+from services.metrics import MetricsService
 from services.profile import EditAwardRequest, EditProfileRequest, ProfileService
 
 
@@ -93,10 +105,14 @@ async def test_edit_by_id_happy_path(profiles: list[Profile], service: ProfileSe
         actual: Profile = await service.edit_by_id(session, target_profile.id, data)
         await session.commit()
 
+    assert service.profiles_edited.value == 1
+
     # ID cannot be edited.
     assert actual.id == target_profile.id
     assert actual.username == data.username
-    assert actual.password == data.password
+    # The password is hashed.
+    assert actual.password != data.password
+    assert (await service.credentials.verify(data.password, actual.password)).ok
     assert actual.gender == data.gender
     assert actual.full_name == data.full_name
     assert actual.street_address == data.street_address
@@ -158,12 +174,43 @@ async def test_create_profile_happy_path(
         actual: Profile = await service.create(session, data)
         await session.commit()
 
-    # The new profile is returned.
+    # The new profile is returned, with its password hashed.
+    assert (await service.credentials.verify(data.password, actual.password)).ok
+    expected.password = actual.password
     assert actual == expected
 
     # The new profile was added to the database.
     async with service.session() as session:
         assert await service.get_by_id(session, actual.id) == actual
+    assert service.profiles_created.value == 1
+
+
+async def test_authenticate(profiles: list[Profile], service: ProfileService):
+    """
+    Checking a username and password, upgrading the stored password if necessary.
+    """
+    target_profile = profiles[0]
+    assert not is_password_hash(target_profile.password)
+
+    async with service.session() as session:
+        assert await service.authenticate(session, target_profile.username, "x") is None
+        assert await service.authenticate(session, "nobody", "x") is None
+
+        # The plain text password is hashed.
+        profile = await service.authenticate(
+            session, target_profile.username, target_profile.password
+        )
+        assert profile.id == target_profile.id
+        assert is_password_hash(profile.password)
+        await session.commit()
+
+    async with service.session() as session:
+        assert await service.authenticate(
+            session, target_profile.username, target_profile.password
+        )
+
+    assert service.logins_succeeded.value == 2
+    assert service.logins_failed.value == 2
 
 
 async def test_bestow_award_happy_path(
@@ -185,6 +232,9 @@ async def test_bestow_award_happy_path(
         assert len(actual_profile.awards) == 1
         assert actual_profile.awards[0].title == data.title
 
+    metrics: MetricsService = get_service(MetricsService)
+    assert "awards_bestowed_total 1.0" in metrics.render().splitlines()
+
 
 async def test_bestow_award_non_existent_profile(service: ProfileService):
     """
@@ -196,3 +246,203 @@ async def test_bestow_award_non_existent_profile(service: ProfileService):
         profile = await service.bestow_award(session, 999, data)
 
         assert profile is None
+
+
+async def test_read_profiles(profiles: list[Profile], service: ProfileService):
+    """
+    :py:meth:`ProfileService.read_profiles` returns the same data as the ORM.
+    """
+    async with service.session() as session:
+        await service.bestow_award(
+            session, profiles[0].id, EditAwardRequest(title="SQLAlchemist")
+        )
+        await service.bestow_award(
+            session, profiles[2].id, EditAwardRequest(title="Test Whisperer")
+        )
+        await session.commit()
+
+    async with service.session() as session:
+        expected = [
+            model_encoder(profile) for profile in await service.load_profiles(session)
+        ]
+
+        records = await service.read_profiles(session)
+        assert [orjson.loads(record.to_json()) for record in records] == expected
+
+        # Pagination.
+        records = await service.read_profiles(session, after=profiles[0].id, limit=1)
+        assert [orjson.loads(record.to_json()) for record in records] == expected[1:2]
+
+        # Specific IDs, without awards.
+        records = await service.read_profiles(
+            session, ids=[profiles[2].id, 999], with_awards=False
+        )
+        assert [record.to_dict() for record in records] == [
+            {key: value for key, value in expected[2].items() if key != "awards"}
+        ]
+
+        # Streaming uses the same records.
+        chunks = [chunk async for chunk in service.stream_profiles(session, 2)]
+        assert [len(chunk) for chunk in chunks] == [2, 1]
+        assert [
+            orjson.loads(r.to_json()) for chunk in chunks for r in chunk
+        ] == expected
+
+
+async def test_queue_award(profiles: list[Profile], service: ProfileService):
+    """
+    Awards from concurrent callers are saved together.
+    """
+    service.group_commit_delay = 60
+
+    # Fill the buffer, so that the awards are saved straight away.
+    service.group_commit_size = 4
+    # One transaction: load the profiles, then insert the awards.  SQLite inserts one
+    # row per statement, to return the IDs in order (Postgres inserts them all at
+    # once).
+    with assert_max_queries(4):
+        results = await asyncio.gather(
+            service.queue_award(profiles[0].id, EditAwardRequest(title="Bug Squasher")),
+            service.queue_award(profiles[1].id, EditAwardRequest(title="Mentor")),
+            service.queue_award(999, EditAwardRequest(title="Nobody")),
+            service.queue_award(profiles[0].id, EditAwardRequest(title="Deploy Hero")),
+        )
+
+    # Awards for profiles that don't exist are skipped.
+    first, second, missing, third = results
+    assert missing is None
+    assert first is third
+
+    assert [a.title for a in first.awards] == ["Bug Squasher", "Deploy Hero"]
+    assert [a.title for a in second.awards] == ["Mentor"]
+
+    async with service.session() as session:
+        loaded = await service.get_by_ids(session, [profiles[0].id, profiles[1].id])
+
+    assert [(a.id, a.title) for a in loaded[profiles[0].id].awards] == [
+        (a.id, a.title) for a in first.awards
+    ]
+    assert [(a.id, a.title) for a in loaded[profiles[1].id].awards] == [
+        (a.id, a.title) for a in second.awards
+    ]
+
+
+async def test_queue_award_retry(profiles: list[Profile], service: ProfileService):
+    """
+    If the batch fails to save, each award is retried on its own, so that only the
+    caller with the bad award gets an error.
+    """
+    service.group_commit_delay = 60
+    service.group_commit_size = 3
+
+    results = await asyncio.gather(
+        service.queue_award(profiles[0].id, EditAwardRequest(title="Bug Squasher")),
+        # Violates the ``NOT NULL`` constraint.
+        service.queue_award(
+            profiles[0].id, EditAwardRequest.model_construct(title=None)
+        ),
+        service.queue_award(profiles[1].id, EditAwardRequest(title="Mentor")),
+        return_exceptions=True,
+    )
+
+    first, error, second = results
+    assert isinstance(error, IntegrityError)
+    assert [a.title for a in first.awards] == ["Bug Squasher"]
+    assert [a.title for a in second.awards] == ["Mentor"]
+
+
+async def test_queue_award_delay(profiles: list[Profile], service: ProfileService):
+    """
+    Awards are saved once the delay has passed, even if the buffer isn't full.
+    """
+    service.group_commit_delay = 0.01
+
+    profile = await service.queue_award(
+        profiles[0].id, EditAwardRequest(title="SQLAlchemist")
+    )
+
+    async with service.session() as session:
+        loaded = await service.get_by_id(session, profiles[0].id)
+        assert [a.id for a in loaded.awards] == [a.id for a in profile.awards]
+
+
+async def test_queue_award_close(profiles: list[Profile], service: ProfileService):
+    """
+    Closing the service saves any awards that are still waiting.
+    """
+    service.group_commit_delay = 60
+
+    queued = asyncio.create_task(
+        service.queue_award(profiles[0].id, EditAwardRequest(title="SQLAlchemist"))
+    )
+    await asyncio.sleep(0)
+    assert not queued.done()
+
+    await service.close()
+    assert (await queued).awards
+
+
+@pytest.fixture(name="json_db", params=["sqlite", "postgresql"])
+async def fixture_json_db(request: pytest.FixtureRequest, monkeypatch) -> str:
+    """
+    Runs a test against the test database, then against Postgres, if
+    ``BENCHMARK_DB_URL`` points at a Postgres database (all tables will be dropped and
+    recreated), as the SQL that builds JSON documents is different for each.
+
+    Request this fixture before any fixtures that use the database.
+    """
+    if request.param == "postgresql":
+        url = getenv("BENCHMARK_DB_URL", "")
+        if not url.startswith("postgresql"):
+            pytest.skip("set BENCHMARK_DB_URL to a Postgres database to run")
+
+        # Replace the services created by the global ``db`` fixture.
+        await base.close_services()
+        monkeypatch.setattr(TestConfig, "db_connection_string", url)
+        monkeypatch.setattr(base, "registry", base.ServiceInstanceCache(base._registry))
+        await get_service(MigrationService).create_tables_from_models()
+
+    yield request.param
+
+
+async def test_get_json_by_id(
+    json_db: str, profiles: list[Profile], service: ProfileService
+):
+    """
+    :py:meth:`ProfileService.get_json_by_id` builds the same JSON as
+    :py:func:`model_encoder` (including how timestamps are formatted).
+    """
+    async with service.session() as session:
+        await service.insert_awards(
+            session,
+            [
+                # Microseconds are only included if they aren't zero.
+                {
+                    "title": "Bug Squasher",
+                    "created_at": datetime(2023, 1, 1, 12, 30),
+                    "profile_id": profiles[0].id,
+                },
+                {
+                    "title": "Deploy Hero",
+                    "created_at": datetime(2023, 2, 1, 9, 15, 30, 123456),
+                    "profile_id": profiles[0].id,
+                },
+                # Trailing zeros in the fraction are kept.
+                {
+                    "title": "Code Reviewer",
+                    "created_at": datetime(2023, 3, 1, 8, 0, 0, 500000),
+                    "profile_id": profiles[1].id,
+                },
+            ],
+        )
+        await service.bestow_award(
+            session, profiles[0].id, EditAwardRequest(title='"Quoted" & unicode ✨')
+        )
+        await session.commit()
+
+    async with service.session() as session:
+        for profile in await service.load_profiles(session):
+            document = await service.get_json_by_id(session, profile.id)
+            assert orjson.loads(document) == model_encoder(profile)
+
+        assert await service.get_json_by_id(session, 999) is None